@@ -0,0 +1,551 @@
+import numpy as np
+from numba import njit, prange
+
+from analysis._kernels import _true_range
+
+
+# Columns per feature block; the price and moving-average blocks also scale with their period lists
+PRICE_RATIO_FEATURES = 4
+MOVING_AVERAGE_FEATURES = 3
+OSCILLATOR_FEATURES = 14
+VOLUME_FEATURES = 10
+VOLATILITY_FEATURES = 10
+MOMENTUM_FEATURES = 10
+PATTERN_FEATURES = 9
+MICROSTRUCTURE_FEATURES = 6
+
+# TA-Lib treats magnitudes below this as zero
+_TA_EPSILON = 1e-8
+
+
+def feature_count(n_lookbacks: int, n_technicals: int) -> int:
+    """Width of the matrix written by compute_all_features"""
+    return (
+        n_lookbacks + PRICE_RATIO_FEATURES + MOVING_AVERAGE_FEATURES * n_technicals
+        + OSCILLATOR_FEATURES + VOLUME_FEATURES + VOLATILITY_FEATURES
+        + MOMENTUM_FEATURES + PATTERN_FEATURES + MICROSTRUCTURE_FEATURES
+    )
+
+
+@njit(cache=True)
+def _fill(value: float, fill: float) -> float:
+    """Neutral value for a NaN feature (infinities are kept, like fillna)"""
+    return fill if np.isnan(value) else value
+
+
+@njit(cache=True, error_model='numpy')
+def _slide_mean(state: np.ndarray, slot: int, period: int, value: float, old: float) -> float:
+    """Rolling mean with pandas semantics: NaN until the window holds period non-NaN values
+    
+    state[slot] is (sum, count); value enters the window and old (NaN before the
+    window is full) leaves it after the mean is taken.
+    """
+    if not np.isnan(value):
+        state[slot, 0] += value
+        state[slot, 1] += 1.0
+    mean = state[slot, 0] / period if state[slot, 1] == period else np.nan
+    if not np.isnan(old):
+        state[slot, 0] -= old
+        state[slot, 1] -= 1.0
+    return mean
+
+
+@njit(cache=True, error_model='numpy')
+def _slide_var(state: np.ndarray, slot: int, period: int, value: float, old: float) -> float:
+    """Rolling sample variance (ddof=1) from Welford add/remove updates, pandas window semantics
+    
+    state[slot] is (mean, sum of squared deviations, count).
+    """
+    if not np.isnan(value):
+        state[slot, 2] += 1.0
+        delta = value - state[slot, 0]
+        state[slot, 0] += delta / state[slot, 2]
+        state[slot, 1] += delta * (value - state[slot, 0])
+    var = np.nan
+    if state[slot, 2] == period:
+        var = max(state[slot, 1], 0.0) / (period - 1)
+    if not np.isnan(old):
+        state[slot, 2] -= 1.0
+        if state[slot, 2] == 0.0:
+            state[slot, 0] = 0.0
+            state[slot, 1] = 0.0
+        else:
+            delta = old - state[slot, 0]
+            state[slot, 0] -= delta / state[slot, 2]
+            state[slot, 1] -= delta * (old - state[slot, 0])
+    return var
+
+
+@njit(cache=True, error_model='numpy')
+def _slide_cov(state: np.ndarray, period: int, x: float, y: float, old_x: float, old_y: float) -> float:
+    """Rolling sample covariance (ddof=1) of the bars where both x and y are present
+    
+    state is (mean x, mean y, co-moment, count).
+    """
+    if not (np.isnan(x) or np.isnan(y)):
+        state[3] += 1.0
+        delta_x = x - state[0]
+        state[0] += delta_x / state[3]
+        state[1] += (y - state[1]) / state[3]
+        state[2] += delta_x * (y - state[1])
+    cov = state[2] / (period - 1) if state[3] == period else np.nan
+    if not (np.isnan(old_x) or np.isnan(old_y)):
+        state[3] -= 1.0
+        if state[3] == 0.0:
+            state[0] = 0.0
+            state[1] = 0.0
+            state[2] = 0.0
+        else:
+            delta_x = old_x - state[0]
+            state[0] -= delta_x / state[3]
+            state[1] -= (old_y - state[1]) / state[3]
+            state[2] -= delta_x * (old_y - state[1])
+    return cov
+
+
+@njit(cache=True)
+def _window_max(values: np.ndarray, start: int, end: int) -> float:
+    """Largest value of values[start:end], NaN if any value is missing"""
+    best = values[start]
+    for i in range(start, end):
+        if np.isnan(values[i]):
+            return np.nan
+        if values[i] > best:
+            best = values[i]
+    return best
+
+
+@njit(cache=True)
+def _window_min(values: np.ndarray, start: int, end: int) -> float:
+    """Smallest value of values[start:end], NaN if any value is missing"""
+    best = values[start]
+    for i in range(start, end):
+        if np.isnan(values[i]):
+            return np.nan
+        if values[i] < best:
+            best = values[i]
+    return best
+
+
+@njit(cache=True, error_model='numpy')
+def _bar_returns(close: np.ndarray) -> np.ndarray:
+    """Simple close-to-close returns (NaN for the first bar), shared by the blocks that need them"""
+    returns = np.empty(close.shape[0])
+    returns[0] = np.nan
+    for t in range(1, close.shape[0]):
+        returns[t] = close[t] / close[t - 1] - 1.0
+    return returns
+
+
+@njit(cache=True, error_model='numpy')
+def _price_block(open_, high, low, close, lookbacks, out, col):
+    """Returns over each lookback, log return and intrabar price ratios"""
+    n = close.shape[0]
+    n_lookbacks = lookbacks.shape[0]
+    for t in range(n):
+        for j in range(n_lookbacks):
+            period = lookbacks[j]
+            value = close[t] / close[t - period] - 1.0 if t >= period else np.nan
+            out[t, col + j] = _fill(value, 0.0)
+        base = col + n_lookbacks
+        log_return = np.log(close[t] / close[t - 1]) if t >= 1 else np.nan
+        out[t, base] = _fill(log_return, 0.0)
+        out[t, base + 1] = _fill(close[t] / open_[t], 1.0)
+        out[t, base + 2] = _fill(high[t] / low[t], 1.0)
+        out[t, base + 3] = _fill((high[t] + low[t]) / 2.0 / close[t], 1.0)
+
+
+@njit(cache=True, error_model='numpy')
+def _moving_average_block(close, technicals, out, col):
+    """Price over SMA, price over EMA and SMA slope for each technical period (TA-Lib seeding)
+    
+    All periods advance together in one pass over close, each with its own running sum and EMA.
+    """
+    n = close.shape[0]
+    n_periods = technicals.shape[0]
+    totals = np.zeros(n_periods)
+    emas = np.zeros(n_periods)
+    prev_smas = np.full(n_periods, np.nan)
+    for t in range(n):
+        price = close[t]
+        for j in range(n_periods):
+            period = technicals[j]
+            base = col + MOVING_AVERAGE_FEATURES * j
+            totals[j] += price
+            sma = np.nan
+            ema = np.nan
+            if t >= period - 1:
+                sma = totals[j] / period
+                totals[j] -= close[t - period + 1]
+                if t == period - 1:
+                    emas[j] = sma
+                else:
+                    emas[j] = (price - emas[j]) * (2.0 / (period + 1.0)) + emas[j]
+                ema = emas[j]
+            out[t, base] = _fill(price / sma, 1.0)
+            out[t, base + 1] = _fill(price / ema, 1.0)
+            out[t, base + 2] = _fill((sma - prev_smas[j]) / sma, 0.0)
+            prev_smas[j] = sma
+
+
+@njit(cache=True, error_model='numpy')
+def _oscillator_block(high, low, close, out, col):
+    """RSI(14), MACD(12, 26, 9), Bollinger position and width, Stochastic and Williams %R (TA-Lib definitions)"""
+    n = close.shape[0]
+    
+    # Wilder RSI(14): seeded with the mean gain / loss of the first 14 changes
+    rsi_period = 14
+    avg_gain = 0.0
+    avg_loss = 0.0
+    for t in range(n):
+        rsi = np.nan
+        if t >= 1:
+            change = close[t] - close[t - 1]
+            if t <= rsi_period:
+                if change < 0:
+                    avg_loss -= change
+                else:
+                    avg_gain += change
+                if t == rsi_period:
+                    avg_gain /= rsi_period
+                    avg_loss /= rsi_period
+            else:
+                avg_gain *= rsi_period - 1
+                avg_loss *= rsi_period - 1
+                if change < 0:
+                    avg_loss -= change
+                else:
+                    avg_gain += change
+                avg_gain /= rsi_period
+                avg_loss /= rsi_period
+            if t >= rsi_period:
+                total = avg_gain + avg_loss
+                rsi = 100.0 * (avg_gain / total) if abs(total) >= _TA_EPSILON else 0.0
+        out[t, col] = _fill(rsi, 50.0)
+    
+    # MACD: both EMAs start at bar 25 (fast seeded over bars 14-25, slow over 0-25),
+    # the signal EMA is seeded with the first nine MACD values and everything is reported from bar 33
+    k_fast = 2.0 / 13.0
+    k_slow = 2.0 / 27.0
+    k_signal = 2.0 / 10.0
+    fast = 0.0
+    slow = 0.0
+    signal = 0.0
+    signal_seed = 0.0
+    for t in range(n):
+        if t < 25:
+            slow += close[t]
+            if t >= 14:
+                fast += close[t]
+        elif t == 25:
+            fast = (fast + close[t]) / 12.0
+            slow = (slow + close[t]) / 26.0
+        else:
+            fast = (close[t] - fast) * k_fast + fast
+            slow = (close[t] - slow) * k_slow + slow
+        macd = np.nan
+        macd_signal = np.nan
+        if t >= 25:
+            line = fast - slow
+            if t < 33:
+                signal_seed += line
+            elif t == 33:
+                signal = (signal_seed + line) / 9.0
+            else:
+                signal = (line - signal) * k_signal + signal
+            if t >= 33:
+                macd = line
+                macd_signal = signal
+        out[t, col + 1] = _fill(macd, 0.0)
+        out[t, col + 2] = _fill(macd_signal, 0.0)
+        out[t, col + 3] = _fill(macd - macd_signal, 0.0)
+    
+    # Bollinger Bands over 10, 20 and 50 bars: running sum and sum of squares, population deviation
+    for j in range(3):
+        period = (10, 20, 50)[j]
+        base = col + 4 + 2 * j
+        total = 0.0
+        squares = 0.0
+        for t in range(n):
+            price = close[t]
+            total += price
+            squares += price * price
+            position = np.nan
+            width = np.nan
+            if t >= period - 1:
+                sma = total / period
+                variance = squares / period - sma * sma
+                std = np.sqrt(variance) if variance >= _TA_EPSILON else 0.0
+                trailing = close[t - period + 1]
+                total -= trailing
+                squares -= trailing * trailing
+                lower = sma - std * 2
+                upper = sma + std * 2
+                position = (price - lower) / (upper - lower)
+                width = std / sma
+            out[t, base] = _fill(position, 0.5)
+            out[t, base + 1] = _fill(width, 0.0)
+    
+    # Stochastic %K and Williams %R over 14 and 21 bars
+    for j in range(2):
+        period = (14, 21)[j]
+        for t in range(n):
+            stochastic = np.nan
+            williams = np.nan
+            if t >= period - 1:
+                highest = _window_max(high, t - period + 1, t + 1)
+                lowest = _window_min(low, t - period + 1, t + 1)
+                stochastic = 100 * ((close[t] - lowest) / (highest - lowest))
+                williams = -100 * ((highest - close[t]) / (highest - lowest))
+            out[t, col + 10 + j] = _fill(stochastic, 50.0)
+            out[t, col + 12 + j] = _fill(williams, -50.0)
+
+
+@njit(cache=True, error_model='numpy')
+def _volume_block(close, volume, out, col):
+    """Volume, price-volume and OBV over their moving averages, and volume rate of change"""
+    n = close.shape[0]
+    state = np.zeros((8, 2))
+    
+    # OBV is a running sum; only the last 20 values (the longest OBV window) are kept to leave the windows
+    obv_history = 20
+    obv = np.empty(obv_history)
+    running_obv = 0.0
+    for t in range(n):
+        if t >= 1 and close[t] > close[t - 1]:
+            running_obv += volume[t]
+        else:
+            running_obv -= volume[t]
+        obv[t % obv_history] = running_obv
+        pv = close[t] * volume[t]
+    
+        for j in range(3):
+            period = (5, 10, 20)[j]
+            start = t - period + 1
+            old_volume = volume[start] if start >= 0 else np.nan
+            old_pv = close[start] * volume[start] if start >= 0 else np.nan
+            volume_sma = _slide_mean(state, j, period, volume[t], old_volume)
+            pv_sma = _slide_mean(state, 3 + j, period, pv, old_pv)
+            out[t, col + j] = _fill(volume[t] / volume_sma, 1.0)
+            out[t, col + 3 + j] = _fill(pv / pv_sma, 1.0)
+    
+        for j in range(2):
+            period = (10, 20)[j]
+            start = t - period + 1
+            old_obv = obv[start % obv_history] if start >= 0 else np.nan
+            obv_sma = _slide_mean(state, 6 + j, period, running_obv, old_obv)
+            out[t, col + 6 + j] = _fill(running_obv / obv_sma, 1.0)
+    
+        for j in range(2):
+            period = (5, 10)[j]
+            roc = volume[t] / volume[t - period] - 1.0 if t >= period else np.nan
+            out[t, col + 8 + j] = _fill(roc, 0.0)
+
+
+@njit(cache=True, error_model='numpy')
+def _volatility_block(open_, high, low, close, returns, out, col):
+    """Return volatility, ATR and range over ATR, and Garman-Klass volatility averages"""
+    n = close.shape[0]
+    variances = np.zeros((4, 3))
+    means = np.zeros((4, 2))
+    
+    # Garman-Klass terms take two logs each, so the last 20 (the longest window) are kept in a ring
+    gk_history = 20
+    gk = np.empty(gk_history)
+    gk_factor = 2 * np.log(2) - 1
+    for t in range(n):
+        # Bar inputs; true ranges are cheap enough to recompute when they leave a window
+        true_range = _true_range(high, low, close, t)
+        log_hl = np.log(high[t] / low[t])
+        log_co = np.log(close[t] / open_[t])
+        garman_klass = log_hl * log_hl - gk_factor * log_co * log_co
+        gk[t % gk_history] = garman_klass
+    
+        for j in range(4):
+            period = (5, 10, 20, 50)[j]
+            start = t - period + 1
+            old = returns[start] if start >= 0 else np.nan
+            var = _slide_var(variances, j, period, returns[t], old)
+            out[t, col + j] = _fill(np.sqrt(var), 0.0)
+    
+        for j in range(2):
+            period = (14, 21)[j]
+            start = t - period + 1
+            old = _true_range(high, low, close, start) if start >= 0 else np.nan
+            atr = _slide_mean(means, j, period, true_range, old)
+            out[t, col + 4 + 2 * j] = _fill(atr, 0.0)
+            out[t, col + 5 + 2 * j] = _fill(true_range / atr, 1.0)
+    
+        for j in range(2):
+            period = (10, 20)[j]
+            start = t - period + 1
+            old = gk[start % gk_history] if start >= 0 else np.nan
+            out[t, col + 8 + j] = _fill(_slide_mean(means, 2 + j, period, garman_klass, old), 0.0)
+
+
+@njit(cache=True, error_model='numpy')
+def _momentum_block(close, returns, out, col):
+    """Rate of change, momentum ratio, return acceleration and distance from the SMA"""
+    n = close.shape[0]
+    means = np.zeros((2, 2))
+    for t in range(n):
+        for j in range(5):
+            period = (1, 3, 5, 10, 20)[j]
+            roc = close[t] / close[t - period] - 1.0 if t >= period else np.nan
+            out[t, col + j] = _fill(roc, 0.0)
+    
+        for j in range(2):
+            period = (10, 20)[j]
+            momentum = close[t] / close[t - period] if t >= period else np.nan
+            out[t, col + 5 + j] = _fill(momentum, 1.0)
+    
+        acceleration = returns[t] - returns[t - 1] if t >= 2 else np.nan
+        out[t, col + 7] = _fill(acceleration, 0.0)
+    
+        for j in range(2):
+            period = (20, 50)[j]
+            start = t - period + 1
+            old = close[start] if start >= 0 else np.nan
+            sma = _slide_mean(means, j, period, close[t], old)
+            out[t, col + 8 + j] = _fill((close[t] - sma) / sma, 0.0)
+
+
+@njit(cache=True, error_model='numpy')
+def _pattern_block(open_, high, low, close, out, col):
+    """Candlestick flags, gaps and breakouts above / below the previous 5 and 10 bars"""
+    n = close.shape[0]
+    for t in range(n):
+        body = abs(close[t] - open_[t])
+        upper_shadow = high[t] - max(close[t], open_[t])
+        lower_shadow = min(close[t], open_[t]) - low[t]
+    
+        out[t, col] = 1.0 if body / (high[t] - low[t]) < 0.1 else 0.0
+        out[t, col + 1] = 1.0 if lower_shadow > 2 * body and upper_shadow < 0.1 * body else 0.0
+        out[t, col + 2] = 1.0 if upper_shadow > 2 * body and lower_shadow < 0.1 * body else 0.0
+    
+        gap_up = False
+        gap_down = False
+        if t >= 1:
+            prev_close = close[t - 1]
+            gap_up = open_[t] > prev_close and low[t] > prev_close
+            gap_down = open_[t] < prev_close and high[t] < prev_close
+        out[t, col + 3] = 1.0 if gap_up else 0.0
+        out[t, col + 4] = 1.0 if gap_down else 0.0
+    
+        for j in range(2):
+            period = (5, 10)[j]
+            higher_high = False
+            lower_low = False
+            if t >= period:
+                higher_high = high[t] > _window_max(high, t - period, t)
+                lower_low = low[t] < _window_min(low, t - period, t)
+            out[t, col + 5 + 2 * j] = 1.0 if higher_high else 0.0
+            out[t, col + 6 + 2 * j] = 1.0 if lower_low else 0.0
+
+
+@njit(cache=True, error_model='numpy')
+def _microstructure_block(high, low, close, volume, returns, out, col):
+    """Spread proxy, price impact, Amihud illiquidity, Roll spread and Kyle's lambda"""
+    n = close.shape[0]
+    means = np.zeros((2, 2))
+    volume_var = np.zeros((1, 3))
+    cov_state = np.zeros(4)
+    
+    # Roll's effective spread from the first-order autocovariance of returns (zero when it is not negative)
+    mean_now = 0.0
+    mean_prev = 0.0
+    co_moment = 0.0
+    pairs = 0
+    for t in range(2, n):
+        now = returns[t]
+        prev = returns[t - 1]
+        if np.isnan(now) or np.isnan(prev):
+            continue
+        pairs += 1
+        delta = now - mean_now
+        mean_now += delta / pairs
+        mean_prev += (prev - mean_prev) / pairs
+        co_moment += delta * (prev - mean_prev)
+    roll = 0.0
+    if pairs > 1 and co_moment < 0:
+        roll = 2 * np.sqrt(-co_moment / (pairs - 1))
+    
+    # Kyle's lambda for bar t is the OLS slope of |return| on volume over the 19 bars before it
+    kyle_period = 19
+    kyle = np.nan
+    for t in range(n):
+        volume_change = volume[t] / volume[t - 1] - 1.0 if t >= 1 else np.nan
+        out[t, col] = _fill((high[t] - low[t]) / close[t], 0.0)
+        out[t, col + 1] = _fill(returns[t] / (volume_change + 1e-8), 0.0)
+    
+        amihud = abs(returns[t]) / (volume[t] * close[t] + 1e-8)
+        for j in range(2):
+            period = (5, 20)[j]
+            start = t - period + 1
+            old = np.nan
+            if start >= 0:
+                old = abs(returns[start]) / (volume[start] * close[start] + 1e-8)
+            out[t, col + 2 + j] = _fill(_slide_mean(means, j, period, amihud, old), 0.0)
+    
+        out[t, col + 4] = roll
+    
+        lagged = kyle
+        if not np.isfinite(lagged):
+            lagged = 0.0
+        out[t, col + 5] = lagged
+        start = t - kyle_period + 1
+        old_volume = volume[start] if start >= 0 else np.nan
+        old_abs = abs(returns[start]) if start >= 0 else np.nan
+        covariance = _slide_cov(cov_state, kyle_period, volume[t], abs(returns[t]), old_volume, old_abs)
+        kyle = covariance / _slide_var(volume_var, 0, kyle_period, volume[t], old_volume)
+
+
+@njit(cache=True, parallel=True)
+def compute_all_features(open_, high, low, close, volume, lookbacks, technicals, out):
+    """Write every ML feature for each bar into out, one block of columns per feature group
+    
+    The eight blocks run in parallel; each streams the OHLCV columns once with
+    running (O(1) per bar) window state and writes its columns in place. Each
+    NaN (warm-up or missing input) is replaced by the neutral fill of its
+    feature as it is written, so out never contains NaN. Technical
+    indicators follow TA-Lib (SMA/EMA seeding, Wilder RSI, MACD alignment,
+    population Bollinger deviation); the other windows follow pandas rolling
+    semantics.
+    
+    out must be (n, feature_count(len(lookbacks), len(technicals))) and n must
+    exceed 50 bars, the longest fixed window. Columns are ordered price,
+    moving averages, oscillators, volume, volatility, momentum, pattern and
+    microstructure.
+    """
+    n_lookbacks = lookbacks.shape[0]
+    offsets = np.empty(8, dtype=np.int64)
+    offsets[0] = 0
+    offsets[1] = offsets[0] + n_lookbacks + PRICE_RATIO_FEATURES
+    offsets[2] = offsets[1] + MOVING_AVERAGE_FEATURES * technicals.shape[0]
+    offsets[3] = offsets[2] + OSCILLATOR_FEATURES
+    offsets[4] = offsets[3] + VOLUME_FEATURES
+    offsets[5] = offsets[4] + VOLATILITY_FEATURES
+    offsets[6] = offsets[5] + MOMENTUM_FEATURES
+    offsets[7] = offsets[6] + PATTERN_FEATURES
+    
+    # Close-to-close returns feed three blocks, so they are computed once up front
+    returns = _bar_returns(close)
+    
+    for block in prange(8):
+        col = offsets[block]
+        if block == 0:
+            _price_block(open_, high, low, close, lookbacks, out, col)
+        elif block == 1:
+            _moving_average_block(close, technicals, out, col)
+        elif block == 2:
+            _oscillator_block(high, low, close, out, col)
+        elif block == 3:
+            _volume_block(close, volume, out, col)
+        elif block == 4:
+            _volatility_block(open_, high, low, close, returns, out, col)
+        elif block == 5:
+            _momentum_block(close, returns, out, col)
+        elif block == 6:
+            _pattern_block(open_, high, low, close, out, col)
+        else:
+            _microstructure_block(high, low, close, volume, returns, out, col)
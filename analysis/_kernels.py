@@ -0,0 +1,342 @@
+import numpy as np
+from numba import njit, prange
+
+
+@njit(cache=True)
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """Recursive exponential moving average seeded with the first value"""
+    alpha = 2.0 / (span + 1.0)
+    out = np.empty(values.shape[0])
+    state = values[0]
+    out[0] = state
+    for i in range(1, values.shape[0]):
+        state = alpha * values[i] + (1.0 - alpha) * state
+        out[i] = state
+    return out
+
+
+@njit(cache=True)
+def ema_last(values: np.ndarray, span: int) -> float:
+    """Final value of the recursive EMA without materializing the series"""
+    alpha = 2.0 / (span + 1.0)
+    state = values[0]
+    for i in range(1, values.shape[0]):
+        state = alpha * values[i] + (1.0 - alpha) * state
+    return state
+
+
+@njit(cache=True)
+def wilder_last(values: np.ndarray, period: int) -> float:
+    """Final Wilder-smoothed average: seeded with the mean of the first period values"""
+    n = values.shape[0]
+    if n < period:
+        return np.nan
+    state = 0.0
+    for i in range(period):
+        state += values[i]
+    state /= period
+    for i in range(period, n):
+        state = (state * (period - 1) + values[i]) / period
+    return state
+
+
+# Moving-average windows emitted by technical_indicators_last, in return order
+SMA_WINDOWS = np.array([5, 10, 20, 50, 200])
+
+
+@njit(cache=True)
+def _true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray, i: int) -> float:
+    """True range of bar i (the first bar uses its own close as previous close)"""
+    prev_close = close[i - 1] if i > 0 else close[0]
+    return max(high[i] - low[i], abs(high[i] - prev_close), abs(low[i] - prev_close))
+
+
+@njit(cache=True, error_model='numpy')
+def _money_flow_volume(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray, i: int) -> float:
+    """Chaikin money flow volume of bar i (zero for a bar with no range)"""
+    price_range = high[i] - low[i]
+    if price_range == 0:
+        return 0.0
+    return ((close[i] - low[i]) - (high[i] - close[i])) / price_range * volume[i]
+
+
+@njit(cache=True)
+def _tail_mean(values: np.ndarray, window: int) -> float:
+    """Mean of the last window values, NaN when the series is shorter"""
+    n = values.shape[0]
+    if n < window:
+        return np.nan
+    total = 0.0
+    for i in range(n - window, n):
+        total += values[i]
+    return total / window
+
+
+@njit(cache=True, error_model='numpy')
+def _stochastic_k(high: np.ndarray, low: np.ndarray, close: np.ndarray, end: int, window: int):
+    """%K for the window ending at bar end, with that window's highest high and lowest low"""
+    highest_high = high[end]
+    lowest_low = low[end]
+    for i in range(end - window + 1, end):
+        highest_high = max(highest_high, high[i])
+        lowest_low = min(lowest_low, low[i])
+    k = 100.0 * ((close[end] - lowest_low) / (highest_high - lowest_low))
+    return k, highest_high, lowest_low
+
+
+@njit(cache=True, error_model='numpy')
+def technical_indicators_last(close: np.ndarray, high: np.ndarray, low: np.ndarray, volume: np.ndarray):
+    """Return the last value of every indicator
+    
+    Only the recursive indicators (EMAs, MACD signal, OBV, Wilder RSI/ATR)
+    walk the whole series; windowed statistics read just their trailing window.
+    
+    Inputs may be float32; every accumulator is float64.
+    
+    Returns (sma_5, sma_10, sma_20, sma_50, sma_200, ema_12, ema_26, ema_50,
+    rsi_14, rsi_21, macd, macd_signal, std_20, stoch_k, stoch_d, williams_r,
+    atr, obv, cmf). Windows longer than the series yield NaN.
+    """
+    n = close.shape[0]
+    last = n - 1
+    
+    # Recursive state; MACD line starts at zero because both EMAs start at close[0]
+    alpha_12 = 2.0 / 13.0
+    alpha_26 = 2.0 / 27.0
+    alpha_50 = 2.0 / 51.0
+    alpha_9 = 2.0 / 10.0
+    ema_12 = float(close[0])
+    ema_26 = float(close[0])
+    ema_50 = float(close[0])
+    macd_signal = 0.0
+    obv = 0.0
+    obv -= volume[0]
+    for i in range(1, n):
+        price = close[i]
+        ema_12 = alpha_12 * price + (1.0 - alpha_12) * ema_12
+        ema_26 = alpha_26 * price + (1.0 - alpha_26) * ema_26
+        ema_50 = alpha_50 * price + (1.0 - alpha_50) * ema_50
+        macd_signal = alpha_9 * (ema_12 - ema_26) + (1.0 - alpha_9) * macd_signal
+        if price > close[i - 1]:
+            obv += volume[i]
+        else:
+            obv -= volume[i]
+    
+    # Moving averages
+    sma = np.empty(SMA_WINDOWS.shape[0])
+    for w in range(SMA_WINDOWS.shape[0]):
+        sma[w] = _tail_mean(close, SMA_WINDOWS[w])
+    
+    # Bollinger deviation over the last 20 closes
+    std_20 = np.nan
+    if n >= 20:
+        squares = 0.0
+        for i in range(n - 20, n):
+            squares += (close[i] - sma[2]) ** 2
+        std_20 = np.sqrt(squares / 19.0)
+    
+    # Wilder-smoothed RSI and ATR over the bar-to-bar changes (the first bar has no change)
+    changes = np.diff(close)
+    gains = np.maximum(changes, 0.0)
+    losses = np.maximum(-changes, 0.0)
+    rsi_14 = 100.0 - (100.0 / (1.0 + wilder_last(gains, 14) / wilder_last(losses, 14)))
+    rsi_21 = 100.0 - (100.0 / (1.0 + wilder_last(gains, 21) / wilder_last(losses, 21)))
+    true_range = np.empty(n - 1)
+    for i in range(1, n):
+        true_range[i - 1] = _true_range(high, low, close, i)
+    atr = wilder_last(true_range, 14)
+    
+    # Stochastic over the last three 14-bar windows, Williams %R over the last one
+    stoch_k = np.nan
+    stoch_d = np.nan
+    williams_r = np.nan
+    if n >= 16:
+        k_prev2, _, _ = _stochastic_k(high, low, close, last - 2, 14)
+        k_prev, _, _ = _stochastic_k(high, low, close, last - 1, 14)
+        stoch_k, highest_high, lowest_low = _stochastic_k(high, low, close, last, 14)
+        stoch_d = (stoch_k + k_prev + k_prev2) / 3.0
+        williams_r = -100.0 * ((highest_high - close[last]) / (highest_high - lowest_low))
+    
+    # Chaikin Money Flow over the last 20 bars
+    cmf = np.nan
+    if n >= 20:
+        mfv_sum = 0.0
+        volume_sum = 0.0
+        for i in range(n - 20, n):
+            mfv_sum += _money_flow_volume(high, low, close, volume, i)
+            volume_sum += volume[i]
+        cmf = mfv_sum / volume_sum
+        if not np.isfinite(cmf):
+            cmf = np.nan
+    
+    return (
+        sma[0], sma[1], sma[2], sma[3], sma[4],
+        ema_12, ema_26, ema_50,
+        rsi_14, rsi_21,
+        ema_12 - ema_26, macd_signal,
+        std_20,
+        stoch_k, stoch_d, williams_r,
+        atr, obv, cmf
+    )
+
+
+@njit(cache=True)
+def composite_score(scores: np.ndarray, weights: np.ndarray) -> float:
+    """Weighted mean of the available scores (NaN = missing) clipped to 0-100, 50 when none are available"""
+    total = 0.0
+    total_weight = 0.0
+    for i in range(scores.shape[0]):
+        if not np.isnan(scores[i]):
+            total += scores[i] * weights[i]
+            total_weight += weights[i]
+    if total_weight == 0.0:
+        return 50.0
+    return min(max(total / total_weight, 0.0), 100.0)
+
+
+# Composite score tiers: STRONG_SELL below 30, SELL, HOLD, BUY, STRONG_BUY from 80
+RECOMMENDATION_BOUNDS = np.array([30.0, 45.0, 65.0, 80.0])
+TIER_CONFIDENCE = np.array([0.8, 0.7, 0.6, 0.8, 0.9])
+
+# Signal bits reported by recommend
+SIGNAL_STRONG_FUNDAMENTALS = 1
+SIGNAL_POSITIVE_TECHNICALS = 2
+SIGNAL_INSIDER_BUYING = 4
+SIGNAL_VERY_HIGH_RISK = 8
+SIGNAL_LIKELY_UP = 16
+SIGNAL_UNLIKELY_UP = 32
+
+
+@njit(cache=True)
+def recommend(score: float, fundamental: float, technical: float, insider: float,
+              very_high_risk: bool, prob_up_30d: float):
+    """Score tier, recommended tier after the risk cap, mean confidence and signal bits
+    
+    Tiers index STRONG_SELL..STRONG_BUY; NaN inputs count as missing.
+    """
+    tier = np.searchsorted(RECOMMENDATION_BOUNDS, score, side='right')
+    recommended = tier
+    confidence = TIER_CONFIDENCE[tier]
+    n_factors = 1
+    signals = 0
+    
+    if fundamental > 70:
+        signals |= SIGNAL_STRONG_FUNDAMENTALS
+        confidence += 0.8
+        n_factors += 1
+    if technical > 70:
+        signals |= SIGNAL_POSITIVE_TECHNICALS
+        confidence += 0.7
+        n_factors += 1
+    if insider > 70:
+        signals |= SIGNAL_INSIDER_BUYING
+        confidence += 0.9
+        n_factors += 1
+    
+    # Very high risk caps buy recommendations at HOLD
+    if very_high_risk:
+        signals |= SIGNAL_VERY_HIGH_RISK
+        recommended = min(recommended, 2)
+        confidence += 0.5
+        n_factors += 1
+    
+    if prob_up_30d > 0.7:
+        signals |= SIGNAL_LIKELY_UP
+        confidence += 0.8
+        n_factors += 1
+    elif prob_up_30d != 0.0 and prob_up_30d < 0.3:
+        signals |= SIGNAL_UNLIKELY_UP
+        confidence += 0.6
+        n_factors += 1
+    
+    return tier, recommended, confidence / n_factors, signals
+
+
+@njit(cache=True, parallel=True)
+def risk_stats(prices: np.ndarray, q: float):
+    """Per-row daily return volatility, historical VaR at percentile q and expected shortfall
+    
+    prices is an (N, T) matrix; each row is processed in parallel and its returns
+    are materialized once. Volatility uses ddof=1 and VaR interpolates like
+    np.percentile; the expected shortfall is the mean of the returns up to the
+    lower VaR order statistic.
+    """
+    n_rows, n_prices = prices.shape
+    n_returns = n_prices - 1
+    position = (n_returns - 1) * q / 100.0
+    below = int(position)
+    fraction = position - below
+    
+    volatility = np.empty(n_rows)
+    var = np.empty(n_rows)
+    expected_shortfall = np.empty(n_rows)
+    for row in prange(n_rows):
+        returns = np.empty(n_returns)
+        
+        # Welford running mean / variance while the returns are produced
+        mean = 0.0
+        m2 = 0.0
+        for t in range(n_returns):
+            value = prices[row, t + 1] / prices[row, t] - 1.0
+            returns[t] = value
+            delta = value - mean
+            mean += delta / (t + 1)
+            m2 += delta * (value - mean)
+        volatility[row] = np.sqrt(m2 / (n_returns - 1))
+        
+        # Quickselect puts the lower tail in front of the VaR order statistic
+        selected = np.partition(returns, below)
+        lower = selected[below]
+        upper = lower
+        if below + 1 < n_returns:
+            upper = selected[below + 1]
+            for t in range(below + 2, n_returns):
+                upper = min(upper, selected[t])
+        var[row] = lower + (upper - lower) * fraction
+        
+        tail = 0.0
+        for t in range(below + 1):
+            tail += selected[t]
+        expected_shortfall[row] = tail / (below + 1)
+    
+    return volatility, var, expected_shortfall
+
+
+@njit(cache=True, error_model='numpy')
+def liquidity_means(high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+    """Mean volume and mean (high - low) / close in one pass, skipping NaN like pandas (NaN when none are valid)"""
+    volume_sum = 0.0
+    volume_count = 0
+    spread_sum = 0.0
+    spread_count = 0
+    for i in range(close.shape[0]):
+        if not np.isnan(volume[i]):
+            volume_sum += volume[i]
+            volume_count += 1
+        spread = (high[i] - low[i]) / close[i]
+        if not np.isnan(spread):
+            spread_sum += spread
+            spread_count += 1
+    return volume_sum / volume_count, spread_sum / spread_count
+
+
+@njit(cache=True, error_model='numpy')
+def neg_sharpe(weights: np.ndarray, mu: np.ndarray, cov: np.ndarray, risk_free_rate: float):
+    """Negative Sharpe ratio of the weights and its analytic gradient, sharing one Σw product"""
+    n = weights.shape[0]
+    cov_weights = np.empty(n)
+    excess_return = -risk_free_rate
+    variance = 0.0
+    for i in range(n):
+        total = 0.0
+        for j in range(n):
+            total += cov[i, j] * weights[j]
+        cov_weights[i] = total
+        variance += weights[i] * total
+        excess_return += weights[i] * mu[i]
+    std = np.sqrt(variance)
+    
+    gradient = np.empty(n)
+    for i in range(n):
+        gradient[i] = excess_return * cov_weights[i] / std ** 3 - mu[i] / std
+    return -excess_return / std, gradient
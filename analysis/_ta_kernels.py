@@ -0,0 +1,63 @@
+import numpy as np
+from numba import njit
+
+
+@njit(cache=True)
+def ewm_mean(values: np.ndarray, alpha: float, min_periods: int) -> np.ndarray:
+    """Series.ewm(alpha=alpha, min_periods=min_periods, adjust=False).mean() as a compiled recursion
+    
+    Follows pandas' update step for bit-identical results: a missing value keeps
+    decaying the previous weight, and the mean restarts at the first observation.
+    """
+    n = values.shape[0]
+    out = np.empty(n)
+    if n == 0:
+        return out
+    weighted = values[0]
+    observations = 0 if np.isnan(weighted) else 1
+    out[0] = weighted if observations >= min_periods else np.nan
+    old_weight = 1.0
+    for i in range(1, n):
+        value = values[i]
+        is_observation = not np.isnan(value)
+        if is_observation:
+            observations += 1
+        if not np.isnan(weighted):
+            old_weight *= 1.0 - alpha
+            if is_observation:
+                if weighted != value:
+                    weighted = (old_weight * weighted + alpha * value) / (old_weight + alpha)
+                old_weight = 1.0
+        elif is_observation:
+            weighted = value
+        out[i] = weighted if observations >= min_periods else np.nan
+    return out
+
+
+@njit(cache=True)
+def _ewm_step(weighted: float, value: float, alpha: float) -> float:
+    """One adjust=False ewm mean step between two observations, rounded like pandas"""
+    if weighted == value:
+        return weighted
+    old_weight = 1.0 - alpha
+    return (old_weight * weighted + alpha * value) / (old_weight + alpha)
+
+
+@njit(cache=True)
+def rsi_averages(prices: np.ndarray, window: int):
+    """Final Wilder-smoothed (alpha = 1 / window) average gain and loss, as ta's RSIIndicator computes them
+    
+    The first bar, and any bar whose change is missing, contributes a zero gain and loss.
+    Both are NaN for fewer than window bars.
+    """
+    n = prices.shape[0]
+    if n < window:
+        return np.nan, np.nan
+    alpha = 1.0 / window
+    average_gain = 0.0
+    average_loss = 0.0
+    for i in range(1, n):
+        change = prices[i] - prices[i - 1]
+        average_gain = _ewm_step(average_gain, change if change > 0 else 0.0, alpha)
+        average_loss = _ewm_step(average_loss, -change if change < 0 else 0.0, alpha)
+    return average_gain, average_loss
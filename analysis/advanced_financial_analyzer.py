@@ -1,34 +1,290 @@
+import functools
+import math
+import operator
+import re
 import numpy as np
 import pandas as pd
+import numexpr as ne
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime, timedelta
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn.preprocessing import StandardScaler
-from sklearn.model_selection import TimeSeriesSplit
-from sklearn.metrics import mean_squared_error, r2_score
-import xgboost as xgb
-import lightgbm as lgb
-from catboost import CatBoostRegressor
-import tensorflow as tf
-from tensorflow import keras
-from scipy import stats
-import warnings
-warnings.filterwarnings('ignore')
+from collections import namedtuple
+from joblib import Parallel, delayed, effective_n_jobs
 
 from models.enhanced_models import (
     EnhancedInsiderTrade, Recommendation, RiskLevel, 
     FundamentalData, TechnicalIndicators, SentimentData
 )
+from analysis._kernels import (
+    technical_indicators_last, composite_score, recommend, risk_stats,
+    SIGNAL_STRONG_FUNDAMENTALS, SIGNAL_POSITIVE_TECHNICALS, SIGNAL_INSIDER_BUYING,
+    SIGNAL_VERY_HIGH_RISK, SIGNAL_LIKELY_UP, SIGNAL_UNLIKELY_UP
+)
 from utils.logging_config import logger
 
+# Finviz fields grouped by the parser that converts their display strings
+_FINVIZ_NUMERIC_KEYS = ('P/E', 'PEG', 'P/B', 'P/S', 'Debt/Eq', 'Current R', 'Quick R')
+_FINVIZ_PCT_KEYS = ('ROE', 'ROA', 'Gross M', 'Oper M', 'Profit M', 'Sales Q/Q', 'EPS Q/Q', 'Dividend %')
+_FINVIZ_MARKET_CAP_KEYS = ('Market Cap',)
+
+# Display numbers such as "-$1,234.5B", "$-5" or "12.3%": sign, mantissa, unit suffix
+_NUMBER_RE = re.compile(r'^\s*\$?([-+]?)\$?([\d,]*\.?\d*(?:[eE][-+]?\d+)?)\s*([BMKT%]?)\s*$')
+
+# Multiplier per accepted suffix; a suffix missing from the table makes the value unparsable
+_NUMERIC_SUFFIXES = {'': 1.0, '%': 1.0, 'K': 1e3, 'M': 1e6, 'B': 1e9}
+_MARKET_CAP_SUFFIXES = {'': 1.0, 'M': 1e6, 'B': 1e9, 'T': 1e12}
+
+# Composite weights: fundamental 40%, technical 30%, insider 20%, sentiment 10%
+_COMPOSITE_WEIGHTS = np.array([0.4, 0.3, 0.2, 0.1])
+
+# ML feature row layout: returns at these day lags in slots 0-2, 20-day volatility,
+# volume ratio, then _ML_FEATURE_SLOTS (record, field, default when unset), then the
+# insider purchase flag, amount in millions and insider score
+_ML_RETURN_LAGS = (1, 5, 20)
+_ML_FEATURE_SLOTS = [
+    ('fundamental_data', 'pe_ratio', 0),
+    ('fundamental_data', 'peg_ratio', 0),
+    ('fundamental_data', 'roe', 0),
+    ('fundamental_data', 'debt_to_equity', 0),
+    ('fundamental_data', 'revenue_growth', 0),
+    ('technical_indicators', 'rsi_14', 50),
+    ('technical_indicators', 'macd', 0),
+    ('technical_indicators', 'bb_width', 0),
+]
+_ML_FEATURE_DIM = 5 + len(_ML_FEATURE_SLOTS) + 3
+
+# Risk score upper bounds for LOW / MODERATE / HIGH, anything above is VERY_HIGH
+_RISK_SCORE_BOUNDS = np.array([3, 4, 6])
+
+# Compact risk codes used by batch risk arrays; RiskLevel members are looked up only at the API boundary
+RISK_LOW, RISK_MODERATE, RISK_HIGH, RISK_VERY_HIGH = range(4)
+_RISK_LEVELS = (RiskLevel.LOW, RiskLevel.MODERATE, RiskLevel.HIGH, RiskLevel.VERY_HIGH)
+
+# Quantiles of recent highs/lows used as secondary support and resistance
+_QUARTILES = np.array([0.25, 0.75])
+
+# Shared generator and day horizons for the placeholder price predictions
+_RNG = np.random.default_rng()
+_PREDICTION_HORIZONS = np.array([1, 7, 30])
+
+# Insider titles that add weight to a trade (substring match, as before)
+_IMPORTANT_TITLE_RE = re.compile(r'ceo|cfo|president|chairman|founder', re.IGNORECASE)
+
+# Smallest batch worth the process start-up cost of parallel data gathering: a cold
+# loky pool takes ~0.3-1.2s to start and import the analyzer, while gathering one
+# trade takes ~0.25-1ms, so two workers only pay off from a few thousand trades
+_PARALLEL_MIN_TRADES = 4096
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    """Missing value as the NaN sentinel the JIT kernels expect"""
+    return np.nan if value is None else float(value)
+
+
+def _nan_if_unset(value: Optional[float]) -> float:
+    """Unset value as NaN, for source fields that report zero when the figure is unknown"""
+    return float(value) if value else np.nan
+
+
+def _below(bound: float) -> float:
+    """Largest float strictly below bound, used for bins that exclude their edge"""
+    return np.nextafter(bound, -np.inf)
+
+
+# Structure-of-arrays layouts for batch scoring (float64 keeps threshold edges exact)
+FUND_DTYPE = np.dtype([
+    ('pe_ratio', 'f8'), ('peg_ratio', 'f8'), ('roe', 'f8'), ('debt_to_equity', 'f8'),
+    ('revenue_growth', 'f8'), ('net_margin', 'f8'), ('free_cash_flow', 'f8')
+])
+TECH_DTYPE = np.dtype([
+    ('rsi_14', 'f8'), ('macd', 'f8'), ('macd_signal', 'f8'), ('sma_20', 'f8'), ('sma_50', 'f8')
+])
+SENTIMENT_DTYPE = np.dtype([
+    ('overall_sentiment', 'f8'), ('analyst_sentiment', 'f8'),
+    ('news_sentiment', 'f8'), ('sentiment_volatility', 'f8')
+])
+
+
+# Price history as contiguous float32 arrays, converted once per frame
+OHLCV = namedtuple('OHLCV', 'close high low volume')
+
+# Trade attributes read by the final scoring stages, normalized once per trade (NaN = missing)
+_ScoreContext = namedtuple('_ScoreContext', [
+    'fundamental_score', 'technical_score', 'insider_score', 'sentiment_score',
+    'very_high_risk', 'probability_up_30d',
+    'free_cash_flow', 'shares_outstanding', 'revenue_growth', 'pe_ratio', 'debt_to_equity',
+    'rsi_14', 'current_price', 'target_prices'
+])
+
+
+def to_ohlcv(data: pd.DataFrame) -> OHLCV:
+    """Convert a price history frame (any column case) into float32 OHLCV arrays"""
+    columns = {col.lower(): col for col in data.columns}
+    return OHLCV(*(
+        np.ascontiguousarray(data[columns[name]].to_numpy(dtype=np.float32))
+        for name in OHLCV._fields
+    ))
+
+
+def _parse_number(value, suffixes: Dict[str, float]) -> Optional[float]:
+    """Parse a display number with an optional unit suffix, None when it is not numeric"""
+    if not isinstance(value, str):
+        try:
+            return float(value)
+        except (ValueError, TypeError):
+            return None
+    
+    match = _NUMBER_RE.match(value)
+    if match is None:
+        return None
+    sign, mantissa, suffix = match.groups()
+    multiplier = suffixes.get(suffix)
+    if multiplier is None:
+        return None
+    try:
+        return float(sign + mantissa.replace(',', '')) * multiplier
+    except ValueError:
+        return None
+
+
+def parse_numeric_series(series: pd.Series, suffixes: Dict[str, float] = _NUMERIC_SUFFIXES) -> pd.Series:
+    """Vectorized _parse_number over a column of display values, NaN where unparsable"""
+    parts = series.astype(str).str.extract(_NUMBER_RE)
+    mantissa = parts[0] + parts[1].str.replace(',', '', regex=False)
+    return pd.to_numeric(mantissa, errors='coerce') * parts[2].map(suffixes)
+
+
+@functools.lru_cache(maxsize=8192)
+def _composite_impl(fundamental: float, technical: float, insider: float, sentiment: float) -> float:
+    """Composite score of the four component scores (NaN = missing)"""
+    return composite_score(np.array([fundamental, technical, insider, sentiment]), _COMPOSITE_WEIGHTS)
+
+
+def fair_value_batch(
+    free_cash_flow: np.ndarray,
+    shares_outstanding: np.ndarray,
+    revenue_growth: np.ndarray,
+    pe_ratio: np.ndarray,
+    current_price: np.ndarray,
+    target_mean: np.ndarray
+) -> np.ndarray:
+    """Row-wise average of the DCF, P/E and analyst target fair values (NaN = missing input or no method)"""
+    growth = np.where(np.isnan(revenue_growth), 0.05, revenue_growth)  # 5% default
+    discount = 0.10  # 10% discount rate
+    industry_pe = 20  # Assumed industry average
+    
+    # Simple Gordon Growth Model; growth equal to the discount rate has no finite value
+    fair_value_dcf = ne.evaluate(
+        "fcf * (1 + g) / (d - g) / shares",
+        local_dict={'fcf': free_cash_flow, 'g': growth, 'd': discount, 'shares': shares_outstanding}
+    )
+    fair_value_dcf[np.isinf(fair_value_dcf)] = np.nan
+    
+    # P/E based fair value
+    fair_value_pe = ne.evaluate(
+        "price / pe * industry_pe",
+        local_dict={'price': current_price, 'pe': pe_ratio, 'industry_pe': industry_pe}
+    )
+    
+    # Average of the available methods
+    methods = np.stack([fair_value_dcf, fair_value_pe, target_mean])
+    available = (~np.isnan(methods)).sum(axis=0)
+    with np.errstate(invalid='ignore'):
+        return np.nansum(methods, axis=0) / available
+
+
+@functools.lru_cache(maxsize=8192)
+def _fair_value_impl(
+    free_cash_flow: float,
+    shares_outstanding: float,
+    revenue_growth: float,
+    pe_ratio: float,
+    current_price: float,
+    target_prices: Tuple[float, ...]
+) -> Optional[float]:
+    """Fair value of one trade (NaN = missing), None when no method applies"""
+    target_mean = sum(target_prices) / len(target_prices) if target_prices else np.nan
+    fair_value = fair_value_batch(
+        *(np.array([value]) for value in (
+            free_cash_flow, shares_outstanding, revenue_growth, pe_ratio, current_price, target_mean
+        ))
+    )[0]
+    return None if np.isnan(fair_value) else float(fair_value)
+
+
+def records_to_soa(records: List[Any], dtype: np.dtype) -> np.ndarray:
+    """Pack model fields into a structured array, one column per field; None fields and records become NaN"""
+    # One attrgetter call per record; NumPy itself converts None values to NaN
+    get_fields = operator.attrgetter(*dtype.names)
+    missing = (None,) * len(dtype.names)
+    if len(dtype.names) == 1:
+        rows = [missing if record is None else (get_fields(record),) for record in records]
+    else:
+        rows = [missing if record is None else get_fields(record) for record in records]
+    return np.array(rows, dtype=dtype)
+
+
 class AdvancedFinancialAnalyzer:
     """Advanced financial analyzer with ML predictions and comprehensive scoring"""
     
+    # Scoring tables: (attribute, bin upper bounds, score delta per bin). A value
+    # falls into the first bin whose upper bound it does not exceed; _below(x)
+    # marks a bound that excludes x itself.
+    _FUND_RULES = [
+        ('pe_ratio', np.array([0, _below(15), 25, 35, 40]), np.array([0, 15, 10, 5, 0, -10])),
+        ('peg_ratio', np.array([_below(1), _below(1.5), 2]), np.array([15, 10, 0, -10])),
+        ('roe', np.array([0, 0.10, 0.15, 0.20]), np.array([-15, 0, 5, 10, 15])),
+        ('debt_to_equity', np.array([_below(0.3), _below(0.6), 2]), np.array([10, 5, 0, -15])),
+        ('revenue_growth', np.array([0, 0.10, 0.20]), np.array([-10, 0, 5, 10])),
+        ('net_margin', np.array([0, 0.10, 0.20]), np.array([-15, 0, 5, 10])),
+        ('free_cash_flow', np.array([0]), np.array([-10, 5])),
+    ]
+    
+    _TECH_RULES = [
+        # Oversold - potential buy, neutral band, overbought
+        ('rsi_14', np.array([_below(30), 70]), np.array([15, 10, -10])),
+    ]
+    
+    _SENTIMENT_WEIGHTS = [
+        ('overall_sentiment', 25),
+        ('analyst_sentiment', 15),
+        ('news_sentiment', 10),
+    ]
+    
+    _SENTIMENT_RULES = [
+        ('sentiment_volatility', np.array([0.5]), np.array([0, -10])),
+    ]
+    
+    # Recommendation per composite score tier (see analysis._kernels.recommend)
+    _TIER_RECOMMENDATIONS = [
+        (Recommendation.STRONG_SELL, "Poor composite score (<30)"),
+        (Recommendation.SELL, "Weak composite score (30-45)"),
+        (Recommendation.HOLD, "Moderate composite score (45-65)"),
+        (Recommendation.BUY, "Strong composite score (65+)"),
+        (Recommendation.STRONG_BUY, "Exceptional composite score (80+)"),
+    ]
+    
+    # (signal bit, result list, message), in reporting order
+    _RECOMMENDATION_SIGNALS = [
+        (SIGNAL_STRONG_FUNDAMENTALS, 'reasons', "Strong fundamental metrics"),
+        (SIGNAL_POSITIVE_TECHNICALS, 'reasons', "Positive technical indicators"),
+        (SIGNAL_INSIDER_BUYING, 'reasons', "Significant insider buying signal"),
+        (SIGNAL_VERY_HIGH_RISK, 'warnings', "Very high risk investment"),
+        (SIGNAL_LIKELY_UP, 'reasons', "High probability of price appreciation"),
+        (SIGNAL_UNLIKELY_UP, 'warnings', "Low probability of price appreciation"),
+    ]
+    
     def __init__(self):
         self.models = {}
         self.scalers = {}
         self.feature_importance = {}
         
+        # Per-ticker fundamental, technical and sentiment results, memoized only while a batch is analyzed
+        self._analysis_cache = None
+        
+        # Compile (or load the cached) JIT kernels now instead of on the first trade
+        composite_score(np.full(4, 50.0), _COMPOSITE_WEIGHTS)
+        recommend(50.0, np.nan, np.nan, np.nan, False, np.nan)
+        
         # Enhanced scoring weights with ML-optimized values
         self.score_weights = {
             # Fundamental Analysis (40%)
@@ -72,6 +328,13 @@ class AdvancedFinancialAnalyzer:
             'fundamental_risk_weight': 0.25
         }
     
+    def __getstate__(self):
+        """Pickle without the memo entries so worker processes start light"""
+        state = self.__dict__.copy()
+        if state['_analysis_cache'] is not None:
+            state['_analysis_cache'] = {}
+        return state
+    
     def analyze_comprehensive(
         self, 
         trade: EnhancedInsiderTrade,
@@ -83,66 +346,18 @@ class AdvancedFinancialAnalyzer:
         try:
             logger.info(f"Starting comprehensive analysis for {trade.ticker}")
             
-            # Extract data from various sources
-            yahoo_data = market_data.get('yahoo', {}).get('info', {})
-            web_data = market_data.get('web', {})
-            finviz_data = web_data.get('finviz', {})
-            stockanalysis_data = web_data.get('stockanalysis', {})
-            finnhub_data = market_data.get('finnhub', {}).get('metrics', {})
-            
-            # 1. Fundamental Analysis
-            fundamental_data = self._extract_fundamental_data(
-                trade.ticker, yahoo_data, finviz_data, stockanalysis_data, finnhub_data
-            )
-            trade.fundamental_data = fundamental_data
-            trade.fundamental_score = self._calculate_fundamental_score(fundamental_data)
-            
-            # 2. Technical Analysis
-            if historical_data is not None and not historical_data.empty:
-                technical_indicators = self._calculate_technical_indicators(
-                    trade.ticker, historical_data
-                )
-                trade.technical_indicators = technical_indicators
-                trade.technical_score = self._calculate_technical_score(technical_indicators)
-            
-            # 3. Sentiment Analysis
-            sentiment_data = self._analyze_sentiment(trade.ticker, market_data)
-            trade.sentiment_data = sentiment_data
-            trade.sentiment_score = self._calculate_sentiment_score(sentiment_data)
-            
-            # 4. Insider Analysis
-            insider_score = self._analyze_insider_patterns(trade)
-            trade.insider_score = insider_score
-            
-            # 5. ML Predictions
-            if historical_data is not None:
-                predictions = self._generate_ml_predictions(trade, historical_data)
-                trade.price_prediction_1d = predictions.get('price_1d')
-                trade.price_prediction_7d = predictions.get('price_7d')
-                trade.price_prediction_30d = predictions.get('price_30d')
-                trade.probability_up_1d = predictions.get('prob_up_1d')
-                trade.probability_up_7d = predictions.get('prob_up_7d')
-                trade.probability_up_30d = predictions.get('prob_up_30d')
-            
-            # 6. Risk Assessment
-            risk_assessment = self._assess_risk(trade, historical_data)
-            trade.risk_level = risk_assessment['risk_level']
-            trade.var_1d = risk_assessment.get('var_1d')
-            trade.var_7d = risk_assessment.get('var_7d')
-            trade.expected_shortfall = risk_assessment.get('expected_shortfall')
+            # 1-3. Fundamental, technical and sentiment data with their scores
+            self._gather_analysis_data(trade, market_data, historical_data)
+            trade.fundamental_score = self._calculate_fundamental_score(trade.fundamental_data)
+            if trade.technical_indicators is not None:
+                trade.technical_score = self._calculate_technical_score(trade.technical_indicators)
+            trade.sentiment_score = self._calculate_sentiment_score(trade.sentiment_data)
             
-            # 7. Composite Scoring
-            trade.composite_score = self._calculate_composite_score(trade)
-            
-            # 8. Generate Recommendation
-            recommendation_result = self._generate_recommendation(trade)
-            trade.recommendation = recommendation_result['recommendation']
-            trade.confidence_level = recommendation_result['confidence']
-            trade.reasons = recommendation_result['reasons']
-            trade.warnings = recommendation_result['warnings']
+            # 4-8. Insider, ML, risk, composite and recommendation
+            context = self._complete_analysis(trade, historical_data)
             
             # 9. Fair Value Calculation
-            trade.fair_value = self._calculate_fair_value(trade)
+            trade.fair_value = self._calculate_fair_value(context)
             
             logger.info(f"Comprehensive analysis completed for {trade.ticker}")
             return trade
@@ -151,6 +366,227 @@ class AdvancedFinancialAnalyzer:
             logger.error(f"Comprehensive analysis failed for {trade.ticker}: {e}")
             return trade
     
+    def analyze_comprehensive_batch(
+        self,
+        trades: List[EnhancedInsiderTrade],
+        market_data_map: Dict[str, Dict[str, Any]],
+        historical_data_map: Dict[str, pd.DataFrame],
+        n_jobs: int = 1
+    ) -> List[EnhancedInsiderTrade]:
+        """Comprehensive analysis of many trades with column-wise scoring"""
+        
+        logger.info(f"Starting batch comprehensive analysis for {len(trades)} trades")
+        
+        # Trades of one ticker share their gathered results while this batch is analyzed
+        try:
+            self._analysis_cache = {}
+            
+            # Per-trade data extraction, one chunk of trades per worker process for very large batches
+            if n_jobs != 1 and len(trades) >= _PARALLEL_MIN_TRADES:
+                chunks = [
+                    [trades[i] for i in chunk]
+                    for chunk in np.array_split(np.arange(len(trades)), effective_n_jobs(n_jobs))
+                ]
+                # Each worker receives only the market data and history of its own tickers
+                chunk_results = Parallel(n_jobs=len(chunks), backend='loky')(
+                    delayed(self._gather_trade_data_chunk)(
+                        chunk,
+                        {t.ticker: market_data_map[t.ticker] for t in chunk if t.ticker in market_data_map},
+                        {t.ticker: historical_data_map[t.ticker] for t in chunk if t.ticker in historical_data_map}
+                    )
+                    for chunk in chunks
+                )
+                results = [result for chunk_result in chunk_results for result in chunk_result]
+            else:
+                results = self._gather_trade_data_chunk(trades, market_data_map, historical_data_map)
+        finally:
+            self._analysis_cache = None
+        
+        gathered = []
+        for trade, result in zip(trades, results):
+            if result is not None:
+                trade.fundamental_data, trade.technical_indicators, trade.sentiment_data = result
+                gathered.append(trade)
+        
+        # Score every trade at once, one NumPy pass per rule
+        try:
+            fundamental_scores = self._calculate_fundamental_scores_batch([t.fundamental_data for t in gathered])
+            sentiment_scores = self._calculate_sentiment_scores_batch([t.sentiment_data for t in gathered])
+            technical_trades = [t for t in gathered if t.technical_indicators is not None]
+            technical_scores = self._calculate_technical_scores_batch([t.technical_indicators for t in technical_trades])
+            
+            for trade, fundamental_score, sentiment_score in zip(gathered, fundamental_scores, sentiment_scores):
+                trade.fundamental_score = float(fundamental_score)
+                trade.sentiment_score = float(sentiment_score)
+            for trade, technical_score in zip(technical_trades, technical_scores):
+                trade.technical_score = float(technical_score)
+        except Exception as e:
+            logger.error(f"Batch scoring failed: {e}")
+            return trades
+        
+        # Risk of every trade at once, one (N, T) return matrix per history length
+        risk_assessments = self._assess_risk_batch(gathered, historical_data_map)
+        
+        completed = []
+        contexts = []
+        for trade, risk_assessment in zip(gathered, risk_assessments):
+            try:
+                contexts.append(self._complete_analysis(trade, historical_data_map.get(trade.ticker), risk_assessment))
+                completed.append(trade)
+            except Exception as e:
+                logger.error(f"Comprehensive analysis failed for {trade.ticker}: {e}")
+        
+        # Fair value of every completed trade in one vectorized evaluation
+        for trade, fair_value in zip(completed, self._calculate_fair_values_batch(contexts)):
+            trade.fair_value = fair_value
+        
+        logger.info(f"Batch comprehensive analysis completed for {len(trades)} trades")
+        return trades
+    
+    def _gather_trade_data_chunk(
+        self,
+        trades: List[EnhancedInsiderTrade],
+        market_data_map: Dict[str, Dict[str, Any]],
+        historical_data_map: Dict[str, pd.DataFrame]
+    ) -> List[Optional[Tuple[FundamentalData, Optional[TechnicalIndicators], SentimentData]]]:
+        """Gathered data of consecutive trades, one entry per trade"""
+        return [
+            self._gather_trade_data(
+                trade, market_data_map.get(trade.ticker, {}), historical_data_map.get(trade.ticker)
+            )
+            for trade in trades
+        ]
+    
+    def _gather_trade_data(
+        self,
+        trade: EnhancedInsiderTrade,
+        market_data: Dict[str, Any],
+        historical_data: Optional[pd.DataFrame]
+    ) -> Optional[Tuple[FundamentalData, Optional[TechnicalIndicators], SentimentData]]:
+        """Gathered data of one trade as a picklable tuple, None on failure"""
+        try:
+            self._gather_analysis_data(trade, market_data, historical_data)
+            return trade.fundamental_data, trade.technical_indicators, trade.sentiment_data
+        except Exception as e:
+            logger.error(f"Comprehensive analysis failed for {trade.ticker}: {e}")
+            return None
+    
+    def _gather_analysis_data(
+        self,
+        trade: EnhancedInsiderTrade,
+        market_data: Dict[str, Any],
+        historical_data: Optional[pd.DataFrame]
+    ):
+        """Attach fundamental, technical and sentiment data to the trade"""
+        
+        # Extract data from various sources
+        yahoo_data = market_data.get('yahoo', {}).get('info', {})
+        web_data = market_data.get('web', {})
+        finviz_data = web_data.get('finviz', {})
+        stockanalysis_data = web_data.get('stockanalysis', {})
+        finnhub_data = market_data.get('finnhub', {}).get('metrics', {})
+        
+        # Results are memoized per ticker and fetched snapshot object
+        market_key = (trade.ticker, id(market_data))
+        
+        # 1. Fundamental Analysis
+        trade.fundamental_data = self._cached(
+            ('fundamental',) + market_key, market_data,
+            lambda: self._extract_fundamental_data(
+                trade.ticker, yahoo_data, finviz_data, stockanalysis_data, finnhub_data
+            )
+        )
+        
+        # 2. Technical Analysis
+        if historical_data is not None and not historical_data.empty:
+            trade.technical_indicators = self._cached(
+                ('technical', trade.ticker, id(historical_data)), historical_data,
+                lambda: self._calculate_technical_indicators(trade.ticker, to_ohlcv(historical_data))
+            )
+        
+        # 3. Sentiment Analysis
+        trade.sentiment_data = self._cached(
+            ('sentiment', trade.trade_type) + market_key, market_data,
+            lambda: self._analyze_sentiment(trade.ticker, market_data, trade.trade_type)
+        )
+    
+    def _cached(self, key: Tuple, source: Any, compute):
+        """Return a copy of the memoized result for key, computing it on a miss or when no batch memo is active"""
+        if self._analysis_cache is None:
+            return compute()
+        
+        # The source is kept with its result so its id cannot be reused while cached
+        entry = self._analysis_cache.get(key)
+        if entry is None or entry[0] is not source:
+            entry = self._analysis_cache[key] = (source, compute())
+        return entry[1].model_copy(deep=True)
+    
+    def _complete_analysis(
+        self,
+        trade: EnhancedInsiderTrade,
+        historical_data: Optional[pd.DataFrame],
+        risk_assessment: Optional[Dict[str, Any]] = None
+    ) -> _ScoreContext:
+        """Run the score-dependent analysis stages on an already scored trade, returning its score context"""
+        
+        # 4. Insider Analysis
+        insider_score = self._analyze_insider_patterns(trade)
+        trade.insider_score = insider_score
+        
+        # 5. ML Predictions
+        if historical_data is not None:
+            predictions = self._generate_ml_predictions(trade, historical_data)
+            trade.price_prediction_1d = predictions.get('price_1d')
+            trade.price_prediction_7d = predictions.get('price_7d')
+            trade.price_prediction_30d = predictions.get('price_30d')
+            trade.probability_up_1d = predictions.get('prob_up_1d')
+            trade.probability_up_7d = predictions.get('prob_up_7d')
+            trade.probability_up_30d = predictions.get('prob_up_30d')
+        
+        # 6. Risk Assessment (precomputed by the batch path)
+        if risk_assessment is None:
+            risk_assessment = self._assess_risk(trade, historical_data)
+        trade.risk_level = risk_assessment['risk_level']
+        trade.var_1d = risk_assessment.get('var_1d')
+        trade.var_7d = risk_assessment.get('var_7d')
+        trade.expected_shortfall = risk_assessment.get('expected_shortfall')
+        
+        context = self._score_context(trade)
+        
+        # 7. Composite Scoring
+        trade.composite_score = self._calculate_composite_score(context)
+        
+        # 8. Generate Recommendation
+        recommendation_result = self._generate_recommendation(context, trade.composite_score)
+        trade.recommendation = recommendation_result['recommendation']
+        trade.confidence_level = recommendation_result['confidence']
+        trade.reasons = recommendation_result['reasons']
+        trade.warnings = recommendation_result['warnings']
+        
+        return context
+    
+    def _score_context(self, trade: EnhancedInsiderTrade) -> _ScoreContext:
+        """Pull every attribute the final scoring stages need from the trade in one place"""
+        fundamentals = trade.fundamental_data
+        technicals = trade.technical_indicators
+        return _ScoreContext(
+            fundamental_score=_nan_if_none(trade.fundamental_score),
+            technical_score=_nan_if_none(trade.technical_score),
+            insider_score=_nan_if_none(trade.insider_score),
+            sentiment_score=_nan_if_none(trade.sentiment_score),
+            very_high_risk=trade.risk_level == RiskLevel.VERY_HIGH,
+            probability_up_30d=_nan_if_unset(trade.probability_up_30d),
+            free_cash_flow=_nan_if_unset(fundamentals.free_cash_flow) if fundamentals else np.nan,
+            shares_outstanding=_nan_if_unset(fundamentals.shares_outstanding) if fundamentals else np.nan,
+            revenue_growth=_nan_if_unset(fundamentals.revenue_growth) if fundamentals else np.nan,
+            pe_ratio=_nan_if_unset(fundamentals.pe_ratio) if fundamentals else np.nan,
+            debt_to_equity=_nan_if_none(fundamentals.debt_to_equity) if fundamentals else np.nan,
+            rsi_14=_nan_if_none(technicals.rsi_14) if technicals else np.nan,
+            current_price=_nan_if_unset(trade.current_price),
+            # Sorted so the fair value memo key does not depend on source order
+            target_prices=tuple(sorted(p for p in trade.target_prices.values() if p is not None))
+        )
+    
     def _extract_fundamental_data(
         self, 
         ticker: str, 
@@ -164,94 +600,97 @@ class AdvancedFinancialAnalyzer:
         fundamental = FundamentalData(ticker=ticker, date=datetime.now())
         
         try:
+            # Parse the finviz display strings once up front
+            finviz_norm = self._normalize_finviz(finviz_data)
+            
             # Valuation Metrics
             fundamental.pe_ratio = self._get_best_value(
                 yahoo_data.get('trailingPE'),
-                self._parse_numeric(finviz_data.get('P/E')),
+                finviz_norm['P/E'],
                 stockanalysis_data.get('trailingPE'),
                 finnhub_data.get('peTTM')
             )
             
             fundamental.peg_ratio = self._get_best_value(
                 yahoo_data.get('pegRatio'),
-                self._parse_numeric(finviz_data.get('PEG')),
+                finviz_norm['PEG'],
                 finnhub_data.get('pegRatio')
             )
             
             fundamental.pb_ratio = self._get_best_value(
                 yahoo_data.get('priceToBook'),
-                self._parse_numeric(finviz_data.get('P/B')),
+                finviz_norm['P/B'],
                 finnhub_data.get('pbRatio')
             )
             
             fundamental.ps_ratio = self._get_best_value(
                 yahoo_data.get('priceToSalesTrailing12Months'),
-                self._parse_numeric(finviz_data.get('P/S')),
+                finviz_norm['P/S'],
                 finnhub_data.get('psRatio')
             )
             
             # Profitability Metrics
             fundamental.roe = self._get_best_value(
                 yahoo_data.get('returnOnEquity'),
-                self._parse_percentage(finviz_data.get('ROE')),
+                finviz_norm['ROE'],
                 stockanalysis_data.get('returnOnEquity'),
                 finnhub_data.get('roeTTM')
             )
             
             fundamental.roa = self._get_best_value(
                 yahoo_data.get('returnOnAssets'),
-                self._parse_percentage(finviz_data.get('ROA')),
+                finviz_norm['ROA'],
                 finnhub_data.get('roaTTM')
             )
             
             fundamental.gross_margin = self._get_best_value(
                 yahoo_data.get('grossMargins'),
-                self._parse_percentage(finviz_data.get('Gross M')),
+                finviz_norm['Gross M'],
                 finnhub_data.get('grossMarginTTM')
             )
             
             fundamental.operating_margin = self._get_best_value(
                 yahoo_data.get('operatingMargins'),
-                self._parse_percentage(finviz_data.get('Oper M')),
+                finviz_norm['Oper M'],
                 finnhub_data.get('operatingMarginTTM')
             )
             
             fundamental.net_margin = self._get_best_value(
                 yahoo_data.get('profitMargins'),
-                self._parse_percentage(finviz_data.get('Profit M')),
+                finviz_norm['Profit M'],
                 finnhub_data.get('netProfitMarginTTM')
             )
             
             # Financial Health
             fundamental.debt_to_equity = self._get_best_value(
                 yahoo_data.get('debtToEquity'),
-                self._parse_numeric(finviz_data.get('Debt/Eq')),
+                finviz_norm['Debt/Eq'],
                 stockanalysis_data.get('debtToEquity'),
                 finnhub_data.get('debtToEquityRatio')
             )
             
             fundamental.current_ratio = self._get_best_value(
                 yahoo_data.get('currentRatio'),
-                self._parse_numeric(finviz_data.get('Current R')),
+                finviz_norm['Current R'],
                 finnhub_data.get('currentRatio')
             )
             
             fundamental.quick_ratio = self._get_best_value(
                 yahoo_data.get('quickRatio'),
-                self._parse_numeric(finviz_data.get('Quick R')),
+                finviz_norm['Quick R'],
                 finnhub_data.get('quickRatio')
             )
             
             # Growth Metrics
             fundamental.revenue_growth = self._get_best_value(
                 yahoo_data.get('revenueGrowth'),
-                self._parse_percentage(finviz_data.get('Sales Q/Q')),
+                finviz_norm['Sales Q/Q'],
                 finnhub_data.get('revenueGrowthTTM')
             )
             
             fundamental.earnings_growth = self._get_best_value(
                 yahoo_data.get('earningsGrowth'),
-                self._parse_percentage(finviz_data.get('EPS Q/Q')),
+                finviz_norm['EPS Q/Q'],
                 finnhub_data.get('epsGrowthTTM')
             )
             
@@ -269,7 +708,7 @@ class AdvancedFinancialAnalyzer:
             # Market Data
             fundamental.market_cap = self._get_best_value(
                 yahoo_data.get('marketCap'),
-                self._parse_market_cap(finviz_data.get('Market Cap')),
+                finviz_norm['Market Cap'],
                 finnhub_data.get('marketCapitalization')
             )
             
@@ -281,7 +720,7 @@ class AdvancedFinancialAnalyzer:
             # Dividend Data
             fundamental.dividend_yield = self._get_best_value(
                 yahoo_data.get('dividendYield'),
-                self._parse_percentage(finviz_data.get('Dividend %')),
+                finviz_norm['Dividend %'],
                 finnhub_data.get('dividendYieldIndicatedAnnual')
             )
             
@@ -298,106 +737,91 @@ class AdvancedFinancialAnalyzer:
     def _calculate_technical_indicators(
         self, 
         ticker: str, 
-        data: pd.DataFrame
+        prices: OHLCV
     ) -> TechnicalIndicators:
         """Calculate comprehensive technical indicators"""
         
         indicators = TechnicalIndicators(ticker=ticker, date=datetime.now())
         
         try:
-            if data.empty or len(data) < 50:
+            if len(prices.close) < 50:
                 return indicators
             
-            # Ensure we have the required columns
-            if 'close' not in data.columns:
-                data.columns = [col.lower() for col in data.columns]
+            close, high, low, volume = prices
             
-            close = data['close']
-            high = data['high']
-            low = data['low']
-            volume = data['volume']
+            # Every rolling window and EMA comes out of one fused pass over the arrays
+            (
+                sma_5, sma_10, sma_20, sma_50, sma_200,
+                ema_12, ema_26, ema_50,
+                rsi_14, rsi_21,
+                macd, macd_signal,
+                std_20,
+                stoch_k, stoch_d, williams_r,
+                atr, obv, cmf
+            ) = technical_indicators_last(close, high, low, volume)
             
             # Moving Averages
-            indicators.sma_5 = close.rolling(5).mean().iloc[-1]
-            indicators.sma_10 = close.rolling(10).mean().iloc[-1]
-            indicators.sma_20 = close.rolling(20).mean().iloc[-1]
-            indicators.sma_50 = close.rolling(50).mean().iloc[-1]
-            if len(data) >= 200:
-                indicators.sma_200 = close.rolling(200).mean().iloc[-1]
+            indicators.sma_5 = sma_5
+            indicators.sma_10 = sma_10
+            indicators.sma_20 = sma_20
+            indicators.sma_50 = sma_50
+            if len(close) >= 200:
+                indicators.sma_200 = sma_200
             
             # Exponential Moving Averages
-            indicators.ema_12 = close.ewm(span=12).mean().iloc[-1]
-            indicators.ema_26 = close.ewm(span=26).mean().iloc[-1]
-            indicators.ema_50 = close.ewm(span=50).mean().iloc[-1]
+            indicators.ema_12 = ema_12
+            indicators.ema_26 = ema_26
+            indicators.ema_50 = ema_50
             
             # RSI
-            delta = close.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            indicators.rsi_14 = (100 - (100 / (1 + rs))).iloc[-1]
-            
-            # RSI 21
-            gain_21 = (delta.where(delta > 0, 0)).rolling(window=21).mean()
-            loss_21 = (-delta.where(delta < 0, 0)).rolling(window=21).mean()
-            rs_21 = gain_21 / loss_21
-            indicators.rsi_21 = (100 - (100 / (1 + rs_21))).iloc[-1]
+            indicators.rsi_14 = rsi_14
+            indicators.rsi_21 = rsi_21
             
             # MACD
-            ema_12 = close.ewm(span=12).mean()
-            ema_26 = close.ewm(span=26).mean()
-            macd_line = ema_12 - ema_26
-            signal_line = macd_line.ewm(span=9).mean()
-            
-            indicators.macd = macd_line.iloc[-1]
-            indicators.macd_signal = signal_line.iloc[-1]
-            indicators.macd_histogram = (macd_line - signal_line).iloc[-1]
+            indicators.macd = macd
+            indicators.macd_signal = macd_signal
+            indicators.macd_histogram = macd - macd_signal
             
             # Bollinger Bands
-            sma_20 = close.rolling(20).mean()
-            std_20 = close.rolling(20).std()
-            indicators.bb_upper = (sma_20 + (std_20 * 2)).iloc[-1]
-            indicators.bb_middle = sma_20.iloc[-1]
-            indicators.bb_lower = (sma_20 - (std_20 * 2)).iloc[-1]
+            indicators.bb_upper = sma_20 + (std_20 * 2)
+            indicators.bb_middle = sma_20
+            indicators.bb_lower = sma_20 - (std_20 * 2)
             indicators.bb_width = ((indicators.bb_upper - indicators.bb_lower) / indicators.bb_middle) * 100
             
             # Stochastic Oscillator
-            lowest_low = low.rolling(14).min()
-            highest_high = high.rolling(14).max()
-            k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-            indicators.stoch_k = k_percent.iloc[-1]
-            indicators.stoch_d = k_percent.rolling(3).mean().iloc[-1]
+            indicators.stoch_k = stoch_k
+            indicators.stoch_d = stoch_d
             
             # Williams %R
-            indicators.williams_r = -100 * ((highest_high - close) / (highest_high - lowest_low)).iloc[-1]
+            indicators.williams_r = williams_r
             
             # Average True Range (ATR)
-            tr1 = high - low
-            tr2 = abs(high - close.shift())
-            tr3 = abs(low - close.shift())
-            true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-            indicators.atr = true_range.rolling(14).mean().iloc[-1]
+            indicators.atr = atr
             
             # On-Balance Volume (OBV)
-            obv = (volume * ((close > close.shift()).astype(int) * 2 - 1)).cumsum()
-            indicators.obv = obv.iloc[-1]
+            indicators.obv = obv
             
             # Chaikin Money Flow (CMF)
-            mfv = ((close - low) - (high - close)) / (high - low) * volume
-            indicators.cmf = mfv.rolling(20).sum().iloc[-1] / volume.rolling(20).sum().iloc[-1]
+            indicators.cmf = cmf
             
             # Support and Resistance Levels
-            recent_data = data.tail(50)
-            indicators.support_1 = recent_data['low'].min()
-            indicators.resistance_1 = recent_data['high'].max()
-            
-            # Secondary support/resistance
-            price_levels = pd.concat([recent_data['high'], recent_data['low']]).sort_values()
-            indicators.support_2 = price_levels.quantile(0.25)
-            indicators.resistance_2 = price_levels.quantile(0.75)
+            recent_high = high[-50:]
+            recent_low = low[-50:]
+            indicators.support_1 = float(recent_low.min())
+            indicators.resistance_1 = float(recent_high.max())
+            
+            # Secondary support/resistance: interpolated quartiles from a partial sort
+            price_levels = np.concatenate([recent_high, recent_low]).astype(np.float64)
+            positions = (len(price_levels) - 1) * _QUARTILES
+            below = positions.astype(np.intp)
+            above = np.minimum(below + 1, len(price_levels) - 1)
+            price_levels.partition(np.concatenate([below, above]))
+            support_2, resistance_2 = price_levels[below] + (price_levels[above] - price_levels[below]) * (positions - below)
+            indicators.support_2 = float(support_2)
+            indicators.resistance_2 = float(resistance_2)
             
             # Pattern Recognition (simplified)
-            current_price = close.iloc[-1]
+            current_price = float(close[-1])
             if current_price > indicators.sma_20 and indicators.rsi_14 < 70:
                 indicators.bullish_patterns.append("Uptrend with momentum")
             if current_price < indicators.bb_lower:
@@ -417,7 +841,12 @@ class AdvancedFinancialAnalyzer:
         
         return indicators
     
-    def _analyze_sentiment(self, ticker: str, market_data: Dict[str, Any]) -> SentimentData:
+    def _analyze_sentiment(
+        self, 
+        ticker: str, 
+        market_data: Dict[str, Any], 
+        trade_type: Optional[str] = None
+    ) -> SentimentData:
         """Analyze sentiment from various sources"""
         
         sentiment = SentimentData(ticker=ticker, date=datetime.now())
@@ -439,96 +868,96 @@ class AdvancedFinancialAnalyzer:
             # Social sentiment (placeholder - would integrate with social media APIs)
             sentiment.social_sentiment = 0.0
             
-            # Insider sentiment based on recent trades
-            sentiment.insider_sentiment = 0.1 if 'purchase' in str(market_data).lower() else -0.1
+            # Insider sentiment based on the direction of the analyzed trade
+            sentiment.insider_sentiment = 0.1 if trade_type == "purchase" else -0.1
             
-            # Overall sentiment calculation
-            sentiments = [s for s in [
+            # Overall sentiment calculation (population mean/std of at most four values)
+            total = 0.0
+            total_sq = 0.0
+            count = 0
+            for value in (
                 sentiment.news_sentiment,
                 sentiment.analyst_sentiment,
                 sentiment.social_sentiment,
                 sentiment.insider_sentiment
-            ] if s is not None]
+            ):
+                if value is not None:
+                    total += value
+                    total_sq += value * value
+                    count += 1
             
-            if sentiments:
-                sentiment.overall_sentiment = np.mean(sentiments)
-                sentiment.sentiment_volatility = np.std(sentiments)
+            if count:
+                mean = total / count
+                sentiment.overall_sentiment = mean
+                sentiment.sentiment_volatility = math.sqrt(max(total_sq / count - mean * mean, 0.0))
             
         except Exception as e:
             logger.error(f"Error analyzing sentiment for {ticker}: {e}")
         
         return sentiment
     
+    def _score_from_rules(self, data, rules) -> float:
+        """Sum the score deltas of the threshold bins each metric falls into"""
+        score = 0.0
+        for attr, thresholds, deltas in rules:
+            value = getattr(data, attr)
+            if value and not math.isnan(value):
+                score += deltas[np.searchsorted(thresholds, value)]
+        return score
+    
+    def _score_from_rules_batch(self, columns: np.ndarray, rules) -> np.ndarray:
+        """Column-wise _score_from_rules over a structured array"""
+        score = np.zeros(len(columns))
+        for attr, thresholds, deltas in rules:
+            values = columns[attr]
+            present = ~np.isnan(values) & (values != 0)
+            score += np.where(present, deltas[np.searchsorted(thresholds, np.nan_to_num(values))], 0)
+        return score
+    
+    def _calculate_fundamental_scores_batch(self, fundamentals: List[FundamentalData]) -> np.ndarray:
+        """Vectorized _calculate_fundamental_score over many trades"""
+        columns = records_to_soa(fundamentals, FUND_DTYPE)
+        score = 50.0 + self._score_from_rules_batch(columns, self._FUND_RULES)
+        return np.clip(score, 0, 100)
+    
+    def _calculate_technical_scores_batch(self, technicals: List[TechnicalIndicators]) -> np.ndarray:
+        """Vectorized _calculate_technical_score over many trades"""
+        columns = records_to_soa(technicals, TECH_DTYPE)
+        score = 50.0 + self._score_from_rules_batch(columns, self._TECH_RULES)
+        
+        # MACD scoring
+        macd = np.nan_to_num(columns['macd'])
+        macd_signal = np.nan_to_num(columns['macd_signal'])
+        has_macd = (macd != 0) & (macd_signal != 0)
+        score += np.where(has_macd, np.where(macd > macd_signal, 10 + 5 * (macd > 0), -10), 0)
+        
+        # Moving Average scoring
+        sma_20 = np.nan_to_num(columns['sma_20'])
+        sma_50 = np.nan_to_num(columns['sma_50'])
+        has_sma = (sma_20 != 0) & (sma_50 != 0)
+        score += np.where(has_sma, np.where(sma_20 > sma_50, 10, -10), 0)
+        
+        # Pattern scoring
+        score += 5 * np.array([len(t.bullish_patterns) - len(t.bearish_patterns) for t in technicals])
+        
+        return np.clip(score, 0, 100)
+    
+    def _calculate_sentiment_scores_batch(self, sentiments: List[SentimentData]) -> np.ndarray:
+        """Vectorized _calculate_sentiment_score over many trades"""
+        columns = records_to_soa(sentiments, SENTIMENT_DTYPE)
+        score = np.full(len(sentiments), 50.0)
+        for attr, weight in self._SENTIMENT_WEIGHTS:
+            score += np.nan_to_num(columns[attr]) * weight
+        score += self._score_from_rules_batch(columns, self._SENTIMENT_RULES)
+        return np.clip(score, 0, 100)
+    
     def _calculate_fundamental_score(self, fundamental: FundamentalData) -> float:
         """Calculate fundamental analysis score (0-100)"""
         
         score = 50.0  # Base score
         
         try:
-            # P/E Ratio scoring
-            if fundamental.pe_ratio:
-                if 0 < fundamental.pe_ratio < 15:
-                    score += 15
-                elif 15 <= fundamental.pe_ratio <= 25:
-                    score += 10
-                elif 25 < fundamental.pe_ratio <= 35:
-                    score += 5
-                elif fundamental.pe_ratio > 40:
-                    score -= 10
-            
-            # PEG Ratio scoring
-            if fundamental.peg_ratio:
-                if fundamental.peg_ratio < 1:
-                    score += 15
-                elif fundamental.peg_ratio < 1.5:
-                    score += 10
-                elif fundamental.peg_ratio > 2:
-                    score -= 10
-            
-            # ROE scoring
-            if fundamental.roe:
-                if fundamental.roe > 0.20:
-                    score += 15
-                elif fundamental.roe > 0.15:
-                    score += 10
-                elif fundamental.roe > 0.10:
-                    score += 5
-                elif fundamental.roe < 0:
-                    score -= 15
-            
-            # Debt to Equity scoring
-            if fundamental.debt_to_equity:
-                if fundamental.debt_to_equity < 0.3:
-                    score += 10
-                elif fundamental.debt_to_equity < 0.6:
-                    score += 5
-                elif fundamental.debt_to_equity > 2:
-                    score -= 15
-            
-            # Revenue Growth scoring
-            if fundamental.revenue_growth:
-                if fundamental.revenue_growth > 0.20:
-                    score += 10
-                elif fundamental.revenue_growth > 0.10:
-                    score += 5
-                elif fundamental.revenue_growth < 0:
-                    score -= 10
-            
-            # Profit Margin scoring
-            if fundamental.net_margin:
-                if fundamental.net_margin > 0.20:
-                    score += 10
-                elif fundamental.net_margin > 0.10:
-                    score += 5
-                elif fundamental.net_margin < 0:
-                    score -= 15
-            
-            # Free Cash Flow scoring
-            if fundamental.free_cash_flow:
-                if fundamental.free_cash_flow > 0:
-                    score += 5
-                else:
-                    score -= 10
+            score += self._score_from_rules(fundamental, self._FUND_RULES)
             
         except Exception as e:
             logger.error(f"Error calculating fundamental score: {e}")
@@ -542,13 +971,7 @@ class AdvancedFinancialAnalyzer:
         
         try:
             # RSI scoring
-            if technical.rsi_14:
-                if 30 <= technical.rsi_14 <= 70:
-                    score += 10
-                elif technical.rsi_14 < 30:
-                    score += 15  # Oversold - potential buy
-                elif technical.rsi_14 > 70:
-                    score -= 10  # Overbought
+            score += self._score_from_rules(technical, self._TECH_RULES)
             
             # MACD scoring
             if technical.macd and technical.macd_signal:
@@ -590,19 +1013,14 @@ class AdvancedFinancialAnalyzer:
         score = 50.0  # Base score
         
         try:
-            if sentiment.overall_sentiment is not None:
-                # Convert sentiment (-1 to 1) to score contribution (-25 to +25)
-                score += sentiment.overall_sentiment * 25
-            
-            if sentiment.analyst_sentiment is not None:
-                score += sentiment.analyst_sentiment * 15
-            
-            if sentiment.news_sentiment is not None:
-                score += sentiment.news_sentiment * 10
+            # Convert each sentiment (-1 to 1) to its weighted score contribution
+            for attr, weight in self._SENTIMENT_WEIGHTS:
+                value = getattr(sentiment, attr)
+                if value is not None:
+                    score += value * weight
             
             # Penalize high volatility in sentiment
-            if sentiment.sentiment_volatility and sentiment.sentiment_volatility > 0.5:
-                score -= 10
+            score += self._score_from_rules(sentiment, self._SENTIMENT_RULES)
             
         except Exception as e:
             logger.error(f"Error calculating sentiment score: {e}")
@@ -630,8 +1048,7 @@ class AdvancedFinancialAnalyzer:
                     score += 10
             
             # Insider title importance
-            important_titles = ['ceo', 'cfo', 'president', 'chairman', 'founder']
-            if any(title in trade.insider_title.lower() for title in important_titles):
+            if _IMPORTANT_TITLE_RE.search(trade.insider_title or ''):
                 score += 10
             
             # Multiple insider trades (would need historical data)
@@ -662,14 +1079,17 @@ class AdvancedFinancialAnalyzer:
                 return predictions
             
             # Simple prediction model (would be replaced with trained models)
-            current_price = historical_data['close'].iloc[-1]
+            close = historical_data['close'].to_numpy(dtype=np.float64)
+            current_price = float(close[-1])
             
-            # Mock predictions (replace with actual ML models)
-            volatility = historical_data['close'].pct_change().std()
+            # Mock predictions (replace with actual ML models), all horizons in one draw
+            volatility = (np.diff(close) / close[:-1]).std(ddof=1)
+            shocks = _RNG.normal(0, volatility * np.sqrt(_PREDICTION_HORIZONS))
+            price_1d, price_7d, price_30d = current_price * (1 + shocks)
             
-            predictions['price_1d'] = current_price * (1 + np.random.normal(0, volatility))
-            predictions['price_7d'] = current_price * (1 + np.random.normal(0, volatility * np.sqrt(7)))
-            predictions['price_30d'] = current_price * (1 + np.random.normal(0, volatility * np.sqrt(30)))
+            predictions['price_1d'] = float(price_1d)
+            predictions['price_7d'] = float(price_7d)
+            predictions['price_30d'] = float(price_30d)
             
             # Probability calculations based on sentiment and technical indicators
             base_prob = 0.5
@@ -696,58 +1116,47 @@ class AdvancedFinancialAnalyzer:
         historical_data: pd.DataFrame
     ) -> Optional[np.ndarray]:
         """Prepare features for ML models"""
+        return self._prepare_ml_features_batch([trade], {trade.ticker: historical_data})
+    
+    def _prepare_ml_features_batch(
+        self,
+        trades: List[EnhancedInsiderTrade],
+        historical_data_map: Dict[str, pd.DataFrame]
+    ) -> Optional[np.ndarray]:
+        """ML feature matrix of many trades, one _ML_FEATURE_DIM row each; NaN marks data a trade lacks"""
         
         try:
-            features = []
-            
-            # Price-based features
-            if not historical_data.empty:
-                close_prices = historical_data['close']
-                
-                # Returns
-                returns_1d = close_prices.pct_change(1).iloc[-1]
-                returns_5d = close_prices.pct_change(5).iloc[-1]
-                returns_20d = close_prices.pct_change(20).iloc[-1]
-                
-                features.extend([returns_1d, returns_5d, returns_20d])
+            features = np.full((len(trades), _ML_FEATURE_DIM), np.nan, dtype=np.float32)
+            
+            for row, trade in zip(features, trades):
+                # Price-based features: 1/5/20-day returns, 20-day volatility, volume ratio
+                historical_data = historical_data_map.get(trade.ticker)
+                if historical_data is not None and not historical_data.empty:
+                    close = historical_data['close'].to_numpy(dtype=np.float64)
+                    for slot, lag in enumerate(_ML_RETURN_LAGS):
+                        if len(close) > lag:
+                            row[slot] = close[-1] / close[-1 - lag] - 1
+                    
+                    if len(close) > 20:
+                        recent = close[-21:]
+                        row[3] = (recent[1:] / recent[:-1] - 1).std(ddof=1)
+                    
+                    if 'volume' in historical_data.columns and len(historical_data) >= 20:
+                        volume = historical_data['volume'].to_numpy(dtype=np.float64)
+                        row[4] = volume[-1] / volume[-20:].mean()
                 
-                # Volatility
-                volatility = close_prices.pct_change().rolling(20).std().iloc[-1]
-                features.append(volatility)
+                # Fundamental and technical features
+                for slot, (record_name, field, default) in enumerate(_ML_FEATURE_SLOTS, start=5):
+                    record = getattr(trade, record_name)
+                    if record is not None:
+                        row[slot] = getattr(record, field) or default
                 
-                # Volume features
-                if 'volume' in historical_data.columns:
-                    volume_ratio = historical_data['volume'].iloc[-1] / historical_data['volume'].rolling(20).mean().iloc[-1]
-                    features.append(volume_ratio)
-            
-            # Fundamental features
-            if trade.fundamental_data:
-                fund = trade.fundamental_data
-                features.extend([
-                    fund.pe_ratio or 0,
-                    fund.peg_ratio or 0,
-                    fund.roe or 0,
-                    fund.debt_to_equity or 0,
-                    fund.revenue_growth or 0
-                ])
-            
-            # Technical features
-            if trade.technical_indicators:
-                tech = trade.technical_indicators
-                features.extend([
-                    tech.rsi_14 or 50,
-                    tech.macd or 0,
-                    tech.bb_width or 0
-                ])
-            
-            # Insider features
-            features.extend([
-                1 if trade.trade_type == "purchase" else 0,
-                trade.amount / 1000000 if trade.amount else 0,  # Amount in millions
-                trade.insider_score or 50
-            ])
-            
-            return np.array(features).reshape(1, -1) if features else None
+                # Insider features
+                row[13] = 1 if trade.trade_type == "purchase" else 0
+                row[14] = trade.amount / 1000000 if trade.amount else 0  # Amount in millions
+                row[15] = trade.insider_score or 50
+            
+            return features
             
         except Exception as e:
             logger.error(f"Error preparing ML features: {e}")
@@ -759,277 +1168,172 @@ class AdvancedFinancialAnalyzer:
         historical_data: Optional[pd.DataFrame]
     ) -> Dict[str, Any]:
         """Comprehensive risk assessment"""
+        historical_data_map = {trade.ticker: historical_data} if historical_data is not None else {}
+        return self._assess_risk_batch([trade], historical_data_map)[0]
+    
+    def _assess_risk_batch(
+        self,
+        trades: List[EnhancedInsiderTrade],
+        historical_data_map: Dict[str, pd.DataFrame]
+    ) -> List[Dict[str, Any]]:
+        """Comprehensive risk assessment of many trades at once"""
+        risk_codes, var_95, expected_shortfall = self._assess_risk_arrays(trades, historical_data_map)
+        return [
+            {
+                'risk_level': _RISK_LEVELS[code],
+                'var_1d': None if np.isnan(var) else float(var),
+                'var_7d': None if np.isnan(var) else float(var * np.sqrt(7)),
+                'expected_shortfall': None if np.isnan(es) else float(es)
+            }
+            for code, var, es in zip(risk_codes, var_95, expected_shortfall)
+        ]
+    
+    def _assess_risk_arrays(
+        self,
+        trades: List[EnhancedInsiderTrade],
+        historical_data_map: Dict[str, pd.DataFrame]
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Risk as columns: int8 RISK_* codes, 1-day VaR 95% and expected shortfall (NaN without history)"""
         
-        risk_assessment = {
-            'risk_level': RiskLevel.MODERATE,
-            'var_1d': None,
-            'var_7d': None,
-            'expected_shortfall': None
-        }
+        n_trades = len(trades)
+        risk_score = np.full(n_trades, 5.0)  # Base risk (1-10 scale)
+        var_95 = np.full(n_trades, np.nan)
+        expected_shortfall = np.full(n_trades, np.nan)
         
         try:
-            risk_score = 5.0  # Base risk (1-10 scale)
-            
-            # Volatility risk
-            if historical_data is not None and not historical_data.empty:
-                returns = historical_data['close'].pct_change().dropna()
-                if len(returns) > 20:
-                    volatility = returns.std()
-                    
-                    if volatility > 0.05:  # 5% daily volatility
-                        risk_score += 2
-                    elif volatility > 0.03:  # 3% daily volatility
-                        risk_score += 1
-                    elif volatility < 0.01:  # 1% daily volatility
-                        risk_score -= 1
-                    
-                    # VaR calculation (95% confidence)
-                    var_95 = np.percentile(returns, 5)
-                    risk_assessment['var_1d'] = var_95
-                    risk_assessment['var_7d'] = var_95 * np.sqrt(7)
-                    
-                    # Expected Shortfall (CVaR)
-                    es_returns = returns[returns <= var_95]
-                    if len(es_returns) > 0:
-                        risk_assessment['expected_shortfall'] = es_returns.mean()
-            
-            # Fundamental risk
-            if trade.fundamental_data:
-                fund = trade.fundamental_data
+            # Volatility risk: close arrays of equal length are stacked into (N, T) price blocks
+            closes_by_length = {}
+            for i, trade in enumerate(trades):
+                data = historical_data_map.get(trade.ticker)
+                if data is not None and len(data) > 21:
+                    close = data['close'].to_numpy(dtype=np.float32)
+                    rows, closes = closes_by_length.setdefault(len(close), ([], []))
+                    rows.append(i)
+                    closes.append(close)
+            
+            for rows, closes in closes_by_length.values():
+                prices = np.vstack(closes)
                 
-                # High P/E risk
-                if fund.pe_ratio and fund.pe_ratio > 40:
-                    risk_score += 1
-                
-                # High debt risk
-                if fund.debt_to_equity and fund.debt_to_equity > 2:
-                    risk_score += 1
-                
-                # Negative margins risk
-                if fund.net_margin and fund.net_margin < 0:
-                    risk_score += 2
+                # Returns, volatility, VaR (95% confidence) and Expected Shortfall (CVaR) in one fused pass
+                volatility, var_95[rows], expected_shortfall[rows] = risk_stats(prices, 5.0)
+                risk_score[rows] += np.select(
+                    [volatility > 0.05, volatility > 0.03, volatility < 0.01],  # 5% / 3% / 1% daily volatility
+                    [2, 1, -1],
+                    0
+                )
+            
+            # Fundamental risk: high P/E, high debt, negative margins
+            fundamentals = records_to_soa([t.fundamental_data for t in trades], FUND_DTYPE)
+            risk_score += fundamentals['pe_ratio'] > 40
+            risk_score += fundamentals['debt_to_equity'] > 2
+            risk_score += 2 * (fundamentals['net_margin'] < 0)
             
             # Market cap risk (smaller companies = higher risk)
-            if trade.market_cap:
-                if trade.market_cap < 1e9:  # < $1B market cap
-                    risk_score += 2
-                elif trade.market_cap < 10e9:  # < $10B market cap
-                    risk_score += 1
+            market_cap = np.array([t.market_cap or np.nan for t in trades], dtype=np.float64)
+            risk_score += np.select([market_cap < 1e9, market_cap < 10e9], [2, 1], 0)
             
             # Insider trade risk
-            if trade.trade_type == "sale":
-                risk_score += 1
-            
-            # Convert risk score to risk level
-            if risk_score <= 3:
-                risk_assessment['risk_level'] = RiskLevel.LOW
-            elif risk_score <= 4:
-                risk_assessment['risk_level'] = RiskLevel.MODERATE
-            elif risk_score <= 6:
-                risk_assessment['risk_level'] = RiskLevel.HIGH
-            else:
-                risk_assessment['risk_level'] = RiskLevel.VERY_HIGH
+            risk_score += np.array([t.trade_type == "sale" for t in trades])
+            
+            # Convert risk score to risk code
+            risk_codes = np.searchsorted(_RISK_SCORE_BOUNDS, risk_score).astype(np.int8)
             
         except Exception as e:
             logger.error(f"Error assessing risk: {e}")
+            risk_codes = np.full(n_trades, RISK_MODERATE, dtype=np.int8)
         
-        return risk_assessment
+        return risk_codes, var_95, expected_shortfall
     
-    def _calculate_composite_score(self, trade: EnhancedInsiderTrade) -> float:
+    def _calculate_composite_score(self, context: _ScoreContext) -> float:
         """Calculate weighted composite score"""
-        
-        try:
-            scores = []
-            weights = []
-            
-            if trade.fundamental_score is not None:
-                scores.append(trade.fundamental_score)
-                weights.append(0.4)  # 40% weight
-            
-            if trade.technical_score is not None:
-                scores.append(trade.technical_score)
-                weights.append(0.3)  # 30% weight
-            
-            if trade.insider_score is not None:
-                scores.append(trade.insider_score)
-                weights.append(0.2)  # 20% weight
-            
-            if trade.sentiment_score is not None:
-                scores.append(trade.sentiment_score)
-                weights.append(0.1)  # 10% weight
-            
-            if scores:
-                # Normalize weights
-                total_weight = sum(weights)
-                normalized_weights = [w / total_weight for w in weights]
-                
-                # Calculate weighted average
-                composite = sum(s * w for s, w in zip(scores, normalized_weights))
-                return max(0, min(100, composite))
-            
-            return 50.0  # Default neutral score
-            
-        except Exception as e:
-            logger.error(f"Error calculating composite score: {e}")
-            return 50.0
+        return _composite_impl(
+            context.fundamental_score, context.technical_score, context.insider_score, context.sentiment_score
+        )
     
-    def _generate_recommendation(self, trade: EnhancedInsiderTrade) -> Dict[str, Any]:
+    def _generate_recommendation(self, context: _ScoreContext, composite: float) -> Dict[str, Any]:
         """Generate comprehensive recommendation with confidence and reasoning"""
         
+        tier, recommended, confidence, signals = recommend(
+            composite,
+            context.fundamental_score,
+            context.technical_score,
+            context.insider_score,
+            context.very_high_risk,
+            context.probability_up_30d
+        )
+        
+        # Base recommendation from composite score, capped by risk
         result = {
-            'recommendation': Recommendation.HOLD,
-            'confidence': 0.5,
-            'reasons': [],
+            'recommendation': self._TIER_RECOMMENDATIONS[recommended][0],
+            'confidence': confidence,
+            'reasons': [self._TIER_RECOMMENDATIONS[tier][1]],
             'warnings': []
         }
         
-        try:
-            score = trade.composite_score or 50
-            confidence_factors = []
-            
-            # Base recommendation from composite score
-            if score >= 80:
-                result['recommendation'] = Recommendation.STRONG_BUY
-                result['reasons'].append("Exceptional composite score (80+)")
-                confidence_factors.append(0.9)
-            elif score >= 65:
-                result['recommendation'] = Recommendation.BUY
-                result['reasons'].append("Strong composite score (65+)")
-                confidence_factors.append(0.8)
-            elif score >= 45:
-                result['recommendation'] = Recommendation.HOLD
-                result['reasons'].append("Moderate composite score (45-65)")
-                confidence_factors.append(0.6)
-            elif score >= 30:
-                result['recommendation'] = Recommendation.SELL
-                result['reasons'].append("Weak composite score (30-45)")
-                confidence_factors.append(0.7)
-            else:
-                result['recommendation'] = Recommendation.STRONG_SELL
-                result['reasons'].append("Poor composite score (<30)")
-                confidence_factors.append(0.8)
-            
-            # Adjust based on individual scores
-            if trade.fundamental_score and trade.fundamental_score > 70:
-                result['reasons'].append("Strong fundamental metrics")
-                confidence_factors.append(0.8)
-            
-            if trade.technical_score and trade.technical_score > 70:
-                result['reasons'].append("Positive technical indicators")
-                confidence_factors.append(0.7)
-            
-            if trade.insider_score and trade.insider_score > 70:
-                result['reasons'].append("Significant insider buying signal")
-                confidence_factors.append(0.9)
-            
-            # Risk-based adjustments
-            if trade.risk_level == RiskLevel.VERY_HIGH:
-                result['warnings'].append("Very high risk investment")
-                if result['recommendation'] in [Recommendation.STRONG_BUY, Recommendation.BUY]:
-                    result['recommendation'] = Recommendation.HOLD
-                confidence_factors.append(0.5)
-            
-            # ML prediction adjustments
-            if trade.probability_up_30d and trade.probability_up_30d > 0.7:
-                result['reasons'].append("High probability of price appreciation")
-                confidence_factors.append(0.8)
-            elif trade.probability_up_30d and trade.probability_up_30d < 0.3:
-                result['warnings'].append("Low probability of price appreciation")
-                confidence_factors.append(0.6)
-            
-            # Calculate final confidence
-            if confidence_factors:
-                result['confidence'] = np.mean(confidence_factors)
-            
-            # Additional warnings
-            if trade.fundamental_data and trade.fundamental_data.debt_to_equity and trade.fundamental_data.debt_to_equity > 3:
-                result['warnings'].append("High debt-to-equity ratio")
-            
-            if trade.technical_indicators and trade.technical_indicators.rsi_14 and trade.technical_indicators.rsi_14 > 80:
-                result['warnings'].append("Extremely overbought conditions")
-            
-        except Exception as e:
-            logger.error(f"Error generating recommendation: {e}")
+        for signal, kind, message in self._RECOMMENDATION_SIGNALS:
+            if signals & signal:
+                result[kind].append(message)
+        
+        # Additional warnings
+        if context.debt_to_equity > 3:
+            result['warnings'].append("High debt-to-equity ratio")
+        
+        if context.rsi_14 > 80:
+            result['warnings'].append("Extremely overbought conditions")
         
         return result
     
-    def _calculate_fair_value(self, trade: EnhancedInsiderTrade) -> Optional[float]:
+    def _calculate_fair_value(self, context: _ScoreContext) -> Optional[float]:
         """Calculate fair value using multiple valuation methods"""
+        return _fair_value_impl(
+            context.free_cash_flow,
+            context.shares_outstanding,
+            context.revenue_growth,
+            context.pe_ratio,
+            context.current_price,
+            context.target_prices
+        )
+    
+    def _calculate_fair_values_batch(self, contexts: List[_ScoreContext]) -> List[Optional[float]]:
+        """Fair value of many trades at once, None where no valuation method applies"""
+        if not contexts:
+            return []
         
-        try:
-            fair_values = []
-            
-            # DCF-based fair value (simplified)
-            if (trade.fundamental_data and 
-                trade.fundamental_data.free_cash_flow and 
-                trade.fundamental_data.shares_outstanding):
-                
-                fcf = trade.fundamental_data.free_cash_flow
-                shares = trade.fundamental_data.shares_outstanding
-                growth_rate = trade.fundamental_data.revenue_growth or 0.05  # 5% default
-                discount_rate = 0.10  # 10% discount rate
-                
-                # Simple Gordon Growth Model
-                terminal_value = fcf * (1 + growth_rate) / (discount_rate - growth_rate)
-                fair_value_dcf = terminal_value / shares
-                fair_values.append(fair_value_dcf)
-            
-            # P/E based fair value
-            if (trade.fundamental_data and 
-                trade.fundamental_data.pe_ratio and 
-                trade.current_price):
-                
-                industry_pe = 20  # Assumed industry average
-                earnings_per_share = trade.current_price / trade.fundamental_data.pe_ratio
-                fair_value_pe = earnings_per_share * industry_pe
-                fair_values.append(fair_value_pe)
-            
-            # Target price average
-            target_prices = [p for p in trade.target_prices.values() if p is not None]
-            if target_prices:
-                fair_values.append(np.mean(target_prices))
-            
-            # Return average of all methods
-            if fair_values:
-                return np.mean(fair_values)
-            
-            return None
-            
-        except Exception as e:
-            logger.error(f"Error calculating fair value: {e}")
-            return None
+        columns = [
+            np.array([getattr(c, field) for c in contexts], dtype=np.float64)
+            for field in ('free_cash_flow', 'shares_outstanding', 'revenue_growth', 'pe_ratio', 'current_price')
+        ]
+        target_mean = np.array(
+            [sum(c.target_prices) / len(c.target_prices) if c.target_prices else np.nan for c in contexts]
+        )
+        fair_values = fair_value_batch(*columns, target_mean)
+        return [None if np.isnan(v) else float(v) for v in fair_values]
     
     def _get_best_value(self, *values) -> Optional[float]:
         """Get the best non-null value from multiple sources"""
-        for value in values:
-            if value is not None and value != "" and value != "N/A":
-                try:
-                    return float(value)
-                except (ValueError, TypeError):
-                    continue
-        return None
+        return next((v for v in map(self._to_float, values) if v is not None and not math.isnan(v)), None)
     
-    def _parse_numeric(self, value) -> Optional[float]:
-        """Parse numeric value from string"""
-        if value is None or value == "" or value == "N/A" or value == "-":
-            return None
+    def _to_float(self, value) -> Optional[float]:
+        """Convert a raw source value to float, None when it is not numeric"""
         try:
-            # Remove common suffixes and convert
-            if isinstance(value, str):
-                value = value.replace('%', '').replace(',', '').replace('$', '')
-                if value.endswith('B'):
-                    return float(value[:-1]) * 1e9
-                elif value.endswith('M'):
-                    return float(value[:-1]) * 1e6
-                elif value.endswith('K'):
-                    return float(value[:-1]) * 1e3
             return float(value)
         except (ValueError, TypeError):
             return None
     
+    def _normalize_finviz(self, finviz_data: Dict) -> Dict[str, Optional[float]]:
+        """Parse every finviz field used in extraction into a float dict"""
+        normalized = {key: self._parse_numeric(finviz_data.get(key)) for key in _FINVIZ_NUMERIC_KEYS}
+        normalized.update({key: self._parse_percentage(finviz_data.get(key)) for key in _FINVIZ_PCT_KEYS})
+        normalized.update({key: self._parse_market_cap(finviz_data.get(key)) for key in _FINVIZ_MARKET_CAP_KEYS})
+        return normalized
+    
+    def _parse_numeric(self, value) -> Optional[float]:
+        """Parse numeric value from string"""
+        return _parse_number(value, _NUMERIC_SUFFIXES)
+    
     def _parse_percentage(self, value) -> Optional[float]:
         """Parse percentage value and convert to decimal"""
-        numeric_value = self._parse_numeric(value)
+        numeric_value = _parse_number(value, _NUMERIC_SUFFIXES)
         if numeric_value is not None:
             # If the value seems to be in percentage form (>1), convert to decimal
             if numeric_value > 1:
@@ -1039,17 +1343,4 @@ class AdvancedFinancialAnalyzer:
     
     def _parse_market_cap(self, value) -> Optional[float]:
         """Parse market cap value"""
-        if value is None or value == "" or value == "N/A" or value == "-":
-            return None
-        try:
-            if isinstance(value, str):
-                value = value.replace(',', '').replace('$', '')
-                if value.endswith('B'):
-                    return float(value[:-1]) * 1e9
-                elif value.endswith('M'):
-                    return float(value[:-1]) * 1e6
-                elif value.endswith('T'):
-                    return float(value[:-1]) * 1e12
-            return float(value)
-        except (ValueError, TypeError):
-            return None
\ No newline at end of file
+        return _parse_number(value, _MARKET_CAP_SUFFIXES)
\ No newline at end of file
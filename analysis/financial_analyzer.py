@@ -1,11 +1,99 @@
+import functools
 from typing import Dict, Any, List, Tuple, Optional
+import numpy as np
 import pandas as pd
 from models.trade_models import InsiderTrade, Recommendation, TechnicalAnalysis
 from utils.logging_config import logger
 
+def _metric_float(value) -> float:
+    """Metric value as float, NaN when it is missing, zero-like or not numeric"""
+    if not value:
+        return np.nan
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        return np.nan
+
+# Columns of an extract_metrics row, in order
+_METRIC_COLUMNS = ['pe', 'peg', 'roe', 'd2e', 'fcf', 'ebitda', 'rsi', 'perf_ytd', 'trade_type']
+
+# Source keys of each merged metric in priority order: Yahoo info, Finviz,
+# StockAnalysis, Finnhub (None where a source does not report it)
+_METRIC_SOURCE_KEYS = {
+    'pe': ('trailingPE', "P/E", "trailingPE", "peTTM"),
+    'peg': ('pegRatio', "PEG", None, "pegRatio"),
+    'roe': ('returnOnEquity', "ROE", "returnOnEquity", "roeTTM"),
+    'd2e': ('debtToEquity', "Debt/Eq", "debtToEquity", "debtToEquity"),
+    'rsi': (None, "RSI (14)", None, "rsi14"),
+}
+
+# Placeholders the sources use for an unreported value
+_MISSING_VALUES = (None, "", "N/A")
+
+def merge_sources(
+    yahoo_data: Dict[str, Any],
+    finviz_data: Dict[str, Any],
+    stockanalysis_data: Dict[str, Any],
+    finnhub_data: Dict[str, Any],
+    key_map: Dict[str, Tuple[Optional[str], ...]] = _METRIC_SOURCE_KEYS
+) -> Dict[str, Any]:
+    """Flat dict of each metric's first reported value across the sources, None if none reports it"""
+    sources = (yahoo_data, finviz_data, stockanalysis_data, finnhub_data)
+    return {
+        metric: next(
+            (source[key] for source, key in zip(sources, keys)
+             if key is not None and source.get(key) not in _MISSING_VALUES),
+            None
+        )
+        for metric, keys in key_map.items()
+    }
+
+# Trade type codes; purchase wins when a description mentions both
+TRADE_PURCHASE, TRADE_SALE, TRADE_OTHER = range(3)
+
+@functools.lru_cache(maxsize=256)
+def _trade_type_code(trade_type: str) -> int:
+    """Classify a trade type description once per distinct string"""
+    trade_type = trade_type.lower()
+    if 'purchase' in trade_type:
+        return TRADE_PURCHASE
+    if 'sale' in trade_type:
+        return TRADE_SALE
+    return TRADE_OTHER
+
 class FinancialAnalyzer:
     """Enhanced financial analysis with multiple data sources"""
     
+    # Score rules in reporting order: (weight key, weight multiplier, reason)
+    _SCORE_RULES = [
+        ('pe_ratio', 2, "Низький P/E (< 15)"),
+        ('pe_ratio', 1, "Помірний P/E (15-25)"),
+        ('pe_ratio', -1, "Високий P/E (> 30)"),
+        ('peg_ratio', 2, "Відмінний PEG (< 1)"),
+        ('peg_ratio', -1, "Високий PEG (> 2)"),
+        ('roe', 3, "Відмінний ROE (> 20%)"),
+        ('roe', 2, "Хороший ROE (> 15%)"),
+        ('roe', -2, "Негативний ROE"),
+        ('debt_to_equity', 2, "Низький борг/капітал (< 0.3)"),
+        ('debt_to_equity', -2, "Високий борг/капітал (> 2)"),
+        ('free_cash_flow', 2, "Позитивний вільний грошовий потік"),
+        ('free_cash_flow', -1, "Негативний вільний грошовий потік"),
+        ('ebitda', 1, "Позитивний EBITDA"),
+        ('rsi', 2, "RSI < 30 (перепродано)"),
+        ('rsi', -1, "RSI > 70 (перекуплено)"),
+        ('performance_ytd', 1, "Позитивна динаміка YTD"),
+        ('performance_ytd', -1, "Негативна динаміка YTD"),
+        ('insider_trade_type', 3, "Інсайдер купує (позитивний сигнал)"),
+        ('insider_trade_type', -1, "Інсайдер продає"),
+    ]
+    
+    # Lowest score of SELL, HOLD, BUY and STRONG_BUY; anything below is STRONG_SELL
+    _RECOMMENDATION_THRESHOLDS = np.array([-6, -2, 4, 8])
+    _RECOMMENDATIONS = (
+        Recommendation.STRONG_SELL, Recommendation.SELL, Recommendation.HOLD,
+        Recommendation.BUY, Recommendation.STRONG_BUY
+    )
+    
     def __init__(self):
         self.score_weights = {
             'pe_ratio': 1.0,
@@ -24,6 +112,12 @@ class FinancialAnalyzer:
             'profit_margin': 1.0,
             'insider_trade_type': 2.0
         }
+        
+        # Integer score delta per rule, truncated toward zero like the former int(k * weight)
+        self._rule_deltas = np.array(
+            [int(abs(k) * self.score_weights[key]) * np.sign(k) for key, k, _ in self._SCORE_RULES],
+            dtype=np.int32
+        )
     
     def calculate_financial_score(
         self, 
@@ -34,184 +128,124 @@ class FinancialAnalyzer:
         trade_type: str
     ) -> Tuple[int, List[str]]:
         """Calculate comprehensive financial score"""
+        metrics = self.extract_metrics(yahoo_data, finviz_data, stockanalysis_data, finnhub_data, trade_type)
+        scores, reasons = self.score_batch(pd.DataFrame([metrics]))
+        return int(scores[0]), reasons[0]
+    
+    def extract_metrics(
+        self, 
+        yahoo_data: Dict[str, Any], 
+        finviz_data: Dict[str, Any],
+        stockanalysis_data: Dict[str, Any], 
+        finnhub_data: Dict[str, Any],
+        trade_type: str
+    ) -> Dict[str, Any]:
+        """Pick each scored metric from the first source that has it, as a score_batch row"""
         
-        score = 0
-        reasons = []
-        
-        # P/E Ratio Analysis
-        pe_ratio = self._get_metric_value(
-            yahoo_data.get('trailingPE'),
-            finviz_data.get("P/E"),
-            stockanalysis_data.get("trailingPE"),
-            finnhub_data.get("peTTM")
-        )
-        
-        if pe_ratio:
-            try:
-                pe_val = float(pe_ratio)
-                if 0 < pe_val < 15:
-                    score += int(2 * self.score_weights['pe_ratio'])
-                    reasons.append("Низький P/E (< 15)")
-                elif 15 <= pe_val <= 25:
-                    score += int(1 * self.score_weights['pe_ratio'])
-                    reasons.append("Помірний P/E (15-25)")
-                elif pe_val > 30:
-                    score -= int(1 * self.score_weights['pe_ratio'])
-                    reasons.append("Високий P/E (> 30)")
-            except (ValueError, TypeError):
-                pass
-        
-        # PEG Ratio Analysis
-        peg_ratio = self._get_metric_value(
-            yahoo_data.get('pegRatio'),
-            finviz_data.get("PEG"),
-            None,
-            finnhub_data.get("pegRatio")
-        )
-        
-        if peg_ratio:
-            try:
-                peg_val = float(peg_ratio)
-                if peg_val < 1:
-                    score += int(2 * self.score_weights['peg_ratio'])
-                    reasons.append("Відмінний PEG (< 1)")
-                elif peg_val > 2:
-                    score -= int(1 * self.score_weights['peg_ratio'])
-                    reasons.append("Високий PEG (> 2)")
-            except (ValueError, TypeError):
-                pass
-        
-        # ROE Analysis
-        roe = self._get_metric_value(
-            yahoo_data.get('returnOnEquity'),
-            finviz_data.get("ROE"),
-            stockanalysis_data.get("returnOnEquity"),
-            finnhub_data.get("roeTTM")
-        )
-        
-        if roe:
-            try:
-                roe_val = float(str(roe).replace('%', ''))
-                if isinstance(roe, str) and '%' in roe:
-                    roe_val = roe_val / 100
-                
-                if roe_val > 0.20:
-                    score += int(3 * self.score_weights['roe'])
-                    reasons.append("Відмінний ROE (> 20%)")
-                elif roe_val > 0.15:
-                    score += int(2 * self.score_weights['roe'])
-                    reasons.append("Хороший ROE (> 15%)")
-                elif roe_val < 0:
-                    score -= int(2 * self.score_weights['roe'])
-                    reasons.append("Негативний ROE")
-            except (ValueError, TypeError):
-                pass
-        
-        # Debt to Equity Analysis
-        debt_to_equity = self._get_metric_value(
-            yahoo_data.get('debtToEquity'),
-            finviz_data.get("Debt/Eq"),
-            stockanalysis_data.get("debtToEquity"),
-            finnhub_data.get("debtToEquity")
-        )
-        
-        if debt_to_equity:
-            try:
-                d2e_val = float(debt_to_equity)
-                if d2e_val < 0.3:
-                    score += int(2 * self.score_weights['debt_to_equity'])
-                    reasons.append("Низький борг/капітал (< 0.3)")
-                elif d2e_val > 2:
-                    score -= int(2 * self.score_weights['debt_to_equity'])
-                    reasons.append("Високий борг/капітал (> 2)")
-            except (ValueError, TypeError):
-                pass
+        merged = merge_sources(yahoo_data, finviz_data, stockanalysis_data, finnhub_data)
+        yahoo, finviz, finnhub = yahoo_data.get, finviz_data.get, finnhub_data.get
         
-        # Free Cash Flow Analysis
-        fcf = yahoo_data.get('freeCashflow') or finnhub_data.get("freeCashflow")
-        if fcf and fcf > 0:
-            score += int(2 * self.score_weights['free_cash_flow'])
-            reasons.append("Позитивний вільний грошовий потік")
-        elif fcf and fcf < 0:
-            score -= int(1 * self.score_weights['free_cash_flow'])
-            reasons.append("Негативний вільний грошовий потік")
+        roe = merged['roe']
+        roe_val = _metric_float(str(roe).replace('%', '')) if roe else np.nan
+        if isinstance(roe, str) and '%' in roe:
+            roe_val = roe_val / 100
         
-        # EBITDA Analysis
-        ebitda = yahoo_data.get('ebitda') or finnhub_data.get("ebitdaTTM")
-        if ebitda and ebitda > 0:
-            score += int(1 * self.score_weights['ebitda'])
-            reasons.append("Позитивний EBITDA")
+        # YTD performance counts by sign; display strings carry it as a leading +/-
+        perf_ytd = finviz("Perf YTD") or finnhub("yearToDateReturn")
+        if isinstance(perf_ytd, str):
+            perf_ytd = 1.0 if perf_ytd.startswith('+') else -1.0 if perf_ytd.startswith('-') else np.nan
         
-        # RSI Analysis
-        rsi = self._get_metric_value(
-            None,
-            finviz_data.get("RSI (14)"),
-            None,
-            finnhub_data.get("rsi14")
-        )
+        return {
+            'pe': _metric_float(merged['pe']),
+            'peg': _metric_float(merged['peg']),
+            'roe': roe_val,
+            'd2e': _metric_float(merged['d2e']),
+            'fcf': _metric_float(yahoo('freeCashflow') or finnhub("freeCashflow")),
+            'ebitda': _metric_float(yahoo('ebitda') or finnhub("ebitdaTTM")),
+            'rsi': _metric_float(merged['rsi']),
+            'perf_ytd': _metric_float(perf_ytd),
+            'trade_type': trade_type
+        }
+    
+    def score_batch(self, metrics: pd.DataFrame) -> Tuple[np.ndarray, List[List[str]]]:
+        """Score every row of an extract_metrics frame at once; NaN metrics are skipped"""
         
-        if rsi:
-            try:
-                rsi_val = float(rsi)
-                if rsi_val < 30:
-                    score += int(2 * self.score_weights['rsi'])
-                    reasons.append("RSI < 30 (перепродано)")
-                elif rsi_val > 70:
-                    score -= int(1 * self.score_weights['rsi'])
-                    reasons.append("RSI > 70 (перекуплено)")
-            except (ValueError, TypeError):
-                pass
+        pe = metrics['pe'].to_numpy(dtype=float)
+        peg = metrics['peg'].to_numpy(dtype=float)
+        roe = metrics['roe'].to_numpy(dtype=float)
+        d2e = metrics['d2e'].to_numpy(dtype=float)
+        fcf = metrics['fcf'].to_numpy(dtype=float)
+        ebitda = metrics['ebitda'].to_numpy(dtype=float)
+        rsi = metrics['rsi'].to_numpy(dtype=float)
+        perf_ytd = metrics['perf_ytd'].to_numpy(dtype=float)
+        trade_type = metrics['trade_type'].map(_trade_type_code).to_numpy()
+        purchase = trade_type == TRADE_PURCHASE
+        sale = trade_type == TRADE_SALE
         
-        # Performance YTD Analysis
-        perf_ytd = finviz_data.get("Perf YTD") or finnhub_data.get("yearToDateReturn")
-        if perf_ytd:
-            try:
-                if isinstance(perf_ytd, str):
-                    if perf_ytd.startswith('+'):
-                        score += int(1 * self.score_weights['performance_ytd'])
-                        reasons.append("Позитивна динаміка YTD")
-                    elif perf_ytd.startswith('-'):
-                        score -= int(1 * self.score_weights['performance_ytd'])
-                        reasons.append("Негативна динаміка YTD")
-                elif isinstance(perf_ytd, (int, float)):
-                    if perf_ytd > 0:
-                        score += int(1 * self.score_weights['performance_ytd'])
-                        reasons.append("Позитивна динаміка YTD")
-                    elif perf_ytd < 0:
-                        score -= int(1 * self.score_weights['performance_ytd'])
-                        reasons.append("Негативна динаміка YTD")
-            except (ValueError, TypeError):
-                pass
+        # One mask per _SCORE_RULES entry, same order; each metric's masks are disjoint
+        masks = np.array([
+            # P/E Ratio Analysis
+            (pe > 0) & (pe < 15),
+            (pe >= 15) & (pe <= 25),
+            pe > 30,
+            
+            # PEG Ratio Analysis
+            peg < 1,
+            peg > 2,
+            
+            # ROE Analysis
+            roe > 0.20,
+            (roe > 0.15) & (roe <= 0.20),
+            roe < 0,
+            
+            # Debt to Equity Analysis
+            d2e < 0.3,
+            d2e > 2,
+            
+            # Free Cash Flow Analysis
+            fcf > 0,
+            fcf < 0,
+            
+            # EBITDA Analysis
+            ebitda > 0,
+            
+            # RSI Analysis
+            rsi < 30,
+            rsi > 70,
+            
+            # Performance YTD Analysis
+            perf_ytd > 0,
+            perf_ytd < 0,
+            
+            # Insider Trade Type Impact
+            purchase,
+            sale
+        ])
         
-        # Insider Trade Type Impact
-        if 'purchase' in trade_type.lower():
-            score += int(3 * self.score_weights['insider_trade_type'])
-            reasons.append("Інсайдер купує (позитивний сигнал)")
-        elif 'sale' in trade_type.lower():
-            score -= int(1 * self.score_weights['insider_trade_type'])
-            reasons.append("Інсайдер продає")
+        scores = self._rule_deltas @ masks
+        reasons = [[] for _ in range(len(metrics))]
+        for (_, _, reason), mask in zip(self._SCORE_RULES, masks):
+            for i in np.flatnonzero(mask):
+                reasons[i].append(reason)
         
-        return score, reasons
-    
-    def _get_metric_value(self, *values) -> Optional[Any]:
-        """Get first non-None value from multiple sources"""
-        for value in values:
-            if value is not None and value != "" and value != "N/A":
-                return value
-        return None
+        return scores, reasons
     
     def get_recommendation(self, score: int) -> Recommendation:
         """Convert score to recommendation"""
-        if score >= 8:
-            return Recommendation.STRONG_BUY
-        elif score >= 4:
-            return Recommendation.BUY
-        elif score >= -2:
-            return Recommendation.HOLD
-        elif score >= -6:
-            return Recommendation.SELL
-        else:
-            return Recommendation.STRONG_SELL
+        return self._RECOMMENDATIONS[np.searchsorted(self._RECOMMENDATION_THRESHOLDS, score, side='right')]
+    
+    def _split_sources(
+        self, 
+        market_data: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """Yahoo info, Finviz, StockAnalysis and Finnhub metric dicts of one ticker's market data"""
+        web_data = market_data.get('web', {})
+        return (
+            market_data.get('yahoo', {}).get('info', {}),
+            web_data.get('finviz', {}),
+            web_data.get('stockanalysis', {}),
+            market_data.get('finnhub', {}).get('metrics', {})
+        )
     
     def analyze_insider_trade(
         self, 
@@ -219,40 +253,48 @@ class FinancialAnalyzer:
         market_data: Dict[str, Any]
     ) -> InsiderTrade:
         """Analyze insider trade with market data"""
+        return self.analyze_batch([trade], {trade.ticker: market_data})[0]
+    
+    def analyze_batch(
+        self, 
+        trades: List[InsiderTrade], 
+        market_data_map: Dict[str, Dict[str, Any]]
+    ) -> List[InsiderTrade]:
+        """Analyze many insider trades with one vectorized scoring pass"""
         
-        yahoo_data = market_data.get('yahoo', {}).get('info', {})
-        web_data = market_data.get('web', {})
-        finviz_data = web_data.get('finviz', {})
-        stockanalysis_data = web_data.get('stockanalysis', {})
-        finnhub_data = market_data.get('finnhub', {}).get('metrics', {})
-        
-        # Calculate financial score
-        score, reasons = self.calculate_financial_score(
-            yahoo_data, finviz_data, stockanalysis_data, 
-            finnhub_data, trade.trade_type.value
-        )
-        
-        # Update trade object
-        trade.score = score
-        trade.reasons = reasons
-        trade.recommendation = self.get_recommendation(score)
+        sources = [self._split_sources(market_data_map.get(trade.ticker, {})) for trade in trades]
         
-        # Set current price
-        trade.current_price = (
-            yahoo_data.get('regularMarketPrice') or 
-            stockanalysis_data.get('regularMarketPrice')
+        # Calculate financial scores
+        metrics = pd.DataFrame.from_records(
+            [self.extract_metrics(*trade_sources, trade.trade_type.value) for trade, trade_sources in zip(trades, sources)],
+            columns=_METRIC_COLUMNS
         )
+        scores, reasons = self.score_batch(metrics)
+        tiers = np.searchsorted(self._RECOMMENDATION_THRESHOLDS, scores, side='right')
         
-        # Set target prices
-        trade.target_prices = {
-            'yahoo': yahoo_data.get('targetMeanPrice'),
-            'finviz': finviz_data.get('Target Price'),
-            'stockanalysis': stockanalysis_data.get('Target Price')
-        }
-        
-        # Set sector
-        trade.sector = yahoo_data.get('sector', 'N/A')
-        
-        logger.debug(f"Analyzed trade for {trade.ticker}: {trade.recommendation.value} (score: {score})")
+        for trade, (yahoo_data, finviz_data, stockanalysis_data, _), score, trade_reasons, tier in zip(
+            trades, sources, scores.tolist(), reasons, tiers
+        ):
+            yahoo, stockanalysis = yahoo_data.get, stockanalysis_data.get
+            
+            # Update trade object
+            trade.score = score
+            trade.reasons = trade_reasons
+            trade.recommendation = self._RECOMMENDATIONS[tier]
+            
+            # Set current price
+            trade.current_price = yahoo('regularMarketPrice') or stockanalysis('regularMarketPrice')
+            
+            # Set target prices
+            trade.target_prices = {
+                'yahoo': yahoo('targetMeanPrice'),
+                'finviz': finviz_data.get('Target Price'),
+                'stockanalysis': stockanalysis('Target Price')
+            }
+            
+            # Set sector
+            trade.sector = yahoo('sector', 'N/A')
+            
+            logger.debug(f"Analyzed trade for {trade.ticker}: {trade.recommendation.value} (score: {score})")
         
-        return trade
\ No newline at end of file
+        return trades
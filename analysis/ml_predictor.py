@@ -2,34 +2,111 @@ import numpy as np
 import pandas as pd
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime, timedelta
+import os
 import joblib
+from joblib import Parallel, delayed
 from pathlib import Path
+import functools
 
 # ML Libraries
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
 from sklearn.preprocessing import StandardScaler, RobustScaler
 from sklearn.model_selection import TimeSeriesSplit, GridSearchCV
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from sklearn.feature_selection import SelectKBest, f_regression
-import xgboost as xgb
-import lightgbm as lgb
-from catboost import CatBoostRegressor
-
-# Deep Learning
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras import layers
-from tensorflow.keras.callbacks import EarlyStopping, ReduceLROnPlateau
+from sklearn.feature_selection import SelectKBest, VarianceThreshold, f_regression
 
 # Statistical Libraries
 from scipy import stats
-from statsmodels.tsa.arima.model import ARIMA
-from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from analysis._feature_kernels import compute_all_features, feature_count
 from models.enhanced_models import EnhancedInsiderTrade, BacktestResult
 from utils.logging_config import logger
+
 from config.settings import settings
 
+
+# The four tree ensembles are fitted concurrently; each gets an equal share of the cores
+_TREE_MODEL_THREADS = max(1, (os.cpu_count() or 1) // 4)
+
+# Gradient-boosting models, saved LZ4-compressed (the random forest is saved memory-mappable)
+_BOOSTER_MODELS = ('xgboost', 'lightgbm', 'catboost')
+_TREE_MODELS = _BOOSTER_MODELS + ('random_forest',)
+
+# Feature importance report categories (simplified): (name, start), each running up to
+# the next start and the last one open-ended
+_CATEGORY_SPANS = (
+    ('price_features', 0),
+    ('technical_features', 20),
+    ('volume_features', 60),
+    ('volatility_features', 80),
+    ('momentum_features', 100),
+    ('pattern_features', 120),
+    ('microstructure_features', 140)
+)
+_CATEGORY_NAMES = tuple(name for name, _ in _CATEGORY_SPANS)
+_CATEGORY_STARTS = np.array([start for _, start in _CATEGORY_SPANS])
+
+
+# Boosting and deep learning libraries are imported on first use only
+@functools.cache
+def _xgb():
+    import xgboost
+    return xgboost
+
+
+@functools.cache
+def _lgb():
+    import lightgbm
+    return lightgbm
+
+
+@functools.cache
+def _catboost():
+    import catboost
+    return catboost
+
+
+@functools.cache
+def _keras():
+    from tensorflow import keras
+    return keras
+
+
+@functools.cache
+def _tf():
+    import tensorflow
+    return tensorflow
+
+
+@functools.cache
+def _cupy():
+    """CuPy when it is installed and a CUDA device is visible, else None"""
+    try:
+        import cupy
+    except ImportError:
+        return None
+    return cupy if cupy.cuda.is_available() else None
+
+
+class _GPURobustScaler(RobustScaler):
+    """RobustScaler whose median / interquartile range are fitted on the GPU with CuPy
+    
+    Only fit runs on the device; transform is sklearn's, so a pickled scaler also
+    works on machines without a GPU.
+    """
+    
+    def fit(self, X, y=None):
+        cp = _cupy()
+        X_gpu = cp.asarray(X)
+        self.center_ = cp.median(X_gpu, axis=0).get()
+        quantiles = cp.percentile(X_gpu, [25, 75], axis=0).get()
+        scale = quantiles[1] - quantiles[0]
+        scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+        self.scale_ = scale
+        self.n_features_in_ = X.shape[1]
+        return self
+
+
 class MLPredictor:
     """Advanced ML predictor with ensemble methods and deep learning"""
     
@@ -39,6 +116,8 @@ class MLPredictor:
         self.feature_selectors = {}
         self.model_weights = {}
         self.feature_importance = {}
+        self._nn_infer = None  # traced single-row forward pass of the neural network
+        self._fi_report_body = {'top_indices': [], 'top_importances': [], 'importance_by_category': {}}  # built when importances change
         
         # Model configurations
         self.model_configs = {
@@ -48,7 +127,10 @@ class MLPredictor:
                 'learning_rate': 0.01,
                 'subsample': 0.8,
                 'colsample_bytree': 0.8,
-                'random_state': 42
+                'random_state': 42,
+                'n_jobs': _TREE_MODEL_THREADS,
+                'tree_method': 'hist',
+                'max_bin': 255
             },
             'lightgbm': {
                 'n_estimators': 1000,
@@ -57,24 +139,34 @@ class MLPredictor:
                 'subsample': 0.8,
                 'colsample_bytree': 0.8,
                 'random_state': 42,
-                'verbose': -1
+                'verbose': -1,
+                'n_jobs': _TREE_MODEL_THREADS,
+                'max_bin': 255
             },
             'catboost': {
                 'iterations': 1000,
                 'depth': 6,
                 'learning_rate': 0.01,
                 'random_state': 42,
-                'verbose': False
+                'verbose': False,
+                'thread_count': _TREE_MODEL_THREADS
             },
             'random_forest': {
                 'n_estimators': 500,
                 'max_depth': 10,
                 'min_samples_split': 5,
                 'min_samples_leaf': 2,
-                'random_state': 42
+                'random_state': 42,
+                'n_jobs': _TREE_MODEL_THREADS
             }
         }
         
+        # Boosters build their quantized histograms on the GPU when one is configured
+        if settings.ML_GPU_ENABLED:
+            self.model_configs['xgboost']['tree_method'] = 'gpu_hist'
+            self.model_configs['lightgbm']['device'] = 'gpu'
+            self.model_configs['catboost']['task_type'] = 'GPU'
+        
         # Feature engineering parameters
         self.lookback_periods = [1, 3, 5, 10, 20, 50]
         self.technical_periods = [5, 10, 14, 20, 50, 200]
@@ -83,47 +175,20 @@ class MLPredictor:
         """Prepare comprehensive feature set for ML models"""
         
         try:
-            if len(data) < 100:
-                raise ValueError("Insufficient data for feature preparation")
-            
-            features_list = []
-            
-            # Ensure required columns
-            required_cols = ['open', 'high', 'low', 'close', 'volume']
-            if not all(col in data.columns for col in required_cols):
-                data.columns = [col.lower() for col in data.columns]
-            
-            # Price-based features
-            features_list.extend(self._create_price_features(data))
-            
-            # Technical indicators
-            features_list.extend(self._create_technical_features(data))
-            
-            # Volume features
-            features_list.extend(self._create_volume_features(data))
-            
-            # Volatility features
-            features_list.extend(self._create_volatility_features(data))
-            
-            # Momentum features
-            features_list.extend(self._create_momentum_features(data))
-            
-            # Pattern features
-            features_list.extend(self._create_pattern_features(data))
-            
-            # Market microstructure features
-            features_list.extend(self._create_microstructure_features(data))
-            
-            # Combine all features
-            feature_matrix = np.column_stack(features_list)
-            
-            # Create target variable (future returns)
-            returns = data['close'].pct_change(target_days).shift(-target_days)
-            
-            # Remove NaN values
-            valid_indices = ~(np.isnan(feature_matrix).any(axis=1) | np.isnan(returns))
-            feature_matrix = feature_matrix[valid_indices]
-            target = returns[valid_indices].values
+            feature_matrix = self._compute_feature_matrix(data)
+            returns = self._compute_target(data, target_days)
+            
+            # Remove bars without a known target (the kernel already filled every NaN feature).
+            # Usually only the last target_days bars are dropped, and then the rows are kept
+            # as a view of the preallocated matrix instead of a masked copy
+            valid_indices = ~np.isnan(returns)
+            n_valid = int(np.count_nonzero(valid_indices))
+            if valid_indices[:n_valid].all():
+                feature_matrix = feature_matrix[:n_valid]
+                target = returns[:n_valid]
+            else:
+                feature_matrix = feature_matrix[valid_indices]
+                target = returns[valid_indices]
             
             logger.info(f"Prepared {feature_matrix.shape[1]} features for {len(feature_matrix)} samples")
             return feature_matrix, target
@@ -132,283 +197,33 @@ class MLPredictor:
             logger.error(f"Error preparing features: {e}")
             raise
     
-    def _create_price_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create price-based features"""
-        features = []
-        close = data['close']
-        
-        # Returns for different periods
-        for period in self.lookback_periods:
-            if len(data) > period:
-                returns = close.pct_change(period)
-                features.append(returns.fillna(0).values)
-        
-        # Log returns
-        log_returns = np.log(close / close.shift(1))
-        features.append(log_returns.fillna(0).values)
-        
-        # Price ratios
-        features.append((close / data['open']).fillna(1).values)
-        features.append((data['high'] / data['low']).fillna(1).values)
-        features.append(((data['high'] + data['low']) / 2 / close).fillna(1).values)
-        
-        return features
+    def _compute_feature_matrix(self, data: pd.DataFrame) -> np.ndarray:
+        """Feature matrix for every bar of data; it does not depend on the prediction horizon"""
+        
+        if len(data) < 100:
+            raise ValueError("Insufficient data for feature preparation")
+        
+        # Ensure required columns
+        required_cols = ['open', 'high', 'low', 'close', 'volume']
+        if not all(col in data.columns for col in required_cols):
+            data.columns = [col.lower() for col in data.columns]
+        
+        # Periods longer than the history are left out
+        n = len(data)
+        lookbacks = np.array([p for p in self.lookback_periods if n > p], dtype=np.int64)
+        technicals = np.array([p for p in self.technical_periods if n > p], dtype=np.int64)
+        
+        # One Numba pass writes every feature group straight into the matrix
+        # (column-major so each block fills contiguous columns)
+        open_, high, low, close, volume = data[required_cols].to_numpy(dtype=np.float64).T.copy()
+        feature_matrix = np.empty((n, feature_count(len(lookbacks), len(technicals))), dtype=np.float32, order='F')
+        compute_all_features(open_, high, low, close, volume, lookbacks, technicals, feature_matrix)
+        return feature_matrix
     
-    def _create_technical_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create technical indicator features"""
-        features = []
-        close = data['close']
-        high = data['high']
-        low = data['low']
-        
-        # Moving averages
-        for period in self.technical_periods:
-            if len(data) > period:
-                sma = close.rolling(period).mean()
-                ema = close.ewm(span=period).mean()
-                
-                features.append((close / sma).fillna(1).values)
-                features.append((close / ema).fillna(1).values)
-                features.append((sma.diff() / sma).fillna(0).values)
-        
-        # RSI
-        delta = close.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
-        features.append(rsi.fillna(50).values)
-        
-        # MACD
-        ema_12 = close.ewm(span=12).mean()
-        ema_26 = close.ewm(span=26).mean()
-        macd = ema_12 - ema_26
-        signal = macd.ewm(span=9).mean()
-        features.append(macd.fillna(0).values)
-        features.append(signal.fillna(0).values)
-        features.append((macd - signal).fillna(0).values)
-        
-        # Bollinger Bands
-        for period in [10, 20, 50]:
-            if len(data) > period:
-                sma = close.rolling(period).mean()
-                std = close.rolling(period).std()
-                upper = sma + (std * 2)
-                lower = sma - (std * 2)
-                
-                features.append(((close - lower) / (upper - lower)).fillna(0.5).values)
-                features.append((std / sma).fillna(0).values)
-        
-        # Stochastic Oscillator
-        for period in [14, 21]:
-            if len(data) > period:
-                lowest_low = low.rolling(period).min()
-                highest_high = high.rolling(period).max()
-                k_percent = 100 * ((close - lowest_low) / (highest_high - lowest_low))
-                features.append(k_percent.fillna(50).values)
-        
-        # Williams %R
-        for period in [14, 21]:
-            if len(data) > period:
-                highest_high = high.rolling(period).max()
-                lowest_low = low.rolling(period).min()
-                williams_r = -100 * ((highest_high - close) / (highest_high - lowest_low))
-                features.append(williams_r.fillna(-50).values)
-        
-        return features
-    
-    def _create_volume_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create volume-based features"""
-        features = []
-        volume = data['volume']
-        close = data['close']
-        
-        # Volume ratios
-        for period in [5, 10, 20]:
-            if len(data) > period:
-                vol_sma = volume.rolling(period).mean()
-                features.append((volume / vol_sma).fillna(1).values)
-        
-        # Price-Volume features
-        pv = close * volume
-        for period in [5, 10, 20]:
-            if len(data) > period:
-                pv_sma = pv.rolling(period).mean()
-                features.append((pv / pv_sma).fillna(1).values)
-        
-        # On-Balance Volume
-        obv = (volume * ((close > close.shift()).astype(int) * 2 - 1)).cumsum()
-        for period in [10, 20]:
-            if len(data) > period:
-                obv_sma = obv.rolling(period).mean()
-                features.append((obv / obv_sma).fillna(1).values)
-        
-        # Volume Rate of Change
-        for period in [5, 10]:
-            if len(data) > period:
-                vol_roc = volume.pct_change(period)
-                features.append(vol_roc.fillna(0).values)
-        
-        return features
-    
-    def _create_volatility_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create volatility-based features"""
-        features = []
-        close = data['close']
-        high = data['high']
-        low = data['low']
-        
-        # Historical volatility
-        returns = close.pct_change()
-        for period in [5, 10, 20, 50]:
-            if len(data) > period:
-                vol = returns.rolling(period).std()
-                features.append(vol.fillna(0).values)
-        
-        # True Range and ATR
-        tr1 = high - low
-        tr2 = abs(high - close.shift())
-        tr3 = abs(low - close.shift())
-        true_range = pd.concat([tr1, tr2, tr3], axis=1).max(axis=1)
-        
-        for period in [14, 21]:
-            if len(data) > period:
-                atr = true_range.rolling(period).mean()
-                features.append(atr.fillna(0).values)
-                features.append((true_range / atr).fillna(1).values)
-        
-        # Garman-Klass volatility
-        gk_vol = np.log(high/low) * np.log(high/low) - (2*np.log(2)-1) * np.log(close/data['open']) * np.log(close/data['open'])
-        for period in [10, 20]:
-            if len(data) > period:
-                gk_vol_ma = gk_vol.rolling(period).mean()
-                features.append(gk_vol_ma.fillna(0).values)
-        
-        return features
-    
-    def _create_momentum_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create momentum-based features"""
-        features = []
-        close = data['close']
-        
-        # Rate of Change
-        for period in [1, 3, 5, 10, 20]:
-            if len(data) > period:
-                roc = close.pct_change(period)
-                features.append(roc.fillna(0).values)
-        
-        # Momentum
-        for period in [10, 20]:
-            if len(data) > period:
-                momentum = close / close.shift(period)
-                features.append(momentum.fillna(1).values)
-        
-        # Acceleration (second derivative)
-        returns = close.pct_change()
-        acceleration = returns.diff()
-        features.append(acceleration.fillna(0).values)
-        
-        # Relative strength compared to moving average
-        for period in [20, 50]:
-            if len(data) > period:
-                sma = close.rolling(period).mean()
-                relative_strength = (close - sma) / sma
-                features.append(relative_strength.fillna(0).values)
-        
-        return features
-    
-    def _create_pattern_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create pattern recognition features"""
-        features = []
-        open_price = data['open']
-        high = data['high']
-        low = data['low']
-        close = data['close']
-        
-        # Candlestick patterns (simplified)
-        body = abs(close - open_price)
-        upper_shadow = high - np.maximum(close, open_price)
-        lower_shadow = np.minimum(close, open_price) - low
-        
-        # Doji pattern
-        doji = (body / (high - low) < 0.1).astype(int)
-        features.append(doji.fillna(0).values)
-        
-        # Hammer pattern
-        hammer = ((lower_shadow > 2 * body) & (upper_shadow < 0.1 * body)).astype(int)
-        features.append(hammer.fillna(0).values)
-        
-        # Shooting star pattern
-        shooting_star = ((upper_shadow > 2 * body) & (lower_shadow < 0.1 * body)).astype(int)
-        features.append(shooting_star.fillna(0).values)
-        
-        # Gap features
-        gap_up = ((open_price > close.shift()) & (low > close.shift())).astype(int)
-        gap_down = ((open_price < close.shift()) & (high < close.shift())).astype(int)
-        features.append(gap_up.fillna(0).values)
-        features.append(gap_down.fillna(0).values)
-        
-        # Higher highs and lower lows
-        for period in [5, 10]:
-            if len(data) > period:
-                higher_high = (high > high.rolling(period).max().shift()).astype(int)
-                lower_low = (low < low.rolling(period).min().shift()).astype(int)
-                features.append(higher_high.fillna(0).values)
-                features.append(lower_low.fillna(0).values)
-        
-        return features
-    
-    def _create_microstructure_features(self, data: pd.DataFrame) -> List[np.ndarray]:
-        """Create market microstructure features"""
-        features = []
-        open_price = data['open']
-        high = data['high']
-        low = data['low']
-        close = data['close']
-        volume = data['volume']
-        
-        # Bid-Ask spread proxy
-        spread_proxy = (high - low) / close
-        features.append(spread_proxy.fillna(0).values)
-        
-        # Price impact
-        price_change = close.pct_change()
-        volume_change = volume.pct_change()
-        price_impact = price_change / (volume_change + 1e-8)
-        features.append(price_impact.fillna(0).values)
-        
-        # Amihud illiquidity measure
-        amihud = abs(price_change) / (volume * close + 1e-8)
-        for period in [5, 20]:
-            if len(data) > period:
-                amihud_ma = amihud.rolling(period).mean()
-                features.append(amihud_ma.fillna(0).values)
-        
-        # Roll measure (effective spread)
-        roll_measure = 2 * np.sqrt(-np.cov(price_change[1:], price_change[:-1])[0,1]) if len(price_change) > 1 else 0
-        features.append(np.full(len(data), roll_measure))
-        
-        # Kyle's lambda (price impact coefficient)
-        if len(data) > 20:
-            kyle_lambda = []
-            for i in range(20, len(data)):
-                window_data = data.iloc[i-20:i]
-                if len(window_data) > 10:
-                    x = window_data['volume'].values.reshape(-1, 1)
-                    y = window_data['close'].pct_change().abs().values
-                    try:
-                        from sklearn.linear_model import LinearRegression
-                        reg = LinearRegression().fit(x[1:], y[1:])
-                        kyle_lambda.append(reg.coef_[0])
-                    except:
-                        kyle_lambda.append(0)
-                else:
-                    kyle_lambda.append(0)
-            
-            kyle_lambda = [0] * 20 + kyle_lambda
-            features.append(np.array(kyle_lambda))
-        
-        return features
+    def _compute_target(self, data: pd.DataFrame, target_days: int) -> np.ndarray:
+        """Future return over target_days for every bar (NaN where it is not known yet), float32 like the features"""
+        
+        return data['close'].pct_change(target_days).shift(-target_days).to_numpy(dtype=np.float32)
     
     def train_ensemble_models(
         self, 
@@ -421,93 +236,64 @@ class MLPredictor:
         try:
             logger.info("Training ensemble ML models...")
             
+            # Scaling, selection and the boosters all run on float32 (a no-op for prepare_features output)
+            X = np.asarray(X, dtype=np.float32)
+            y = np.asarray(y, dtype=np.float32)
+            
             # Split data for validation
             split_idx = int(len(X) * (1 - validation_split))
             X_train, X_val = X[:split_idx], X[split_idx:]
             y_train, y_val = y[:split_idx], y[split_idx:]
             
-            # Scale features
-            scaler = RobustScaler()
+            # Scale features (median / IQR fitted on the GPU when one is configured)
+            scaler = _GPURobustScaler() if settings.ML_GPU_ENABLED and _cupy() is not None else RobustScaler()
             X_train_scaled = scaler.fit_transform(X_train)
             X_val_scaled = scaler.transform(X_val)
             self.scalers['main'] = scaler
             
-            # Feature selection
-            selector = SelectKBest(score_func=f_regression, k=min(50, X_train.shape[1]))
-            X_train_selected = selector.fit_transform(X_train_scaled, y_train)
-            X_val_selected = selector.transform(X_val_scaled)
+            # Feature selection: drop (near-)constant columns first so the F-test only scores informative ones
+            variance_filter = VarianceThreshold(threshold=1e-6)
+            X_train_varying = variance_filter.fit_transform(X_train_scaled)
+            X_val_varying = variance_filter.transform(X_val_scaled)
+            self.feature_selectors['variance'] = variance_filter
+            
+            selector = SelectKBest(score_func=f_regression, k=min(50, X_train_varying.shape[1]))
+            X_train_selected = selector.fit_transform(X_train_varying, y_train)
+            X_val_selected = selector.transform(X_val_varying)
             self.feature_selectors['main'] = selector
             
             model_results = {}
             
-            # Train XGBoost
-            logger.info("Training XGBoost model...")
-            xgb_model = xgb.XGBRegressor(**self.model_configs['xgboost'])
-            xgb_model.fit(
-                X_train_selected, y_train,
-                eval_set=[(X_val_selected, y_val)],
-                early_stopping_rounds=50,
-                verbose=False
-            )
-            self.models['xgboost'] = xgb_model
-            
-            # Evaluate XGBoost
-            xgb_pred = xgb_model.predict(X_val_selected)
-            xgb_mse = mean_squared_error(y_val, xgb_pred)
-            xgb_r2 = r2_score(y_val, xgb_pred)
-            model_results['xgboost'] = {'mse': xgb_mse, 'r2': xgb_r2}
-            
-            # Train LightGBM
-            logger.info("Training LightGBM model...")
-            lgb_model = lgb.LGBMRegressor(**self.model_configs['lightgbm'])
-            lgb_model.fit(
-                X_train_selected, y_train,
-                eval_set=[(X_val_selected, y_val)],
-                callbacks=[lgb.early_stopping(50), lgb.log_evaluation(0)]
-            )
-            self.models['lightgbm'] = lgb_model
-            
-            # Evaluate LightGBM
-            lgb_pred = lgb_model.predict(X_val_selected)
-            lgb_mse = mean_squared_error(y_val, lgb_pred)
-            lgb_r2 = r2_score(y_val, lgb_pred)
-            model_results['lightgbm'] = {'mse': lgb_mse, 'r2': lgb_r2}
-            
-            # Train CatBoost
-            logger.info("Training CatBoost model...")
-            cat_model = CatBoostRegressor(**self.model_configs['catboost'])
-            cat_model.fit(
-                X_train_selected, y_train,
-                eval_set=(X_val_selected, y_val),
-                early_stopping_rounds=50
+            # Fit the four tree ensembles concurrently; their native training releases the GIL
+            # and threads share the selected matrices without copying them
+            fitters = {
+                'xgboost': self._fit_xgboost,
+                'lightgbm': self._fit_lightgbm,
+                'catboost': self._fit_catboost,
+                'random_forest': self._fit_random_forest
+            }
+            fitted = Parallel(n_jobs=len(fitters), backend='threading')(
+                delayed(fit)(X_train_selected, y_train, X_val_selected, y_val)
+                for fit in fitters.values()
             )
-            self.models['catboost'] = cat_model
-            
-            # Evaluate CatBoost
-            cat_pred = cat_model.predict(X_val_selected)
-            cat_mse = mean_squared_error(y_val, cat_pred)
-            cat_r2 = r2_score(y_val, cat_pred)
-            model_results['catboost'] = {'mse': cat_mse, 'r2': cat_r2}
-            
-            # Train Random Forest
-            logger.info("Training Random Forest model...")
-            rf_model = RandomForestRegressor(**self.model_configs['random_forest'])
-            rf_model.fit(X_train_selected, y_train)
-            self.models['random_forest'] = rf_model
-            
-            # Evaluate Random Forest
-            rf_pred = rf_model.predict(X_val_selected)
-            rf_mse = mean_squared_error(y_val, rf_pred)
-            rf_r2 = r2_score(y_val, rf_pred)
-            model_results['random_forest'] = {'mse': rf_mse, 'r2': rf_r2}
+            
+            # Evaluate the tree ensembles
+            for model_name, model in zip(fitters, fitted):
+                self.models[model_name] = model
+                pred = model.predict(X_val_selected)
+                model_results[model_name] = {
+                    'mse': mean_squared_error(y_val, pred),
+                    'r2': r2_score(y_val, pred)
+                }
             
             # Train Neural Network
-            if settings.AI_PREDICTIONS_ENABLED:
+            if settings.AI_PREDICTIONS_ENABLED and settings.TENSORFLOW_ENABLED:
                 logger.info("Training Neural Network model...")
                 nn_model = self._build_neural_network(X_train_selected.shape[1])
                 
-                early_stopping = EarlyStopping(patience=20, restore_best_weights=True)
-                reduce_lr = ReduceLROnPlateau(patience=10, factor=0.5)
+                keras = _keras()
+                early_stopping = keras.callbacks.EarlyStopping(patience=20, restore_best_weights=True)
+                reduce_lr = keras.callbacks.ReduceLROnPlateau(patience=10, factor=0.5)
                 
                 nn_model.fit(
                     X_train_selected, y_train,
@@ -518,6 +304,7 @@ class MLPredictor:
                     verbose=0
                 )
                 self.models['neural_network'] = nn_model
+                self._nn_infer = None
                 
                 # Evaluate Neural Network
                 nn_pred = nn_model.predict(X_val_selected).flatten()
@@ -538,9 +325,57 @@ class MLPredictor:
             logger.error(f"Error training ensemble models: {e}")
             raise
     
-    def _build_neural_network(self, input_dim: int) -> keras.Model:
+    def _fit_xgboost(self, X_train: np.ndarray, y_train: np.ndarray, X_val: np.ndarray, y_val: np.ndarray) -> Any:
+        """Fit the XGBoost model with early stopping on the validation split"""
+        
+        logger.info("Training XGBoost model...")
+        model = _xgb().XGBRegressor(**self.model_configs['xgboost'])
+        model.fit(
+            X_train, y_train,
+            eval_set=[(X_val, y_val)],
+            early_stopping_rounds=50,
+            verbose=False
+        )
+        return model
+    
+    def _fit_lightgbm(self, X_train: np.ndarray, y_train: np.ndarray, X_val: np.ndarray, y_val: np.ndarray) -> Any:
+        """Fit the LightGBM model with early stopping on the validation split"""
+        
+        logger.info("Training LightGBM model...")
+        lgb = _lgb()
+        model = lgb.LGBMRegressor(**self.model_configs['lightgbm'])
+        model.fit(
+            X_train, y_train,
+            eval_set=[(X_val, y_val)],
+            callbacks=[lgb.early_stopping(50), lgb.log_evaluation(0)]
+        )
+        return model
+    
+    def _fit_catboost(self, X_train: np.ndarray, y_train: np.ndarray, X_val: np.ndarray, y_val: np.ndarray) -> Any:
+        """Fit the CatBoost model with early stopping on the validation split"""
+        
+        logger.info("Training CatBoost model...")
+        model = _catboost().CatBoostRegressor(**self.model_configs['catboost'])
+        model.fit(
+            X_train, y_train,
+            eval_set=(X_val, y_val),
+            early_stopping_rounds=50
+        )
+        return model
+    
+    def _fit_random_forest(self, X_train: np.ndarray, y_train: np.ndarray, X_val: np.ndarray, y_val: np.ndarray) -> Any:
+        """Fit the Random Forest model (the validation split is only used for evaluation)"""
+        
+        logger.info("Training Random Forest model...")
+        model = RandomForestRegressor(**self.model_configs['random_forest'])
+        model.fit(X_train, y_train)
+        return model
+    
+    def _build_neural_network(self, input_dim: int) -> Any:
         """Build neural network architecture"""
         
+        keras = _keras()
+        layers = keras.layers
         model = keras.Sequential([
             layers.Dense(256, activation='relu', input_shape=(input_dim,)),
             layers.BatchNormalization(),
@@ -568,6 +403,16 @@ class MLPredictor:
         
         return model
     
+    def _trace_nn_inference(self, model: Any) -> Any:
+        """Single-row forward pass as an XLA-compiled graph with a static input shape, traced once"""
+        
+        tf = _tf()
+        return tf.function(
+            lambda x: model(x, training=False),
+            input_signature=[tf.TensorSpec([1, model.input_shape[-1]], tf.float32)],
+            jit_compile=True
+        )
+    
     def _calculate_model_weights(self, model_results: Dict[str, Dict[str, float]]):
         """Calculate ensemble weights based on model performance"""
         
@@ -587,28 +432,24 @@ class MLPredictor:
     def _extract_feature_importance(self):
         """Extract feature importance from tree-based models"""
         
-        importance_dict = {}
-        
-        # XGBoost importance
-        if 'xgboost' in self.models:
-            importance_dict['xgboost'] = self.models['xgboost'].feature_importances_
-        
-        # LightGBM importance
-        if 'lightgbm' in self.models:
-            importance_dict['lightgbm'] = self.models['lightgbm'].feature_importances_
-        
-        # CatBoost importance
-        if 'catboost' in self.models:
-            importance_dict['catboost'] = self.models['catboost'].feature_importances_
-        
-        # Random Forest importance
-        if 'random_forest' in self.models:
-            importance_dict['random_forest'] = self.models['random_forest'].feature_importances_
-        
-        # Average importance across models
-        if importance_dict:
-            importance_arrays = list(importance_dict.values())
-            self.feature_importance['average'] = np.mean(importance_arrays, axis=0)
+        # Per-model importances in _TREE_MODELS order (NaN rows for models that were not trained),
+        # averaged with a running sum instead of stacking the arrays
+        trained = [name for name in _TREE_MODELS if name in self.models]
+        if not trained:
+            return
+        
+        n_features = len(self.models[trained[0]].feature_importances_)
+        per_model = np.full((len(_TREE_MODELS), n_features), np.nan, dtype=np.float32)
+        total = np.zeros(n_features)
+        for row, name in enumerate(_TREE_MODELS):
+            if name in self.models:
+                importance = self.models[name].feature_importances_
+                per_model[row] = importance
+                total += importance
+        
+        self.feature_importance['per_model'] = per_model
+        self.feature_importance['average'] = total / len(trained)
+        self._refresh_feature_importance_report()
     
     def predict_ensemble(self, X: np.ndarray) -> Tuple[float, Dict[str, float]]:
         """Make ensemble prediction"""
@@ -619,17 +460,21 @@ class MLPredictor:
                 raise ValueError("Models not trained yet")
             
             X_scaled = self.scalers['main'].transform(X)
+            if 'variance' in self.feature_selectors:
+                X_scaled = self.feature_selectors['variance'].transform(X_scaled)
             X_selected = self.feature_selectors['main'].transform(X_scaled)
             
-            predictions = {}
+            # Tree ensembles predict one row serially: a thread pool per call costs more than the predicts
+            predictions = {
+                name: model.predict(X_selected)[0]
+                for name, model in self.models.items() if name != 'neural_network'
+            }
             
-            # Get predictions from each model
-            for model_name, model in self.models.items():
-                if model_name == 'neural_network':
-                    pred = model.predict(X_selected, verbose=0).flatten()[0]
-                else:
-                    pred = model.predict(X_selected)[0]
-                predictions[model_name] = pred
+            if 'neural_network' in self.models:
+                if self._nn_infer is None:
+                    self._nn_infer = self._trace_nn_inference(self.models['neural_network'])
+                nn_pred = self._nn_infer(np.asarray(X_selected[:1], dtype=np.float32))
+                predictions['neural_network'] = float(nn_pred.numpy().flatten()[0])
             
             # Calculate weighted ensemble prediction
             ensemble_pred = sum(
@@ -653,26 +498,19 @@ class MLPredictor:
         predictions = {}
         
         try:
+            # The features of the most recent bar do not depend on the horizon, so they
+            # are computed once and the ensemble is evaluated once for all horizons
+            X_latest = self._compute_feature_matrix(data)[-1:]
+            ensemble_pred, individual_preds = self.predict_ensemble(X_latest)
+            
+            # Convert to probability
+            prob_up = self._convert_to_probability(ensemble_pred)
+            
             for days in days_ahead:
-                # Prepare features for this time horizon
-                X, _ = self.prepare_features(data, target_days=days)
-                
-                if len(X) == 0:
-                    continue
-                
-                # Use the most recent data point
-                X_latest = X[-1:].reshape(1, -1)
-                
-                # Make prediction
-                ensemble_pred, individual_preds = self.predict_ensemble(X_latest)
-                
-                # Convert to probability
-                prob_up = self._convert_to_probability(ensemble_pred)
-                
                 predictions[days] = {
                     'return_prediction': ensemble_pred,
                     'probability_up': prob_up,
-                    'individual_predictions': individual_preds
+                    'individual_predictions': dict(individual_preds)
                 }
             
             return predictions
@@ -697,23 +535,35 @@ class MLPredictor:
         try:
             model_dir.mkdir(exist_ok=True)
             
-            # Save sklearn-compatible models
-            for model_name in ['xgboost', 'lightgbm', 'catboost', 'random_forest']:
+            # Boosters are opaque byte blobs: LZ4 shrinks them at close to memcpy speed
+            for model_name in _BOOSTER_MODELS:
                 if model_name in self.models:
                     joblib.dump(
                         self.models[model_name], 
-                        model_dir / f"{model_name}_model.pkl"
+                        model_dir / f"{model_name}_model.pkl",
+                        compress=('lz4', 3),
+                        protocol=5
                     )
             
+            # The forest, scalers and selectors are mostly NumPy arrays, kept uncompressed
+            # so load_models can memory-map them
+            if 'random_forest' in self.models:
+                joblib.dump(self.models['random_forest'], model_dir / "random_forest_model.pkl", protocol=5)
+            
             # Save neural network
             if 'neural_network' in self.models:
                 self.models['neural_network'].save(model_dir / "neural_network_model.h5")
             
             # Save scalers and selectors
-            joblib.dump(self.scalers, model_dir / "scalers.pkl")
-            joblib.dump(self.feature_selectors, model_dir / "feature_selectors.pkl")
-            joblib.dump(self.model_weights, model_dir / "model_weights.pkl")
-            joblib.dump(self.feature_importance, model_dir / "feature_importance.pkl")
+            joblib.dump(self.scalers, model_dir / "scalers.pkl", protocol=5)
+            joblib.dump(self.feature_selectors, model_dir / "feature_selectors.pkl", protocol=5)
+            
+            # Ensemble weights and feature importances share one archive
+            np.savez_compressed(
+                model_dir / "ensemble_stats.npz",
+                **{f"weight_{name}": weight for name, weight in self.model_weights.items()},
+                **{f"importance_{name}": values for name, values in self.feature_importance.items()}
+            )
             
             logger.info(f"Models saved to {model_dir}")
             
@@ -724,76 +574,109 @@ class MLPredictor:
         """Load trained models from disk"""
         
         try:
-            # Load sklearn-compatible models
-            for model_name in ['xgboost', 'lightgbm', 'catboost', 'random_forest']:
+            # Load boosters
+            for model_name in _BOOSTER_MODELS:
                 model_path = model_dir / f"{model_name}_model.pkl"
                 if model_path.exists():
                     self.models[model_name] = joblib.load(model_path)
             
+            # Forest, scaler and selector arrays are memory-mapped read-only instead of read into RAM
+            forest_path = model_dir / "random_forest_model.pkl"
+            if forest_path.exists():
+                self.models['random_forest'] = joblib.load(forest_path, mmap_mode='r')
+            
             # Load neural network
             nn_path = model_dir / "neural_network_model.h5"
-            if nn_path.exists():
-                self.models['neural_network'] = keras.models.load_model(nn_path)
+            if nn_path.exists() and settings.TENSORFLOW_ENABLED:
+                self.models['neural_network'] = _keras().models.load_model(nn_path)
+                self._nn_infer = None
             
             # Load scalers and selectors
             scaler_path = model_dir / "scalers.pkl"
             if scaler_path.exists():
-                self.scalers = joblib.load(scaler_path)
+                self.scalers = joblib.load(scaler_path, mmap_mode='r')
             
             selector_path = model_dir / "feature_selectors.pkl"
             if selector_path.exists():
-                self.feature_selectors = joblib.load(selector_path)
-            
-            weights_path = model_dir / "model_weights.pkl"
-            if weights_path.exists():
-                self.model_weights = joblib.load(weights_path)
-            
-            importance_path = model_dir / "feature_importance.pkl"
-            if importance_path.exists():
-                self.feature_importance = joblib.load(importance_path)
+                self.feature_selectors = joblib.load(selector_path, mmap_mode='r')
+            
+            # Load ensemble weights and feature importances (older saves kept them in two pickles)
+            stats_path = model_dir / "ensemble_stats.npz"
+            if stats_path.exists():
+                with np.load(stats_path) as stats:
+                    self.model_weights = {
+                        key[len("weight_"):]: float(stats[key]) for key in stats.files if key.startswith("weight_")
+                    }
+                    self.feature_importance = {
+                        key[len("importance_"):]: stats[key] for key in stats.files if key.startswith("importance_")
+                    }
+            else:
+                weights_path = model_dir / "model_weights.pkl"
+                if weights_path.exists():
+                    self.model_weights = joblib.load(weights_path)
+                
+                importance_path = model_dir / "feature_importance.pkl"
+                if importance_path.exists():
+                    self.feature_importance = joblib.load(importance_path)
+            self._refresh_feature_importance_report()
             
             logger.info(f"Models loaded from {model_dir}")
             
         except Exception as e:
             logger.error(f"Error loading models: {e}")
     
-    def get_feature_importance_report(self) -> Dict[str, Any]:
-        """Generate feature importance report"""
-        
-        report = {
-            'top_features': [],
-            'importance_by_category': {},
-            'model_performance': self.model_weights
+    def _refresh_feature_importance_report(self):
+        """Rebuild the top features and category means served by get_feature_importance_report"""
+        
+        average = self.feature_importance.get('average')
+        if average is None:
+            self._fi_report_body = {'top_indices': [], 'top_importances': [], 'importance_by_category': {}}
+            return
+        
+        # Lists, strided views and float32 loads become one contiguous float64 vector
+        importance = np.ascontiguousarray(average, dtype=np.float64)
+        n_features = len(importance)
+        if n_features == 0:
+            self._fi_report_body = {
+                'top_indices': [], 'top_importances': [], 'importance_by_category': dict.fromkeys(_CATEGORY_NAMES, 0.0)
+            }
+            return
+        
+        # Get top features (would need feature names): partial selection of the 20 largest,
+        # then only those are sorted in descending order
+        k = min(20, n_features)
+        top_candidates = np.sort(np.argpartition(importance, n_features - k)[n_features - k:])
+        top_indices = top_candidates[np.argsort(-importance[top_candidates], kind='stable')]
+        top_importances = importance[top_indices]
+        
+        # Category means in one segmented reduction; a trailing zero keeps starts past
+        # the end valid, and categories with no features report 0.0
+        starts = np.minimum(_CATEGORY_STARTS, n_features)
+        lengths = np.diff(np.append(starts, n_features))
+        sums = np.add.reduceat(np.append(importance, 0.0), starts)
+        means = np.where(lengths > 0, sums / np.maximum(lengths, 1), 0.0)
+        
+        self._fi_report_body = {
+            'top_indices': top_indices.tolist(),
+            'top_importances': top_importances.tolist(),
+            'importance_by_category': dict(zip(_CATEGORY_NAMES, means.tolist()))
         }
-        
-        try:
-            if 'average' in self.feature_importance:
-                importance = self.feature_importance['average']
-                
-                # Get top features (would need feature names)
-                top_indices = np.argsort(importance)[-20:][::-1]
-                report['top_features'] = [
-                    {'index': int(idx), 'importance': float(importance[idx])}
-                    for idx in top_indices
-                ]
-                
-                # Categorize features (simplified)
-                categories = {
-                    'price_features': importance[:20],
-                    'technical_features': importance[20:60],
-                    'volume_features': importance[60:80],
-                    'volatility_features': importance[80:100],
-                    'momentum_features': importance[100:120],
-                    'pattern_features': importance[120:140],
-                    'microstructure_features': importance[140:]
-                }
-                
-                report['importance_by_category'] = {
-                    cat: float(np.mean(values)) if len(values) > 0 else 0.0
-                    for cat, values in categories.items()
-                }
-        
-        except Exception as e:
-            logger.error(f"Error generating feature importance report: {e}")
-        
-        return report
\ No newline at end of file
+    
+    def get_feature_importance_report(self, columnar: bool = False) -> Dict[str, Any]:
+        """Generate feature importance report (columnar=True gives top features as parallel index/importance lists)"""
+        
+        # The body is precomputed whenever the importances change; callers get their own copies
+        body = self._fi_report_body
+        if columnar:
+            top_features = {'indices': list(body['top_indices']), 'importances': list(body['top_importances'])}
+        else:
+            top_features = [
+                {'index': idx, 'importance': value}
+                for idx, value in zip(body['top_indices'], body['top_importances'])
+            ]
+        
+        return {
+            'top_features': top_features,
+            'importance_by_category': dict(body['importance_by_category']),
+            'model_performance': self.model_weights
+        }
\ No newline at end of file
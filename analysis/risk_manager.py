@@ -5,12 +5,119 @@ from datetime import datetime, timedelta
 from scipy import stats
 from scipy.optimize import minimize
 import warnings
-warnings.filterwarnings('ignore')
 
 from models.enhanced_models import Portfolio, EnhancedInsiderTrade, RiskLevel
+from analysis._kernels import liquidity_means, neg_sharpe
+from analysis.advanced_financial_analyzer import records_to_soa, _RISK_SCORE_BOUNDS, _RISK_LEVELS
 from utils.logging_config import logger
 from config.settings import settings
 
+
+def _partition_percentile(returns, q: float) -> Tuple[float, np.ndarray, int]:
+    """Percentile q (0-100) interpolated like np.percentile from a quickselect partition
+    
+    Returns the percentile, the partitioned values (everything before index below is
+    no larger than the percentile) and below, the lower order statistic's index.
+    """
+    values = np.asarray(returns, dtype=np.float64)
+    position = (values.size - 1) * (q / 100.0)
+    below = int(position)
+    above = min(below + 1, values.size - 1)
+    partitioned = np.partition(values, (below, above))
+    
+    # Same two-sided linear interpolation np.percentile uses
+    lower = partitioned[below]
+    upper = partitioned[above]
+    fraction = position - below
+    if fraction >= 0.5:
+        percentile = upper - (upper - lower) * (1 - fraction)
+    else:
+        percentile = lower + (upper - lower) * fraction
+    return percentile, partitioned, below
+
+
+def _ragged_percentiles(arrays: List[np.ndarray], q: float) -> np.ndarray:
+    """Percentile q (0-100) of each non-empty array, interpolated like np.percentile, from one column-wise sort
+    
+    The arrays are padded with NaN into the columns of one matrix; NaN sorts last,
+    so every column keeps its own order statistics at the top.
+    """
+    lengths = np.array([len(values) for values in arrays])
+    columns = np.full((lengths.max(), len(arrays)), np.nan)
+    for i, values in enumerate(arrays):
+        columns[:lengths[i], i] = values
+    columns.sort(axis=0)
+    
+    # Same two-sided linear interpolation np.percentile uses, per column
+    position = (lengths - 1) * (q / 100.0)
+    below = position.astype(np.intp)
+    above = np.minimum(below + 1, lengths - 1)
+    index = np.arange(len(arrays))
+    lower = columns[below, index]
+    upper = columns[above, index]
+    fraction = position - below
+    with np.errstate(invalid='ignore'):  # infinite returns interpolate to NaN
+        return np.where(fraction >= 0.5, upper - (upper - lower) * (1 - fraction), lower + (upper - lower) * fraction)
+
+
+# Fields read by trade risk assessment (SoA layouts, NaN = missing)
+_TRADE_RISK_DTYPE = np.dtype([('current_price', 'f8'), ('market_cap', 'f8'), ('volume', 'f8')])
+_FUND_RISK_DTYPE = np.dtype([('pe_ratio', 'f8'), ('debt_to_equity', 'f8'), ('net_margin', 'f8'), ('roe', 'f8')])
+_TECH_RISK_DTYPE = np.dtype([('atr', 'f8'), ('rsi_14', 'f8'), ('sma_20', 'f8'), ('sma_50', 'f8')])
+_SENTIMENT_RISK_DTYPE = np.dtype([('overall_sentiment', 'f8')])
+
+# Fields read by position sizing, and the sizing of a trade without a price
+_POSITION_SIZE_DTYPE = np.dtype([
+    ('current_price', 'f8'), ('var_1d', 'f8'), ('probability_up_30d', 'f8'),
+    ('price_prediction_30d', 'f8'), ('fair_value', 'f8')
+])
+_PRICE_LEVELS_DTYPE = np.dtype([('support_1', 'f8'), ('resistance_1', 'f8')])
+_EMPTY_POSITION_INFO = {
+    'recommended_size': 0.0,
+    'max_size': 0.0,
+    'risk_adjusted_size': 0.0,
+    'stop_loss': None,
+    'take_profit': None,
+    'risk_reward_ratio': None
+}
+
+# Mitigation flag bits raised by trade risk factors
+RISK_FLAG_HIGH_VOLATILITY = 1
+RISK_FLAG_NEGATIVE = 2
+
+# Trade risk factors in report order, with the risk score each one adds and the flags it raises;
+# RISK_FACTOR_SECTOR's text names the sector
+_RISK_FACTORS = (
+    ("High volatility (ATR > 5%)", 1.5, RISK_FLAG_HIGH_VOLATILITY),
+    ("Moderate volatility", 0.5, 0),
+    ("Very high P/E ratio", 1.0, 0),
+    ("High P/E ratio", 0.5, 0),
+    ("Very high debt-to-equity", 1.5, 0),
+    ("High debt levels", 0.5, 0),
+    ("Negative profit margins", 2.0, RISK_FLAG_NEGATIVE),
+    ("Negative return on equity", 1.5, RISK_FLAG_NEGATIVE),
+    ("Micro-cap stock (high volatility)", 2.0, 0),
+    ("Small-cap stock (moderate volatility)", 1.0, 0),
+    ("High-risk sector: {sector}", 0.5, 0),
+    ("Extremely overbought (RSI > 80)", 1.0, 0),
+    ("Overbought conditions", 0.5, 0),
+    ("Price below long-term trend", 0.5, 0),
+    ("Insider selling signal", 1.0, 0),
+    ("Very negative sentiment", 1.0, 0),
+    ("Negative sentiment", 0.5, RISK_FLAG_NEGATIVE),
+    ("Low liquidity", 1.0, 0),
+)
+_RISK_FACTOR_WEIGHTS = np.array([weight for _, weight, _ in _RISK_FACTORS])
+_RISK_FACTOR_FLAGS = np.array([flags for _, _, flags in _RISK_FACTORS])
+RISK_FACTOR_SECTOR = 10
+_HIGH_RISK_SECTORS = ('Technology', 'Biotechnology', 'Energy', 'Materials')
+
+
+def _nan_if_unset(values: np.ndarray) -> np.ndarray:
+    """Zero entries as NaN, for fields where a falsy value means unknown"""
+    return np.where(values == 0, np.nan, values)
+
+
 class RiskManager:
     """Advanced risk management and portfolio optimization"""
     
@@ -23,6 +130,13 @@ class RiskManager:
         self.max_sector_allocation = 0.30  # 30% max in any sector
         self.max_correlation = 0.70  # Maximum correlation between positions
         
+        # Per-ticker close-to-close returns, memoized only while a risk report is being generated
+        self._returns_cache = None
+        
+        # Portfolio returns with their daily volatility and 5th percentile, kept by
+        # calculate_portfolio_risk while a risk report is being generated
+        self._last_stats = None
+        
     def calculate_portfolio_risk(
         self, 
         portfolio: Portfolio, 
@@ -58,19 +172,27 @@ class RiskManager:
                 logger.warning("Insufficient data for risk calculation")
                 return risk_metrics
             
-            # Value at Risk (VaR)
-            risk_metrics['var_95'] = self._calculate_var(portfolio_returns, 0.95)
-            risk_metrics['var_99'] = self._calculate_var(portfolio_returns, 0.99)
-            
-            # Expected Shortfall (Conditional VaR)
-            risk_metrics['expected_shortfall_95'] = self._calculate_expected_shortfall(portfolio_returns, 0.95)
-            risk_metrics['expected_shortfall_99'] = self._calculate_expected_shortfall(portfolio_returns, 0.99)
+            # Value at Risk (VaR) and Expected Shortfall (Conditional VaR), one partition per level
+            returns_array = portfolio_returns.to_numpy(dtype=np.float64)
+            risk_metrics['var_95'], risk_metrics['expected_shortfall_95'] = self._calculate_var_and_expected_shortfall(returns_array, 0.95)
+            risk_metrics['var_99'], risk_metrics['expected_shortfall_99'] = self._calculate_var_and_expected_shortfall(returns_array, 0.99)
             
             # Maximum Drawdown
             risk_metrics['max_drawdown'] = self._calculate_max_drawdown(portfolio_returns)
             
             # Volatility
-            risk_metrics['volatility'] = portfolio_returns.std() * np.sqrt(252)  # Annualized
+            daily_volatility = portfolio_returns.std()
+            risk_metrics['volatility'] = daily_volatility * np.sqrt(252)  # Annualized
+            
+            # The stress tests of the same report reuse these (their 5th percentile is the 95% VaR)
+            if self._returns_cache is not None:
+                self._last_stats = {
+                    'portfolio': portfolio,
+                    'price_data': price_data,
+                    'returns': portfolio_returns,
+                    'std': daily_volatility,
+                    'percentile_5': risk_metrics['var_95']
+                }
             
             # Sharpe Ratio
             excess_returns = portfolio_returns.mean() * 252 - self.risk_free_rate
@@ -108,62 +230,98 @@ class RiskManager:
             if not portfolio.positions:
                 return None
             
-            # Get common date range
-            all_dates = None
-            for ticker in portfolio.positions.keys():
-                if ticker in price_data and not price_data[ticker].empty:
-                    if all_dates is None:
-                        all_dates = price_data[ticker].index
-                    else:
-                        all_dates = all_dates.intersection(price_data[ticker].index)
+            # Align closes on the common date range
+            tickers = [
+                ticker for ticker in portfolio.positions.keys()
+                if ticker in price_data and not price_data[ticker].empty
+            ]
+            if not tickers:
+                return None
             
-            if all_dates is None or len(all_dates) < 30:
+            closes = pd.concat([price_data[ticker]['close'] for ticker in tickers], axis=1, join='inner')
+            if len(closes) < 30:
                 return None
             
-            # Calculate weighted returns
-            portfolio_returns = pd.Series(0.0, index=all_dates)
+            # Weighted returns in one matrix-vector product (missing closes carry forward, like pct_change)
             total_value = sum(portfolio.positions.values())
-            
-            for ticker, position_value in portfolio.positions.items():
-                if ticker in price_data and not price_data[ticker].empty:
-                    ticker_data = price_data[ticker].reindex(all_dates)
-                    ticker_returns = ticker_data['close'].pct_change()
-                    weight = position_value / total_value
-                    portfolio_returns += weight * ticker_returns
-            
-            return portfolio_returns.dropna()
+            weights = np.array([portfolio.positions[ticker] / total_value for ticker in tickers])
+            prices = closes.ffill().to_numpy(dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):  # zero closes give inf/NaN, as in pandas
+                returns = prices[1:] / prices[:-1]
+                returns -= 1.0  # in place, so the (T-1, N) returns are allocated once
+            portfolio_returns = returns @ weights
+            
+            # After the forward fill only the bars before every position has a close are NaN,
+            # so a view past them replaces dropna unless a zero price left a gap
+            valid = ~np.isnan(portfolio_returns)
+            first = int(np.argmax(valid)) if valid.any() else len(valid)
+            if valid[first:].all():
+                return pd.Series(portfolio_returns[first:], index=closes.index[1 + first:])
+            return pd.Series(portfolio_returns[valid], index=closes.index[1:][valid])
             
         except Exception as e:
             logger.error(f"Error calculating portfolio returns: {e}")
             return None
     
+    def _returns_of(self, ticker: str, data: pd.DataFrame) -> np.ndarray:
+        """Close-to-close returns of one ticker's prices (NaN first), like close.pct_change()"""
+        
+        key = (ticker, id(data))
+        if self._returns_cache is not None:
+            cached = self._returns_cache.get(key)
+            if cached is not None and cached[0] is data:
+                return cached[1]
+        
+        # Missing closes carry forward, as pct_change pads them
+        closes = data['close'].ffill().to_numpy(dtype=np.float64)
+        returns = np.empty_like(closes)
+        returns[:1] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):  # zero closes give inf/NaN, as in pandas
+            np.subtract(closes[1:] / closes[:-1], 1.0, out=returns[1:])
+        
+        # The frame is kept with its returns so its id cannot be reused while cached
+        if self._returns_cache is not None:
+            self._returns_cache[key] = (data, returns)
+        return returns
+    
     def _calculate_var(self, returns: pd.Series, confidence_level: float) -> float:
         """Calculate Value at Risk using historical simulation"""
         
         try:
-            return np.percentile(returns, (1 - confidence_level) * 100)
+            var, _, _ = _partition_percentile(returns, (1 - confidence_level) * 100)
+            return var
         except Exception as e:
             logger.error(f"Error calculating VaR: {e}")
             return 0.0
     
     def _calculate_expected_shortfall(self, returns: pd.Series, confidence_level: float) -> float:
         """Calculate Expected Shortfall (Conditional VaR)"""
+        return self._calculate_var_and_expected_shortfall(returns, confidence_level)[1]
+    
+    def _calculate_var_and_expected_shortfall(self, returns: pd.Series, confidence_level: float) -> Tuple[float, float]:
+        """Calculate VaR and Expected Shortfall from a single partition of the returns"""
         
         try:
-            var = self._calculate_var(returns, confidence_level)
-            tail_returns = returns[returns <= var]
-            return tail_returns.mean() if len(tail_returns) > 0 else 0.0
+            var, partitioned, below = _partition_percentile(returns, (1 - confidence_level) * 100)
+            
+            # The partition already holds the tail up to the lower order statistic; values past it
+            # can only reach the tail when they equal VaR
+            tail_returns = partitioned[:below + 1]
+            if below + 1 < partitioned.size and partitioned[below + 1] <= var:
+                tail_returns = partitioned[partitioned <= var]
+            return var, tail_returns.mean()
         except Exception as e:
-            logger.error(f"Error calculating Expected Shortfall: {e}")
-            return 0.0
+            logger.error(f"Error calculating VaR and Expected Shortfall: {e}")
+            return 0.0, 0.0
     
     def _calculate_max_drawdown(self, returns: pd.Series) -> float:
         """Calculate maximum drawdown"""
         
         try:
-            cumulative_returns = (1 + returns).cumprod()
-            rolling_max = cumulative_returns.expanding().max()
-            drawdown = (cumulative_returns - rolling_max) / rolling_max
+            cumulative_returns = np.cumprod(1 + np.asarray(returns, dtype=np.float64))
+            rolling_max = np.maximum.accumulate(cumulative_returns)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                drawdown = (cumulative_returns - rolling_max) / rolling_max
             return drawdown.min()
         except Exception as e:
             logger.error(f"Error calculating max drawdown: {e}")
@@ -176,9 +334,12 @@ class RiskManager:
             if not portfolio.positions:
                 return 0.0
             
-            total_value = sum(portfolio.positions.values())
-            weights = [value / total_value for value in portfolio.positions.values()]
-            hhi = sum(w**2 for w in weights)
+            values = np.fromiter(portfolio.positions.values(), dtype=np.float64, count=len(portfolio.positions))
+            total_value = values.sum()
+            if total_value == 0:
+                return 0.0
+            weights = values / total_value
+            hhi = float(np.dot(weights, weights))
             
             # Normalize HHI to 0-1 scale (1 = maximum concentration)
             n = len(weights)
@@ -206,13 +367,17 @@ class RiskManager:
             for ticker in portfolio.positions.keys():
                 if ticker in price_data and not price_data[ticker].empty:
                     data = price_data[ticker]
+                    avg_volume, avg_spread = liquidity_means(
+                        data['high'].to_numpy(dtype=np.float64),
+                        data['low'].to_numpy(dtype=np.float64),
+                        data['close'].to_numpy(dtype=np.float64),
+                        data['volume'].to_numpy(dtype=np.float64)
+                    )
                     
                     # Volume-based liquidity
-                    avg_volume = data['volume'].mean()
                     volume_score = min(1.0, avg_volume / 1000000)  # Normalize by 1M shares
                     
                     # Spread-based liquidity (proxy using high-low spread)
-                    avg_spread = ((data['high'] - data['low']) / data['close']).mean()
                     spread_score = max(0.0, 1.0 - avg_spread * 100)  # Lower spread = higher liquidity
                     
                     # Combined liquidity score
@@ -242,19 +407,20 @@ class RiskManager:
             if n_assets == 0:
                 return {}
             
-            # Objective function (maximize Sharpe ratio)
-            def objective(weights):
-                portfolio_return = np.sum(weights * expected_returns)
-                portfolio_variance = np.dot(weights.T, np.dot(covariance_matrix, weights))
-                portfolio_std = np.sqrt(portfolio_variance)
-                
-                # Sharpe ratio (negative for minimization)
-                sharpe_ratio = (portfolio_return - self.risk_free_rate) / portfolio_std
-                return -sharpe_ratio
+            mu = np.asarray(expected_returns, dtype=np.float64)
+            cov = np.ascontiguousarray(covariance_matrix, dtype=np.float64)
+            
+            # Without sector limits, a tangency portfolio inside the position bounds is already optimal
+            if not (constraints and 'sector_limits' in constraints):
+                tangency_weights = self._tangency_weights(mu, cov)
+                if tangency_weights is not None:
+                    logger.info("Portfolio optimization completed in closed form")
+                    return dict(zip(expected_returns.index, tangency_weights))
             
             # Constraints
+            budget_gradient = np.ones(n_assets)
             constraints_list = [
-                {'type': 'eq', 'fun': lambda x: np.sum(x) - 1}  # Weights sum to 1
+                {'type': 'eq', 'fun': lambda x: np.sum(x) - 1, 'jac': lambda x: budget_gradient}  # Weights sum to 1
             ]
             
             # Individual position limits
@@ -264,26 +430,38 @@ class RiskManager:
             if constraints:
                 # Sector constraints
                 if 'sector_limits' in constraints:
+                    # Index arrays and constant gradients are built once, not on every optimizer call
                     for sector, tickers in constraints['sector_limits'].items():
-                        sector_indices = [i for i, ticker in enumerate(expected_returns.index) if ticker in tickers]
-                        if sector_indices:
+                        sector_tickers = set(tickers)
+                        sector_indices = np.array(
+                            [i for i, ticker in enumerate(expected_returns.index) if ticker in sector_tickers], dtype=np.intp
+                        )
+                        if sector_indices.size:
+                            sector_gradient = np.zeros(n_assets)
+                            sector_gradient[sector_indices] = -1.0
                             constraints_list.append({
                                 'type': 'ineq',
-                                'fun': lambda x, indices=sector_indices: self.max_sector_allocation - np.sum([x[i] for i in indices])
+                                'fun': lambda x, indices=sector_indices: self.max_sector_allocation - x[indices].sum(),
+                                'jac': lambda x, gradient=sector_gradient: gradient
                             })
             
             # Initial guess (equal weights)
             initial_weights = np.array([1.0 / n_assets] * n_assets)
             
-            # Optimization
-            result = minimize(
-                objective,
-                initial_weights,
-                method='SLSQP',
-                bounds=bounds,
-                constraints=constraints_list,
-                options={'maxiter': 1000}
-            )
+            # Optimization: maximize the Sharpe ratio with a compiled objective that also returns
+            # its gradient (SLSQP can step through weights with zero variance)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                result = minimize(
+                    neg_sharpe,
+                    initial_weights,
+                    args=(mu, cov, self.risk_free_rate),
+                    method='SLSQP',
+                    jac=True,
+                    bounds=bounds,
+                    constraints=constraints_list,
+                    options={'maxiter': 1000}
+                )
             
             if result.success:
                 optimal_weights = dict(zip(expected_returns.index, result.x))
@@ -297,6 +475,24 @@ class RiskManager:
             logger.error(f"Error optimizing portfolio: {e}")
             return {}
     
+    def _tangency_weights(self, mu: np.ndarray, cov: np.ndarray) -> Optional[np.ndarray]:
+        """Maximum-Sharpe weights w ∝ Σ⁻¹(μ - rf), or None when they are undefined or break the position bounds"""
+        
+        try:
+            raw_weights = np.linalg.solve(cov, mu - self.risk_free_rate)
+        except np.linalg.LinAlgError:
+            return None
+        
+        # A non-positive sum means no fully invested portfolio has a positive excess return
+        total = raw_weights.sum()
+        if not total > 0:
+            return None
+        
+        weights = raw_weights / total
+        if weights.min() < 0 or weights.max() > self.max_position_size:
+            return None
+        return weights
+    
     def calculate_position_size(
         self, 
         trade: EnhancedInsiderTrade,
@@ -304,230 +500,205 @@ class RiskManager:
         risk_per_trade: float = 0.02
     ) -> Dict[str, Any]:
         """Calculate optimal position size based on risk management"""
-        
-        position_info = {
-            'recommended_size': 0.0,
-            'max_size': 0.0,
-            'risk_adjusted_size': 0.0,
-            'stop_loss': None,
-            'take_profit': None,
-            'risk_reward_ratio': None
-        }
+        return self.calculate_position_sizes([trade], portfolio_value, risk_per_trade)[0]
+    
+    def calculate_position_sizes(
+        self, 
+        trades: List[EnhancedInsiderTrade],
+        portfolio_value: float,
+        risk_per_trade: float = 0.02
+    ) -> List[Dict[str, Any]]:
+        """Calculate optimal position sizes of many trades at once"""
         
         try:
-            if not trade.current_price:
-                return position_info
-            
-            # Maximum position size based on portfolio rules
-            max_position_value = portfolio_value * self.max_position_size
-            position_info['max_size'] = max_position_value / trade.current_price
-            
-            # Risk-based position sizing
-            if trade.var_1d:
-                # Use VaR for position sizing
-                daily_risk = abs(trade.var_1d)
-                risk_amount = portfolio_value * risk_per_trade
-                shares_by_risk = risk_amount / (daily_risk * trade.current_price)
-                position_info['risk_adjusted_size'] = min(shares_by_risk, position_info['max_size'])
-            else:
-                # Fallback to volatility-based sizing
-                position_info['risk_adjusted_size'] = position_info['max_size'] * 0.5
-            
-            # Kelly Criterion sizing (if we have probability estimates)
-            if trade.probability_up_30d and trade.price_prediction_30d:
-                win_prob = trade.probability_up_30d
-                expected_return = (trade.price_prediction_30d - trade.current_price) / trade.current_price
+            # Trade fields as columns; zero values count as unknown
+            fields = records_to_soa(trades, _POSITION_SIZE_DTYPE)
+            current_price = _nan_if_unset(fields['current_price'])
+            var_1d = _nan_if_unset(fields['var_1d'])
+            win_prob = _nan_if_unset(fields['probability_up_30d'])
+            price_prediction = _nan_if_unset(fields['price_prediction_30d'])
+            fair_value = _nan_if_unset(fields['fair_value'])
+            levels = records_to_soa([t.technical_indicators for t in trades], _PRICE_LEVELS_DTYPE)
+            support = _nan_if_unset(levels['support_1'])
+            resistance = _nan_if_unset(levels['resistance_1'])
+            has_levels = np.array([t.technical_indicators is not None for t in trades], dtype=bool)
+            
+            with np.errstate(invalid='ignore', divide='ignore'):
+                # Maximum position size based on portfolio rules
+                max_size = portfolio_value * self.max_position_size / current_price
                 
-                if expected_return > 0:
-                    # Simplified Kelly formula
-                    kelly_fraction = (win_prob * expected_return - (1 - win_prob)) / expected_return
-                    kelly_fraction = max(0, min(kelly_fraction, 0.25))  # Cap at 25%
-                    kelly_size = (portfolio_value * kelly_fraction) / trade.current_price
-                    position_info['risk_adjusted_size'] = min(position_info['risk_adjusted_size'], kelly_size)
-            
-            # Final recommended size
-            position_info['recommended_size'] = position_info['risk_adjusted_size']
-            
-            # Stop loss and take profit levels
-            if trade.technical_indicators:
-                # Support level as stop loss
-                if trade.technical_indicators.support_1:
-                    position_info['stop_loss'] = trade.technical_indicators.support_1
-                else:
-                    # Default stop loss at 10%
-                    position_info['stop_loss'] = trade.current_price * (1 - settings.STOP_LOSS_PERCENTAGE)
+                # VaR-based sizing, falling back to half the maximum without a VaR
+                shares_by_risk = portfolio_value * risk_per_trade / (np.abs(var_1d) * current_price)
+                risk_adjusted_size = np.where(np.isnan(var_1d), max_size * 0.5, np.minimum(shares_by_risk, max_size))
                 
-                # Resistance level as take profit
-                if trade.technical_indicators.resistance_1:
-                    position_info['take_profit'] = trade.technical_indicators.resistance_1
-                elif trade.fair_value:
-                    position_info['take_profit'] = trade.fair_value
-                else:
-                    # Default take profit at 20%
-                    position_info['take_profit'] = trade.current_price * (1 + settings.TAKE_PROFIT_PERCENTAGE)
-            
-            # Risk-reward ratio
-            if position_info['stop_loss'] and position_info['take_profit']:
-                risk = trade.current_price - position_info['stop_loss']
-                reward = position_info['take_profit'] - trade.current_price
-                if risk > 0:
-                    position_info['risk_reward_ratio'] = reward / risk
-            
-            logger.debug(f"Position sizing calculated for {trade.ticker}")
+                # Simplified Kelly cap (at most 25%) for trades with a positive expected return
+                expected_return = (price_prediction - current_price) / current_price
+                kelly_fraction = np.clip((win_prob * expected_return - (1 - win_prob)) / expected_return, 0, 0.25)
+                kelly_size = portfolio_value * kelly_fraction / current_price
+                use_kelly = (expected_return > 0) & ~np.isnan(win_prob)
+                risk_adjusted_size = np.where(use_kelly, np.minimum(risk_adjusted_size, kelly_size), risk_adjusted_size)
+                
+                # Support as stop loss and resistance (or fair value) as take profit, with default percentages
+                stop_loss = np.where(np.isnan(support), current_price * (1 - settings.STOP_LOSS_PERCENTAGE), support)
+                take_profit = np.where(
+                    np.isnan(resistance),
+                    np.where(np.isnan(fair_value), current_price * (1 + settings.TAKE_PROFIT_PERCENTAGE), fair_value),
+                    resistance
+                )
+                
+                # Risk-reward ratio
+                risk = current_price - stop_loss
+                risk_reward_ratio = (take_profit - current_price) / risk
+                has_ratio = has_levels & (risk > 0)
+            
+            positions = []
+            for priced, levels_known, ratio_known, max_shares, size, stop, target, ratio in zip(
+                (~np.isnan(current_price)).tolist(), has_levels.tolist(), has_ratio.tolist(),
+                max_size.tolist(), risk_adjusted_size.tolist(),
+                stop_loss.tolist(), take_profit.tolist(), risk_reward_ratio.tolist()
+            ):
+                position_info = dict(_EMPTY_POSITION_INFO)
+                if priced:
+                    position_info['max_size'] = max_shares
+                    position_info['risk_adjusted_size'] = size
+                    position_info['recommended_size'] = size
+                    if levels_known:
+                        position_info['stop_loss'] = stop
+                        position_info['take_profit'] = target
+                    if ratio_known:
+                        position_info['risk_reward_ratio'] = ratio
+                positions.append(position_info)
+            
+            logger.debug(f"Position sizing calculated for {len(trades)} trades")
+            return positions
             
         except Exception as e:
-            logger.error(f"Error calculating position size for {trade.ticker}: {e}")
-        
-        return position_info
+            logger.error(f"Error calculating position sizes: {e}")
+            return [dict(_EMPTY_POSITION_INFO) for _ in trades]
     
     def assess_trade_risk(self, trade: EnhancedInsiderTrade) -> Dict[str, Any]:
         """Comprehensive trade risk assessment"""
-        
-        risk_assessment = {
-            'overall_risk': RiskLevel.MODERATE,
-            'risk_score': 5.0,  # 1-10 scale
-            'risk_factors': [],
-            'risk_mitigation': [],
-            'confidence': 0.5
-        }
+        return self.assess_trade_risks([trade])[0]
+    
+    def assess_trade_risks(self, trades: List[EnhancedInsiderTrade]) -> List[Dict[str, Any]]:
+        """Risk level, factors and mitigation strategies of each trade from one factor matrix"""
         
         try:
-            risk_score = 5.0  # Base risk
-            risk_factors = []
-            
-            # Volatility risk
-            if trade.technical_indicators and trade.technical_indicators.atr:
-                atr_ratio = trade.technical_indicators.atr / trade.current_price if trade.current_price else 0
-                if atr_ratio > 0.05:  # 5% ATR
-                    risk_score += 1.5
-                    risk_factors.append("High volatility (ATR > 5%)")
-                elif atr_ratio > 0.03:  # 3% ATR
-                    risk_score += 0.5
-                    risk_factors.append("Moderate volatility")
-            
-            # Fundamental risk
-            if trade.fundamental_data:
-                fund = trade.fundamental_data
-                
-                # P/E risk
-                if fund.pe_ratio and fund.pe_ratio > 50:
-                    risk_score += 1.0
-                    risk_factors.append("Very high P/E ratio")
-                elif fund.pe_ratio and fund.pe_ratio > 30:
-                    risk_score += 0.5
-                    risk_factors.append("High P/E ratio")
-                
-                # Debt risk
-                if fund.debt_to_equity and fund.debt_to_equity > 3:
-                    risk_score += 1.5
-                    risk_factors.append("Very high debt-to-equity")
-                elif fund.debt_to_equity and fund.debt_to_equity > 1.5:
-                    risk_score += 0.5
-                    risk_factors.append("High debt levels")
-                
-                # Profitability risk
-                if fund.net_margin and fund.net_margin < 0:
-                    risk_score += 2.0
-                    risk_factors.append("Negative profit margins")
-                elif fund.roe and fund.roe < 0:
-                    risk_score += 1.5
-                    risk_factors.append("Negative return on equity")
-            
-            # Market cap risk
-            if trade.market_cap:
-                if trade.market_cap < 300e6:  # < $300M
-                    risk_score += 2.0
-                    risk_factors.append("Micro-cap stock (high volatility)")
-                elif trade.market_cap < 2e9:  # < $2B
-                    risk_score += 1.0
-                    risk_factors.append("Small-cap stock (moderate volatility)")
+            fired = self._risk_factor_matrix(trades)
+            risk_scores = 5.0 + fired @ _RISK_FACTOR_WEIGHTS  # Base risk plus every factor's weight
+            risk_codes = np.searchsorted(_RISK_SCORE_BOUNDS, risk_scores)
+            
+            # Union of the fired factors' flags per trade
+            risk_flags = np.bitwise_or.reduce(np.where(fired, _RISK_FACTOR_FLAGS, 0), axis=1)
+            
+            # Human-readable factors, visiting only the factors that fired (row-major, so in report order)
+            risk_factors = [[] for _ in trades]
+            rows, factors = np.nonzero(fired)
+            for row, factor in zip(rows.tolist(), factors.tolist()):
+                text = _RISK_FACTORS[factor][0]
+                if factor == RISK_FACTOR_SECTOR:
+                    text = text.format(sector=trades[row].sector)
+                risk_factors[row].append(text)
             
-            # Sector risk
-            high_risk_sectors = ['Technology', 'Biotechnology', 'Energy', 'Materials']
-            if trade.sector and str(trade.sector) in high_risk_sectors:
-                risk_score += 0.5
-                risk_factors.append(f"High-risk sector: {trade.sector}")
-            
-            # Technical risk
-            if trade.technical_indicators:
-                tech = trade.technical_indicators
+            # Confidence in risk assessment
+            data_quality_scores = (
+                0.3 * np.array([t.fundamental_data is not None for t in trades])
+                + 0.3 * np.array([t.technical_indicators is not None for t in trades])
+                + 0.2 * np.array([t.sentiment_data is not None for t in trades])
+                + 0.2 * np.array([bool(t.market_cap) for t in trades])
+            )
+            
+            assessments = []
+            for code, risk_score, flags, factors, confidence in zip(
+                risk_codes.tolist(), risk_scores.tolist(), risk_flags.tolist(), risk_factors, data_quality_scores.tolist()
+            ):
+                # Risk mitigation suggestions
+                mitigation = []
+                if risk_score > 6:
+                    mitigation.append("Consider smaller position size")
+                    mitigation.append("Use tight stop-loss orders")
+                    mitigation.append("Monitor closely for exit signals")
                 
-                # Overbought conditions
-                if tech.rsi_14 and tech.rsi_14 > 80:
-                    risk_score += 1.0
-                    risk_factors.append("Extremely overbought (RSI > 80)")
-                elif tech.rsi_14 and tech.rsi_14 > 70:
-                    risk_score += 0.5
-                    risk_factors.append("Overbought conditions")
+                if flags & RISK_FLAG_HIGH_VOLATILITY:
+                    mitigation.append("Use volatility-adjusted position sizing")
                 
-                # Trend risk
-                if tech.sma_20 and tech.sma_50 and trade.current_price:
-                    if trade.current_price < tech.sma_50:
-                        risk_score += 0.5
-                        risk_factors.append("Price below long-term trend")
-            
-            # Insider trade risk
-            if trade.trade_type.value == 'sale':
-                risk_score += 1.0
-                risk_factors.append("Insider selling signal")
-            
-            # Sentiment risk
-            if trade.sentiment_data and trade.sentiment_data.overall_sentiment:
-                if trade.sentiment_data.overall_sentiment < -0.5:
-                    risk_score += 1.0
-                    risk_factors.append("Very negative sentiment")
-                elif trade.sentiment_data.overall_sentiment < -0.2:
-                    risk_score += 0.5
-                    risk_factors.append("Negative sentiment")
-            
-            # Liquidity risk (simplified)
-            if trade.volume and trade.market_cap:
-                daily_turnover = (trade.volume * trade.current_price) / trade.market_cap if trade.current_price else 0
-                if daily_turnover < 0.001:  # < 0.1% daily turnover
-                    risk_score += 1.0
-                    risk_factors.append("Low liquidity")
-            
-            # Convert risk score to risk level
-            if risk_score <= 3:
-                risk_assessment['overall_risk'] = RiskLevel.LOW
-            elif risk_score <= 4:
-                risk_assessment['overall_risk'] = RiskLevel.MODERATE
-            elif risk_score <= 6:
-                risk_assessment['overall_risk'] = RiskLevel.HIGH
-            else:
-                risk_assessment['overall_risk'] = RiskLevel.VERY_HIGH
-            
-            risk_assessment['risk_score'] = min(10, max(1, risk_score))
-            risk_assessment['risk_factors'] = risk_factors
+                if flags & RISK_FLAG_NEGATIVE:
+                    mitigation.append("Wait for fundamental improvement")
+                
+                assessments.append({
+                    'overall_risk': _RISK_LEVELS[code],
+                    'risk_score': min(10, max(1, risk_score)),
+                    'risk_factors': factors,
+                    'risk_mitigation': mitigation,
+                    'confidence': confidence
+                })
             
-            # Risk mitigation suggestions
-            mitigation = []
-            if risk_score > 6:
-                mitigation.append("Consider smaller position size")
-                mitigation.append("Use tight stop-loss orders")
-                mitigation.append("Monitor closely for exit signals")
+            return assessments
             
-            if 'High volatility' in str(risk_factors):
-                mitigation.append("Use volatility-adjusted position sizing")
+        except Exception as e:
+            logger.error(f"Error assessing trade risk: {e}")
+            return [
+                {
+                    'overall_risk': RiskLevel.MODERATE,
+                    'risk_score': 5.0,  # 1-10 scale
+                    'risk_factors': [],
+                    'risk_mitigation': [],
+                    'confidence': 0.5
+                }
+                for _ in trades
+            ]
+    
+    def _risk_factor_matrix(self, trades: List[EnhancedInsiderTrade]) -> np.ndarray:
+        """(N, len(_RISK_FACTORS)) float matrix, 1.0 where a trade shows that risk factor"""
+        
+        # Trade fields as columns; zero prices, caps and volumes count as unknown
+        fields = records_to_soa(trades, _TRADE_RISK_DTYPE)
+        current_price = _nan_if_unset(fields['current_price'])
+        market_cap = _nan_if_unset(fields['market_cap'])
+        volume = _nan_if_unset(fields['volume'])
+        fund = records_to_soa([t.fundamental_data for t in trades], _FUND_RISK_DTYPE)
+        tech = records_to_soa([t.technical_indicators for t in trades], _TECH_RISK_DTYPE)
+        sentiment = records_to_soa([t.sentiment_data for t in trades], _SENTIMENT_RISK_DTYPE)['overall_sentiment']
+        
+        fired = np.zeros((len(trades), len(_RISK_FACTORS)), dtype=bool)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Volatility risk (5% / 3% ATR)
+            atr_ratio = _nan_if_unset(tech['atr']) / current_price
+            fired[:, 0] = atr_ratio > 0.05
+            fired[:, 1] = ~fired[:, 0] & (atr_ratio > 0.03)
+            
+            # Fundamental risk: P/E, debt, profitability
+            fired[:, 2] = fund['pe_ratio'] > 50
+            fired[:, 3] = ~fired[:, 2] & (fund['pe_ratio'] > 30)
+            fired[:, 4] = fund['debt_to_equity'] > 3
+            fired[:, 5] = ~fired[:, 4] & (fund['debt_to_equity'] > 1.5)
+            fired[:, 6] = fund['net_margin'] < 0
+            fired[:, 7] = ~fired[:, 6] & (fund['roe'] < 0)
+            
+            # Market cap risk (< $300M / < $2B)
+            fired[:, 8] = market_cap < 300e6
+            fired[:, 9] = ~fired[:, 8] & (market_cap < 2e9)
             
-            if 'Negative' in str(risk_factors):
-                mitigation.append("Wait for fundamental improvement")
+            # Sector risk
+            fired[:, RISK_FACTOR_SECTOR] = [bool(t.sector) and str(t.sector) in _HIGH_RISK_SECTORS for t in trades]
             
-            risk_assessment['risk_mitigation'] = mitigation
+            # Technical risk: overbought conditions, price below the long-term trend
+            fired[:, 11] = tech['rsi_14'] > 80
+            fired[:, 12] = ~fired[:, 11] & (tech['rsi_14'] > 70)
+            fired[:, 13] = ~np.isnan(_nan_if_unset(tech['sma_20'])) & (current_price < _nan_if_unset(tech['sma_50']))
             
-            # Confidence in risk assessment
-            data_quality_score = 0
-            if trade.fundamental_data: data_quality_score += 0.3
-            if trade.technical_indicators: data_quality_score += 0.3
-            if trade.sentiment_data: data_quality_score += 0.2
-            if trade.market_cap: data_quality_score += 0.2
+            # Insider trade risk
+            fired[:, 14] = [t.trade_type.value == 'sale' for t in trades]
             
-            risk_assessment['confidence'] = data_quality_score
+            # Sentiment risk
+            fired[:, 15] = sentiment < -0.5
+            fired[:, 16] = ~fired[:, 15] & (sentiment < -0.2)
             
-        except Exception as e:
-            logger.error(f"Error assessing trade risk: {e}")
+            # Liquidity risk (< 0.1% daily turnover; an unknown price counts as no turnover)
+            daily_turnover = np.where(np.isnan(current_price), 0.0, volume * current_price / market_cap)
+            fired[:, 17] = ~np.isnan(volume) & ~np.isnan(market_cap) & (daily_turnover < 0.001)
         
-        return risk_assessment
+        return fired.astype(np.float64)
     
     def generate_risk_report(
         self, 
@@ -548,12 +719,13 @@ class RiskManager:
         }
         
         try:
+            self._returns_cache = {}
+            
             # Portfolio-level risk
             report['portfolio_risk'] = self.calculate_portfolio_risk(portfolio, price_data)
             
             # Individual trade risks
-            for trade in trades:
-                risk_assessment = self.assess_trade_risk(trade)
+            for trade, risk_assessment in zip(trades, self.assess_trade_risks(trades)):
                 report['individual_risks'][trade.ticker] = risk_assessment
             
             # Correlation analysis
@@ -573,6 +745,9 @@ class RiskManager:
             
         except Exception as e:
             logger.error(f"Error generating risk report: {e}")
+        finally:
+            self._returns_cache = None
+            self._last_stats = None
         
         return report
     
@@ -594,38 +769,50 @@ class RiskManager:
             returns_data = {}
             for ticker in portfolio.positions.keys():
                 if ticker in price_data and not price_data[ticker].empty:
-                    returns = price_data[ticker]['close'].pct_change().dropna()
-                    returns_data[ticker] = returns
+                    returns = pd.Series(self._returns_of(ticker, price_data[ticker]), index=price_data[ticker].index)
+                    returns_data[ticker] = returns.dropna()
             
             if len(returns_data) > 1:
                 returns_df = pd.DataFrame(returns_data)
-                correlation_matrix = returns_df.corr()
+                returns_matrix = returns_df.to_numpy(dtype=np.float64)
+                
+                # Positions sharing one calendar get covariance and correlation from a single np.cov pass
+                # (scaled like np.corrcoef); date gaps still need pandas' pairwise-complete observations
+                if np.isnan(returns_matrix).any():
+                    covariance = returns_df.cov().to_numpy()
+                    correlation_matrix = returns_df.corr()
+                else:
+                    # Constant or unbounded returns give NaN correlations, as in pandas
+                    with np.errstate(divide='ignore', invalid='ignore'):
+                        covariance = np.cov(returns_matrix, rowvar=False)
+                        volatilities = np.sqrt(np.diag(covariance))
+                        correlation = np.clip(covariance / volatilities[:, None] / volatilities[None, :], -1.0, 1.0)
+                    correlation_matrix = pd.DataFrame(correlation, index=returns_df.columns, columns=returns_df.columns)
                 
                 # Convert to dict for JSON serialization
                 correlation_analysis['correlation_matrix'] = correlation_matrix.to_dict()
                 
-                # Find high correlations
-                high_corr_pairs = []
-                for i in range(len(correlation_matrix.columns)):
-                    for j in range(i+1, len(correlation_matrix.columns)):
-                        corr = correlation_matrix.iloc[i, j]
-                        if abs(corr) > self.max_correlation:
-                            high_corr_pairs.append({
-                                'ticker1': correlation_matrix.columns[i],
-                                'ticker2': correlation_matrix.columns[j],
-                                'correlation': corr
-                            })
+                # Find high correlations among the pairs above the diagonal
+                columns = correlation_matrix.columns
+                upper_i, upper_j = np.triu_indices(len(columns), k=1)
+                upper_corr = correlation_matrix.to_numpy()[upper_i, upper_j]
+                high = np.abs(upper_corr) > self.max_correlation
+                high_corr_pairs = [
+                    {'ticker1': columns[i], 'ticker2': columns[j], 'correlation': corr}
+                    for i, j, corr in zip(upper_i[high].tolist(), upper_j[high].tolist(), upper_corr[high].tolist())
+                ]
                 
                 correlation_analysis['high_correlations'] = high_corr_pairs
                 
-                # Diversification ratio
-                weights = np.array(list(portfolio.positions.values()))
+                # Diversification ratio: weighted average volatility over portfolio volatility
+                # (1 for perfectly correlated positions, higher the more they offset each other)
+                weights = np.array([portfolio.positions[ticker] for ticker in returns_df.columns], dtype=np.float64)
                 weights = weights / weights.sum()
                 
-                portfolio_variance = np.dot(weights.T, np.dot(correlation_matrix.values, weights))
-                weighted_avg_variance = np.sum(weights**2)
-                
-                correlation_analysis['diversification_ratio'] = 1 - (portfolio_variance / weighted_avg_variance)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    weighted_volatility = np.dot(weights, np.sqrt(np.diag(covariance)))
+                    portfolio_volatility = np.sqrt(np.dot(weights, np.dot(covariance, weights)))
+                    correlation_analysis['diversification_ratio'] = float(weighted_volatility / portfolio_volatility)
         
         except Exception as e:
             logger.error(f"Error analyzing correlations: {e}")
@@ -647,7 +834,13 @@ class RiskManager:
         }
         
         try:
-            portfolio_returns = self._calculate_portfolio_returns(portfolio, price_data)
+            # Reuse the report's portfolio return stats when they were computed for these same inputs
+            report_stats = self._last_stats
+            if report_stats is not None and report_stats['portfolio'] is portfolio and report_stats['price_data'] is price_data:
+                portfolio_returns = report_stats['returns']
+            else:
+                report_stats = None
+                portfolio_returns = self._calculate_portfolio_returns(portfolio, price_data)
             
             if portfolio_returns is None:
                 return stress_results
@@ -665,9 +858,14 @@ class RiskManager:
             }
             
             # Volatility spike scenario (3x normal volatility)
-            normal_vol = portfolio_returns.std()
+            if report_stats is not None:
+                normal_vol = report_stats['std']
+                fifth_percentile = report_stats['percentile_5']
+            else:
+                normal_vol = portfolio_returns.std()
+                fifth_percentile, _, _ = _partition_percentile(portfolio_returns, 5)
             stressed_vol = normal_vol * 3
-            vol_var = np.percentile(portfolio_returns, 5) * 3  # 3x worse 5th percentile
+            vol_var = fifth_percentile * 3  # 3x worse 5th percentile
             vol_loss = current_value * vol_var
             stress_results['volatility_spike_scenario'] = {
                 'scenario': '3x volatility spike',
@@ -711,24 +909,35 @@ class RiskManager:
         }
         
         try:
-            # Calculate individual position risks
-            total_allocated_risk = 0.0
-            
-            for ticker, position_value in portfolio.positions.items():
+            # Positions with enough history
+            tickers = []
+            position_returns = []
+            for ticker in portfolio.positions.keys():
                 if ticker in price_data and not price_data[ticker].empty:
-                    returns = price_data[ticker]['close'].pct_change().dropna()
+                    returns = self._returns_of(ticker, price_data[ticker])
+                    returns = returns[~np.isnan(returns)]
                     if len(returns) > 20:
-                        position_var = np.percentile(returns, 5)  # 95% VaR
-                        weight = position_value / portfolio.total_value
-                        position_risk = abs(position_var) * weight
-                        
-                        risk_budget['allocated_risk'][ticker] = {
-                            'position_var': position_var,
-                            'weight': weight,
-                            'risk_contribution': position_risk
-                        }
-                        
-                        total_allocated_risk += position_risk
+                        tickers.append(ticker)
+                        position_returns.append(returns)
+            
+            # Individual position risks, all 95% VaRs from one sort
+            total_allocated_risk = 0.0
+            if tickers:
+                position_vars = _ragged_percentiles(position_returns, 5)
+                weights = np.array([portfolio.positions[ticker] / portfolio.total_value for ticker in tickers])
+                position_risks = np.abs(position_vars) * weights
+                
+                risk_budget['allocated_risk'] = {
+                    ticker: {
+                        'position_var': position_var,
+                        'weight': weight,
+                        'risk_contribution': position_risk
+                    }
+                    for ticker, position_var, weight, position_risk in zip(
+                        tickers, position_vars.tolist(), weights.tolist(), position_risks.tolist()
+                    )
+                }
+                total_allocated_risk = sum(position_risks.tolist())
             
             risk_budget['remaining_budget'] = max(0, risk_budget['total_risk_budget'] - total_allocated_risk)
             risk_budget['risk_utilization'] = total_allocated_risk / risk_budget['total_risk_budget']
@@ -764,7 +973,7 @@ class RiskManager:
                 recommendations.append(f"High correlations detected between {len(high_correlations)} pairs - consider diversification")
             
             diversification_ratio = correlation_analysis.get('diversification_ratio', 0)
-            if diversification_ratio < 0.3:
+            if diversification_ratio < 1.2:  # e.g. many positions with pairwise correlation near 0.7
                 recommendations.append("Low diversification ratio - add uncorrelated assets")
             
             # Individual position recommendations
@@ -1,17 +1,89 @@
 import pandas as pd
 import numpy as np
-from typing import Dict, Any, Optional
-from ta.trend import SMAIndicator, EMAIndicator, MACD
-from ta.momentum import RSIIndicator
-from ta.volatility import BollingerBands
+from collections import deque
+from typing import Dict, Any, List, Optional
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
 from models.trade_models import TechnicalAnalysis, Recommendation
 from utils.logging_config import logger
 
+# Compiled EMA/RSI recursions when numba is available, otherwise the pandas/numpy path below
+try:
+    from analysis._ta_kernels import ewm_mean, rsi_averages
+except ImportError:
+    ewm_mean = rsi_averages = None
+
+def _ema_columns(values: np.ndarray, span: int) -> np.ndarray:
+    """adjust=False EMA down every column (seeded with the first row) as one IIR filter pass"""
+    alpha = 2.0 / (span + 1.0)
+    return lfilter([alpha], [1.0, alpha - 1.0], values, axis=0, zi=(1.0 - alpha) * values[:1])[0]
+
+class _TAState:
+    """Indicator state of one ticker after its latest bar, advanced by one bar in O(1)"""
+    
+    # Smoothing factors of the EMA-50, the MACD EMAs and the Wilder RSI-14
+    ALPHA_50 = 2.0 / 51.0
+    ALPHA_12 = 2.0 / 13.0
+    ALPHA_26 = 2.0 / 27.0
+    ALPHA_9 = 2.0 / 10.0
+    ALPHA_RSI = 1.0 / 14.0
+    
+    def __init__(self, price_data: pd.DataFrame, ema50: float, rsi_averages: tuple, macd_emas: tuple, extremes: tuple):
+        # Last 20 bars (SMA/Bollinger window and price momentum) and the 10 most recent
+        # 20-bar extremes averaged into support and resistance
+        self.closes = deque(price_data['close'].to_numpy(dtype=np.float64)[-20:].tolist(), maxlen=20)
+        self.highs = deque(price_data['high'].to_numpy(dtype=np.float64)[-20:].tolist(), maxlen=20)
+        self.lows = deque(price_data['low'].to_numpy(dtype=np.float64)[-20:].tolist(), maxlen=20)
+        self.window_highs = deque(extremes[0].tolist(), maxlen=10)
+        self.window_lows = deque(extremes[1].tolist(), maxlen=10)
+        
+        # Mean and sum of squared deviations of the closes in the window
+        window = np.array(self.closes)
+        self.mean = float(window.mean())
+        self.m2 = float(np.sum((window - self.mean) ** 2))
+        
+        # Recursive indicators
+        self.ema50 = ema50
+        self.average_gain, self.average_loss = rsi_averages
+        self.ema12, self.ema26, self.macd_signal = macd_emas
+    
+    def advance(self, close: float, high: float, low: float):
+        """Fold one new bar into every indicator"""
+        change = close - self.closes[-1]
+        
+        # Sliding-window Welford update: the oldest close leaves as the new one enters
+        oldest = self.closes[0]
+        self.closes.append(close)
+        previous_mean = self.mean
+        self.mean += (close - oldest) / len(self.closes)
+        self.m2 += (close - oldest) * (close - self.mean + oldest - previous_mean)
+        
+        # EMAs, the same adjust=False recursions pandas ewm runs
+        self.ema50 = (1.0 - self.ALPHA_50) * self.ema50 + self.ALPHA_50 * close
+        self.ema12 = (1.0 - self.ALPHA_12) * self.ema12 + self.ALPHA_12 * close
+        self.ema26 = (1.0 - self.ALPHA_26) * self.ema26 + self.ALPHA_26 * close
+        self.macd_signal = (1.0 - self.ALPHA_9) * self.macd_signal + self.ALPHA_9 * (self.ema12 - self.ema26)
+        
+        # Wilder-smoothed gain and loss
+        gain = change if change > 0 else 0.0
+        loss = -change if change < 0 else 0.0
+        self.average_gain = (1.0 - self.ALPHA_RSI) * self.average_gain + self.ALPHA_RSI * gain
+        self.average_loss = (1.0 - self.ALPHA_RSI) * self.average_loss + self.ALPHA_RSI * loss
+        
+        # Extremes of the newest 20-bar window
+        self.highs.append(high)
+        self.lows.append(low)
+        self.window_highs.append(max(self.highs))
+        self.window_lows.append(min(self.lows))
+
 class TechnicalAnalyzer:
     """Technical analysis with multiple indicators"""
     
     def __init__(self):
         self.min_data_points = 50
+        
+        # Per-ticker indicator state seeded by analyze_stock and advanced by update
+        self._state: Dict[str, _TAState] = {}
     
     def analyze_stock(self, ticker: str, price_data: pd.DataFrame) -> Optional[TechnicalAnalysis]:
         """Perform comprehensive technical analysis"""
@@ -34,12 +106,12 @@ class TechnicalAnalyzer:
             analysis.ema50 = self._calculate_ema(price_data['close'], 50)
             
             # RSI
-            analysis.rsi = self._calculate_rsi(price_data['close'])
+            rsi_averages = self._calculate_rsi_averages(price_data['close'])
+            analysis.rsi = self._rsi_from_averages(rsi_averages)
             
             # MACD
-            macd_line, macd_signal = self._calculate_macd(price_data['close'])
-            analysis.macd = macd_line
-            analysis.macd_signal = macd_signal
+            macd_emas = self._calculate_macd_emas(price_data['close'])
+            analysis.macd, analysis.macd_signal = self._macd_from_emas(macd_emas)
             
             # Bollinger Bands
             bb_upper, bb_lower = self._calculate_bollinger_bands(price_data['close'])
@@ -47,13 +119,16 @@ class TechnicalAnalyzer:
             analysis.bb_lower = bb_lower
             
             # Support and Resistance
-            analysis.support, analysis.resistance = self._calculate_support_resistance(
-                price_data['high'], price_data['low']
-            )
+            extremes = self._calculate_window_extremes(price_data['high'], price_data['low'])
+            analysis.support, analysis.resistance = self._levels_from_extremes(extremes)
             
             # Trend Analysis
             analysis.trend = self._determine_trend(analysis.sma20, analysis.ema50, price_data['close'])
             
+            # Seed the incremental state once every recursive indicator is defined
+            if analysis.ema50 is not None and rsi_averages is not None and macd_emas is not None and extremes is not None:
+                self._state[ticker] = _TAState(price_data, analysis.ema50, rsi_averages, macd_emas, extremes)
+            
             logger.debug(f"Technical analysis completed for {ticker}")
             return analysis
             
@@ -61,12 +136,127 @@ class TechnicalAnalyzer:
             logger.error(f"Technical analysis failed for {ticker}: {e}")
             return None
     
+    def update(self, ticker: str, new_bar: Dict[str, float]) -> Optional[TechnicalAnalysis]:
+        """Advance the analysis of a ticker by one bar (close, high, low) without recomputing its history
+        
+        Every indicator is updated in O(1) from the state analyze_stock seeded, so a
+        cold ticker must be analyzed once first.
+        """
+        
+        state = self._state.get(ticker)
+        if state is None:
+            logger.warning(f"No technical analysis state for {ticker}; run analyze_stock first")
+            return None
+        
+        try:
+            state.advance(float(new_bar['close']), float(new_bar['high']), float(new_bar['low']))
+            
+            deviation = np.sqrt(max(state.m2, 0.0) / len(state.closes))
+            analysis = TechnicalAnalysis(
+                ticker=ticker,
+                sma20=state.mean,
+                ema50=state.ema50,
+                rsi=self._rsi_from_averages((state.average_gain, state.average_loss)),
+                macd=state.ema12 - state.ema26,
+                macd_signal=state.macd_signal,
+                bb_upper=state.mean + 2 * deviation,
+                bb_lower=state.mean - 2 * deviation,
+                support=sum(state.window_lows) / len(state.window_lows),
+                resistance=sum(state.window_highs) / len(state.window_highs)
+            )
+            analysis.trend = self._determine_trend(analysis.sma20, analysis.ema50, state.closes)
+            
+            return analysis
+            
+        except Exception as e:
+            logger.error(f"Technical analysis update failed for {ticker}: {e}")
+            return None
+    
+    def analyze_batch(
+        self, 
+        tickers: List[str], 
+        closes: np.ndarray,
+        highs: Optional[np.ndarray] = None,
+        lows: Optional[np.ndarray] = None
+    ) -> List[Optional[TechnicalAnalysis]]:
+        """Technical analysis of many tickers from (T, N) matrices of aligned bars, one column per ticker
+        
+        Every indicator is reduced along the time axis for all columns at once. Support and
+        resistance need highs and lows; columns with missing closes are left to analyze_stock
+        and come back as None.
+        """
+        
+        closes = np.asarray(closes, dtype=np.float64)
+        if closes.ndim != 2 or len(closes) < self.min_data_points:
+            logger.warning("Insufficient data for batch technical analysis")
+            return [None] * len(tickers)
+        
+        try:
+            complete = ~np.isnan(closes).any(axis=0)
+            if not complete.all():
+                logger.warning(f"Skipping {int((~complete).sum())} tickers with missing closes in batch technical analysis")
+            
+            # SMA and Bollinger Bands from the last 20 closes
+            window = closes[-20:]
+            sma20 = window.mean(axis=0)
+            deviation = window.std(axis=0)
+            
+            # EMA and MACD; the signal line starts where the slow EMA has 26 bars
+            ema50 = _ema_columns(closes, 50)[-1]
+            macd_line = _ema_columns(closes, 12) - _ema_columns(closes, 26)
+            macd_signal = _ema_columns(macd_line[25:], 9)[-1]
+            
+            # RSI from Wilder-smoothed gains and losses, each as one weighted sum over time
+            changes = np.diff(closes, axis=0)
+            decay = (1.0 / 14.0) * (1.0 - 1.0 / 14.0) ** np.arange(len(changes) - 1, -1, -1)
+            average_gain = decay @ np.maximum(changes, 0.0)
+            average_loss = decay @ np.maximum(-changes, 0.0)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi = np.where(average_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + average_gain / average_loss))
+            
+            # Support and resistance: mean extremes of the last 10 rolling 20-bar windows
+            support = resistance = np.full(closes.shape[1], np.nan)
+            if highs is not None and lows is not None:
+                support = sliding_window_view(np.asarray(lows, dtype=np.float64)[-29:], 20, axis=0).min(axis=-1).mean(axis=0)
+                resistance = sliding_window_view(np.asarray(highs, dtype=np.float64)[-29:], 20, axis=0).max(axis=-1).mean(axis=0)
+            
+            analyses = []
+            for i, (ticker, sma, ema, rsi_value, macd, signal, dev, low_level, high_level) in enumerate(zip(
+                tickers, sma20.tolist(), ema50.tolist(), rsi.tolist(), macd_line[-1].tolist(),
+                macd_signal.tolist(), deviation.tolist(), support.tolist(), resistance.tolist()
+            )):
+                if not complete[i]:
+                    analyses.append(None)
+                    continue
+                
+                analysis = TechnicalAnalysis(
+                    ticker=ticker,
+                    sma20=sma,
+                    ema50=ema,
+                    rsi=rsi_value,
+                    macd=macd,
+                    macd_signal=signal,
+                    bb_upper=sma + 2 * dev,
+                    bb_lower=sma - 2 * dev,
+                    support=None if np.isnan(low_level) else low_level,
+                    resistance=None if np.isnan(high_level) else high_level
+                )
+                analysis.trend = self._determine_trend(sma, ema, closes[-5:, i])
+                analyses.append(analysis)
+            
+            logger.debug(f"Batch technical analysis completed for {len(tickers)} tickers")
+            return analyses
+            
+        except Exception as e:
+            logger.error(f"Batch technical analysis failed: {e}")
+            return [None] * len(tickers)
+    
     def _calculate_sma(self, prices: pd.Series, window: int) -> Optional[float]:
         """Calculate Simple Moving Average"""
         try:
             if len(prices) >= window:
-                sma = SMAIndicator(prices, window=window).sma_indicator()
-                return float(sma.iloc[-1]) if not sma.empty else None
+                # Only the last window is averaged
+                return float(prices.to_numpy(dtype=np.float64)[-window:].mean())
         except Exception as e:
             logger.warning(f"SMA calculation failed: {e}")
         return None
@@ -75,77 +265,129 @@ class TechnicalAnalyzer:
         """Calculate Exponential Moving Average"""
         try:
             if len(prices) >= window:
-                ema = EMAIndicator(prices, window=window).ema_indicator()
-                return float(ema.iloc[-1]) if not ema.empty else None
+                if ewm_mean is not None:
+                    return float(ewm_mean(prices.to_numpy(dtype=np.float64), 2.0 / (window + 1.0), window)[-1])
+                ema = prices.ewm(span=window, min_periods=window, adjust=False).mean()
+                return float(ema.iat[-1])
         except Exception as e:
             logger.warning(f"EMA calculation failed: {e}")
         return None
     
     def _calculate_rsi(self, prices: pd.Series, window: int = 14) -> Optional[float]:
         """Calculate Relative Strength Index"""
+        return self._rsi_from_averages(self._calculate_rsi_averages(prices, window))
+    
+    def _calculate_rsi_averages(self, prices: pd.Series, window: int = 14) -> Optional[tuple[float, float]]:
+        """Calculate the Wilder-smoothed average gain and loss after the last bar"""
         try:
             if len(prices) >= window + 1:
-                rsi = RSIIndicator(prices, window=window).rsi()
-                return float(rsi.iloc[-1]) if not rsi.empty else None
+                if rsi_averages is not None:
+                    average_gain, average_loss = rsi_averages(prices.to_numpy(dtype=np.float64), window)
+                    return float(average_gain), float(average_loss)
+                
+                # Gains and losses per bar (missing changes count as zero)
+                changes = np.diff(prices.to_numpy(dtype=np.float64))
+                gains = np.where(changes > 0, changes, 0.0)
+                losses = np.where(changes < 0, -changes, 0.0)
+                
+                # Final value of the Wilder (alpha = 1 / window) recursion started at zero, as one
+                # weighted sum of the whole history instead of a full smoothed series
+                alpha = 1.0 / window
+                decay = alpha * (1.0 - alpha) ** np.arange(len(changes) - 1, -1, -1)
+                average_gain, average_loss = np.stack([gains, losses]) @ decay
+                
+                return float(average_gain), float(average_loss)
         except Exception as e:
             logger.warning(f"RSI calculation failed: {e}")
         return None
     
+    def _rsi_from_averages(self, averages: Optional[tuple[float, float]]) -> Optional[float]:
+        """RSI from the average gain and loss"""
+        if averages is None:
+            return None
+        average_gain, average_loss = averages
+        if average_loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + average_gain / average_loss)
+    
     def _calculate_macd(self, prices: pd.Series) -> tuple[Optional[float], Optional[float]]:
         """Calculate MACD and Signal line"""
+        return self._macd_from_emas(self._calculate_macd_emas(prices))
+    
+    def _calculate_macd_emas(self, prices: pd.Series) -> Optional[tuple[float, float, float]]:
+        """Calculate the last fast EMA, slow EMA and MACD signal line"""
         try:
             if len(prices) >= 34:  # Need at least 34 periods for MACD
-                macd_indicator = MACD(prices)
-                macd_line = macd_indicator.macd()
-                macd_signal = macd_indicator.macd_signal()
+                if ewm_mean is not None:
+                    values = prices.to_numpy(dtype=np.float64)
+                    ema_fast = ewm_mean(values, 2.0 / 13.0, 12)
+                    ema_slow = ewm_mean(values, 2.0 / 27.0, 26)
+                    macd_signal = ewm_mean(ema_fast - ema_slow, 2.0 / 10.0, 9)
+                    return float(ema_fast[-1]), float(ema_slow[-1]), float(macd_signal[-1])
                 
-                macd_val = float(macd_line.iloc[-1]) if not macd_line.empty else None
-                signal_val = float(macd_signal.iloc[-1]) if not macd_signal.empty else None
+                ema_fast = prices.ewm(span=12, min_periods=12, adjust=False).mean()
+                ema_slow = prices.ewm(span=26, min_periods=26, adjust=False).mean()
+                macd_signal = (ema_fast - ema_slow).ewm(span=9, min_periods=9, adjust=False).mean()
                 
-                return macd_val, signal_val
+                return float(ema_fast.iat[-1]), float(ema_slow.iat[-1]), float(macd_signal.iat[-1])
         except Exception as e:
             logger.warning(f"MACD calculation failed: {e}")
-        return None, None
+        return None
+    
+    def _macd_from_emas(self, emas: Optional[tuple[float, float, float]]) -> tuple[Optional[float], Optional[float]]:
+        """MACD line and signal from the fast EMA, slow EMA and signal line"""
+        if emas is None:
+            return None, None
+        ema_fast, ema_slow, macd_signal = emas
+        return ema_fast - ema_slow, macd_signal
     
     def _calculate_bollinger_bands(self, prices: pd.Series, window: int = 20) -> tuple[Optional[float], Optional[float]]:
         """Calculate Bollinger Bands"""
         try:
             if len(prices) >= window:
-                bb = BollingerBands(prices, window=window)
-                upper = bb.bollinger_hband()
-                lower = bb.bollinger_lband()
-                
-                upper_val = float(upper.iloc[-1]) if not upper.empty else None
-                lower_val = float(lower.iloc[-1]) if not lower.empty else None
+                # Two population standard deviations around the mean of the last window
+                tail = prices.to_numpy(dtype=np.float64)[-window:]
+                middle = tail.mean()
+                deviation = tail.std()
                 
-                return upper_val, lower_val
+                return float(middle + 2 * deviation), float(middle - 2 * deviation)
         except Exception as e:
             logger.warning(f"Bollinger Bands calculation failed: {e}")
         return None, None
     
     def _calculate_support_resistance(self, highs: pd.Series, lows: pd.Series, window: int = 20) -> tuple[Optional[float], Optional[float]]:
         """Calculate support and resistance levels"""
+        return self._levels_from_extremes(self._calculate_window_extremes(highs, lows, window))
+    
+    def _calculate_window_extremes(self, highs: pd.Series, lows: pd.Series, window: int = 20) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """Calculate the highest high and lowest low of the last 10 rolling windows"""
         try:
             if len(highs) >= window and len(lows) >= window:
-                # Use rolling windows to find recent support/resistance
-                recent_highs = highs.rolling(window=window).max().iloc[-10:]
-                recent_lows = lows.rolling(window=window).min().iloc[-10:]
-                
-                resistance = float(recent_highs.mean()) if not recent_highs.empty else None
-                support = float(recent_lows.mean()) if not recent_lows.empty else None
+                # The last 10 windows only reach back window + 9 bars, so only that tail is rolled
+                tail = window + 9
+                recent_highs = highs.iloc[-tail:].rolling(window=window).max().iloc[-10:]
+                recent_lows = lows.iloc[-tail:].rolling(window=window).min().iloc[-10:]
                 
-                return support, resistance
+                return recent_highs.to_numpy(dtype=np.float64), recent_lows.to_numpy(dtype=np.float64)
         except Exception as e:
             logger.warning(f"Support/Resistance calculation failed: {e}")
-        return None, None
+        return None
+    
+    def _levels_from_extremes(self, extremes: Optional[tuple[np.ndarray, np.ndarray]]) -> tuple[Optional[float], Optional[float]]:
+        """Support and resistance as the mean window low and high (windows not yet full are skipped)"""
+        if extremes is None:
+            return None, None
+        recent_highs, recent_lows = extremes
+        return float(pd.Series(recent_lows).mean()), float(pd.Series(recent_highs).mean())
     
-    def _determine_trend(self, sma20: Optional[float], ema50: Optional[float], prices: pd.Series) -> str:
-        """Determine overall trend"""
+    def _determine_trend(self, sma20: Optional[float], ema50: Optional[float], prices) -> str:
+        """Determine overall trend from the moving averages and a price sequence"""
         try:
-            if sma20 is None or ema50 is None or prices.empty:
+            prices = np.asarray(prices, dtype=np.float64)
+            if sma20 is None or ema50 is None or prices.size == 0:
                 return "Neutral"
             
-            current_price = float(prices.iloc[-1])
+            current_price = float(prices[-1])
             
             # Multiple criteria for trend determination
             trend_signals = []
@@ -164,7 +406,7 @@ class TechnicalAnalyzer:
             
             # Price momentum (last 5 days)
             if len(prices) >= 5:
-                recent_change = (prices.iloc[-1] - prices.iloc[-5]) / prices.iloc[-5]
+                recent_change = (prices[-1] - prices[-5]) / prices[-5]
                 if recent_change > 0.02:  # 2% increase
                     trend_signals.append("bullish")
                 elif recent_change < -0.02:  # 2% decrease
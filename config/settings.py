@@ -34,11 +34,15 @@ class Settings:
     # Rate limiting
     REQUESTS_PER_MINUTE: int = int(os.getenv("REQUESTS_PER_MINUTE", "60"))
     MAX_CONCURRENT_REQUESTS: int = int(os.getenv("MAX_CONCURRENT_REQUESTS", "10"))
+    ALPHA_VANTAGE_CALLS_PER_MINUTE: int = int(os.getenv("ALPHA_VANTAGE_CALLS_PER_MINUTE", "5"))  # free tier; premium keys allow more
     
     # AI/ML settings
     ML_MODEL_UPDATE_INTERVAL: int = int(os.getenv("ML_MODEL_UPDATE_INTERVAL", "24"))  # hours
     SENTIMENT_ANALYSIS_ENABLED: bool = os.getenv("SENTIMENT_ANALYSIS_ENABLED", "true").lower() == "true"
     AI_PREDICTIONS_ENABLED: bool = os.getenv("AI_PREDICTIONS_ENABLED", "true").lower() == "true"
+    TENSORFLOW_ENABLED: bool = os.getenv("INSIDER_DISABLE_TF", "0") != "1"
+    ANALYSIS_N_JOBS: int = int(os.getenv("ANALYSIS_N_JOBS", "1"))  # worker processes for batch analysis
+    ML_GPU_ENABLED: bool = os.getenv("ML_GPU_ENABLED", "false").lower() == "true"  # train boosters on a CUDA device
     
     # File paths
     BASE_DIR: Path = Path(__file__).parent.parent
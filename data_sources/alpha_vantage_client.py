@@ -1,5 +1,7 @@
 from typing import Dict, Any, List, Optional
+import asyncio
 import aiohttp
+from asyncio_throttle import Throttler
 from data_sources.base_client import BaseDataClient
 from utils.logging_config import logger
 from utils.cache_manager import cache_manager
@@ -11,6 +13,14 @@ class AlphaVantageClient(BaseDataClient):
     def __init__(self):
         super().__init__("AlphaVantage", "https://www.alphavantage.co/query")
         self.api_key = settings.ALPHA_VANTAGE_API_KEY
+        
+        # Alpha Vantage budgets API calls per minute, so every request shares one throttle
+        self.throttler = Throttler(rate_limit=settings.ALPHA_VANTAGE_CALLS_PER_MINUTE, period=60)
+    
+    async def _make_request(self, url: str, params: Dict = None, method: str = 'GET') -> Optional[Dict]:
+        """Make HTTP request within the Alpha Vantage call budget"""
+        async with self.throttler:
+            return await super()._make_request(url, params, method)
     
     async def fetch_stock_data(self, ticker: str) -> Dict[str, Any]:
         """Fetch stock data from Alpha Vantage"""
@@ -29,18 +39,12 @@ class AlphaVantageClient(BaseDataClient):
         stock_data = {}
         
         try:
-            # Get overview data
+            # Overview and technical indicators are requested concurrently
             overview_params = {
                 'function': 'OVERVIEW',
                 'symbol': ticker,
                 'apikey': self.api_key
             }
-            
-            overview_data = await self._make_request(self.base_url, overview_params)
-            if overview_data and 'Symbol' in overview_data:
-                stock_data['overview'] = overview_data
-            
-            # Get technical indicators
             rsi_params = {
                 'function': 'RSI',
                 'symbol': ticker,
@@ -50,7 +54,14 @@ class AlphaVantageClient(BaseDataClient):
                 'apikey': self.api_key
             }
             
-            rsi_data = await self._make_request(self.base_url, rsi_params)
+            overview_data, rsi_data = await asyncio.gather(
+                self._make_request(self.base_url, overview_params),
+                self._make_request(self.base_url, rsi_params)
+            )
+            
+            if overview_data and 'Symbol' in overview_data:
+                stock_data['overview'] = overview_data
+            
             if rsi_data and 'Technical Analysis: RSI' in rsi_data:
                 stock_data['rsi'] = rsi_data['Technical Analysis: RSI']
             
@@ -69,18 +80,16 @@ class AlphaVantageClient(BaseDataClient):
         """Fetch data for multiple stocks"""
         results = {}
         
-        # Process sequentially to avoid rate limits
-        for ticker in tickers:
-            try:
-                data = await self.fetch_stock_data(ticker)
-                results[ticker] = data
-                
-                # Add delay to respect rate limits
-                import asyncio
-                await asyncio.sleep(12)  # Alpha Vantage free tier: 5 calls per minute
-                
-            except Exception as e:
-                logger.error(f"Error fetching Alpha Vantage data for {ticker}: {e}")
+        # All tickers run concurrently; the shared throttle spaces their requests to the
+        # call budget, so no fixed sleep is needed between tickers
+        tasks = [self.fetch_stock_data(ticker) for ticker in tickers]
+        fetched = await asyncio.gather(*tasks, return_exceptions=True)
+        
+        for ticker, result in zip(tickers, fetched):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching Alpha Vantage data for {ticker}: {result}")
                 results[ticker] = {}
+            else:
+                results[ticker] = result
         
         return results
\ No newline at end of file
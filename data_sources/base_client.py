@@ -6,6 +6,12 @@ from utils.logging_config import logger
 from utils.rate_limiter import async_rate_limit
 from config.settings import settings
 
+# orjson decodes JSON responses several times faster than the stdlib parser aiohttp uses
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 class BaseDataClient(ABC):
     """Base class for data source clients"""
     
@@ -45,7 +51,10 @@ class BaseDataClient(ABC):
                 response.raise_for_status()
                 
                 if 'application/json' in response.headers.get('content-type', ''):
-                    data = await response.json()
+                    if orjson is not None:
+                        data = orjson.loads(await response.read())
+                    else:
+                        data = await response.json()
                 else:
                     data = await response.text()
                 
@@ -98,27 +98,19 @@ class EnhancedTradingService:
             if enable_ml_predictions:
                 historical_data = asyncio.run(self._fetch_historical_data(tickers))
             
-            # Analyze each trade comprehensively
-            analyzed_trades = []
-            for trade in filtered_trades:
+            # Analyze all trades comprehensively in one batch
+            analyzed_trades = self.financial_analyzer.analyze_comprehensive_batch(
+                filtered_trades, market_data, historical_data, n_jobs=settings.ANALYSIS_N_JOBS
+            )
+            
+            # Set additional properties
+            for analyzed_trade in analyzed_trades:
                 try:
-                    ticker_market_data = market_data.get(trade.ticker, {})
-                    ticker_historical_data = historical_data.get(trade.ticker)
-                    
-                    # Comprehensive analysis
-                    analyzed_trade = self.financial_analyzer.analyze_comprehensive(
-                        trade, ticker_market_data, ticker_historical_data
-                    )
-                    
-                    # Set additional properties
+                    ticker_market_data = market_data.get(analyzed_trade.ticker, {})
                     analyzed_trade.sector = self._determine_sector(ticker_market_data)
                     analyzed_trade.company_name = self._get_company_name(ticker_market_data)
-                    
-                    analyzed_trades.append(analyzed_trade)
-                    
                 except Exception as e:
-                    logger.error(f"Failed to analyze trade for {trade.ticker}: {e}")
-                    analyzed_trades.append(trade)  # Add unanalyzed trade
+                    logger.error(f"Failed to analyze trade for {analyzed_trade.ticker}: {e}")
             
             # Sort by composite score
             analyzed_trades.sort(key=lambda x: x.composite_score or 0, reverse=True)
@@ -289,28 +281,27 @@ class EnhancedTradingService:
             market_data = asyncio.run(self._fetch_comprehensive_market_data(list(tickers)))
             historical_data = asyncio.run(self._fetch_historical_data(list(tickers)))
             
+            # Create enhanced insider trades for analysis and score them in one batch
+            dummy_trades = [
+                EnhancedInsiderTrade(
+                    date=datetime.now(),
+                    ticker=ticker,
+                    insider_name="Watchlist Analysis",
+                    insider_title="System",
+                    trade_type="purchase",
+                    amount=0
+                )
+                for ticker in tickers
+            ]
+            analyzed_trades = self.financial_analyzer.analyze_comprehensive_batch(
+                dummy_trades, market_data, historical_data, n_jobs=settings.ANALYSIS_N_JOBS
+            )
+            
             watchlist_items = []
             
-            for ticker in tickers:
+            for analyzed_trade in analyzed_trades:
+                ticker = analyzed_trade.ticker
                 try:
-                    # Create enhanced insider trade for analysis
-                    dummy_trade = EnhancedInsiderTrade(
-                        date=datetime.now(),
-                        ticker=ticker,
-                        insider_name="Watchlist Analysis",
-                        insider_title="System",
-                        trade_type="purchase",
-                        amount=0
-                    )
-                    
-                    # Comprehensive analysis
-                    ticker_market_data = market_data.get(ticker, {})
-                    ticker_historical_data = historical_data.get(ticker)
-                    
-                    analyzed_trade = self.financial_analyzer.analyze_comprehensive(
-                        dummy_trade, ticker_market_data, ticker_historical_data
-                    )
-                    
                     # Create watchlist item
                     item = WatchlistItem(
                         ticker=ticker,
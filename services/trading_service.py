@@ -66,16 +66,20 @@ class TradingService:
         # Combine market data
         market_data.update(watchlist_market_data)
         
-        # Analyze each trade
-        analyzed_trades = []
-        for trade in filtered_trades:
-            try:
-                ticker_data = market_data.get(trade.ticker, {})
-                analyzed_trade = self.financial_analyzer.analyze_insider_trade(trade, ticker_data)
-                analyzed_trades.append(analyzed_trade)
-            except Exception as e:
-                logger.error(f"Failed to analyze trade for {trade.ticker}: {e}")
-                analyzed_trades.append(trade)  # Add unanalyzed trade
+        # Analyze all trades in one vectorized pass
+        try:
+            analyzed_trades = self.financial_analyzer.analyze_batch(filtered_trades, market_data)
+        except Exception as e:
+            logger.error(f"Batch analysis failed, analyzing trades one by one: {e}")
+            analyzed_trades = []
+            for trade in filtered_trades:
+                try:
+                    ticker_data = market_data.get(trade.ticker, {})
+                    analyzed_trade = self.financial_analyzer.analyze_insider_trade(trade, ticker_data)
+                    analyzed_trades.append(analyzed_trade)
+                except Exception as e:
+                    logger.error(f"Failed to analyze trade for {trade.ticker}: {e}")
+                    analyzed_trades.append(trade)  # Add unanalyzed trade
         
         logger.info(f"Completed analysis for {len(analyzed_trades)} trades")
         return analyzed_trades